@@ -54,6 +54,10 @@ class SystemConfigurationAdmin(admin.ModelAdmin):
                 "classes": ("collapse",),
             },
         ),
+        (
+            "LLM Routing",
+            {"fields": ("llm_model_routes",), "classes": ("collapse",)},
+        ),
         (
             "Metadata",
             {"fields": ("updated_at", "updated_by"), "classes": ("collapse",)},
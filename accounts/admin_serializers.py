@@ -13,6 +13,7 @@ class SystemConfigurationSerializer(serializers.ModelSerializer):
             "max_daily_questions",
             "additional_context",
             "custom_instructions",
+            "llm_model_routes",
             "updated_at",
         ]
         read_only_fields = ["updated_at"]
@@ -24,11 +25,20 @@ class SystemConfigurationSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("Max daily questions cannot exceed 1000.")
         return value
 
+    def validate_llm_model_routes(self, value):
+        from chat.routing import validate_routes
+
+        errors = validate_routes(value)
+        if errors:
+            raise serializers.ValidationError(errors)
+        return value
+
 
 class SystemConfigurationChoicesSerializer(serializers.Serializer):
 
     tone_choices = serializers.SerializerMethodField()
     length_choices = serializers.SerializerMethodField()
+    default_llm_routes = serializers.SerializerMethodField()
 
     def get_tone_choices(self, obj):
         from accounts.constants import TONE_CHOICES
@@ -40,6 +50,11 @@ class SystemConfigurationChoicesSerializer(serializers.Serializer):
 
         return [{"value": choice[0], "label": choice[1]} for choice in LENGTH_CHOICES]
 
+    def get_default_llm_routes(self, obj):
+        from chat.constants import LLM_DEFAULT_ROUTES
+
+        return LLM_DEFAULT_ROUTES
+
 
 class AdminStatsSerializer(serializers.Serializer):
 
@@ -48,3 +63,57 @@ class AdminStatsSerializer(serializers.Serializer):
     total_messages = serializers.IntegerField()
     questions_today = serializers.IntegerField()
     avg_questions_per_user = serializers.FloatField()
+    updated_at = serializers.DateTimeField(allow_null=True)
+
+
+class AdminStatsDaySerializer(serializers.Serializer):
+
+    date = serializers.DateField()
+    new_users = serializers.IntegerField()
+    sessions = serializers.IntegerField()
+    questions = serializers.IntegerField()
+    messages = serializers.IntegerField()
+    active_users = serializers.IntegerField()
+    classifier_mix = serializers.DictField(child=serializers.IntegerField())
+
+
+class LLMRouteMetricSerializer(serializers.Serializer):
+
+    purpose = serializers.CharField()
+    target = serializers.CharField()
+    calls = serializers.IntegerField()
+    errors = serializers.IntegerField()
+    fallbacks = serializers.IntegerField()
+    error_rate = serializers.FloatField()
+    parse_retries = serializers.IntegerField()
+    parse_retry_rate = serializers.FloatField()
+    repaired = serializers.IntegerField()
+    avg_latency_ms = serializers.FloatField()
+    input_tokens = serializers.IntegerField()
+    output_tokens = serializers.IntegerField()
+    cost_usd = serializers.FloatField()
+
+
+class StageTimingSerializer(serializers.Serializer):
+
+    stage = serializers.CharField()
+    count = serializers.IntegerField()
+    avg_ms = serializers.FloatField()
+    p50_ms = serializers.IntegerField(allow_null=True)
+    p95_ms = serializers.IntegerField(allow_null=True)
+    p99_ms = serializers.IntegerField(allow_null=True)
+    buckets = serializers.DictField(child=serializers.IntegerField())
+
+
+class LLMUsageSerializer(serializers.Serializer):
+
+    key = serializers.CharField(allow_null=True)
+    calls = serializers.IntegerField()
+    errors = serializers.IntegerField()
+    coalesced = serializers.IntegerField()
+    retries = serializers.IntegerField()
+    prompt_tokens = serializers.IntegerField()
+    output_tokens = serializers.IntegerField()
+    thinking_tokens = serializers.IntegerField()
+    cost_usd = serializers.DecimalField(max_digits=14, decimal_places=6)
+    avg_latency_ms = serializers.FloatField()
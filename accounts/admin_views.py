@@ -1,6 +1,9 @@
 import logging
+from datetime import date, timedelta
+from itertools import chain
 
-from django.db.models import Avg, Sum
+from django.db.models import Sum
+from django.http import StreamingHttpResponse
 from django.utils import timezone
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
@@ -8,14 +11,17 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 
 from accounts.admin_serializers import (
+    AdminStatsDaySerializer,
     AdminStatsSerializer,
+    LLMRouteMetricSerializer,
+    LLMUsageSerializer,
+    StageTimingSerializer,
     SystemConfigurationChoicesSerializer,
     SystemConfigurationSerializer,
 )
-from accounts.models import SystemConfiguration, User
+from accounts.models import SystemConfiguration
 from accounts.permissions import IsAdminUser
 from accounts.renders import UserRenderer
-from chat.models import ChatMessage, ChatSession, DailyQuestionQuota
 
 logger = logging.getLogger(__name__)
 
@@ -105,35 +111,60 @@ class ConfigurationChoicesAPIView(APIView):
             )
 
 
+def _date_range(request, default_days: int):
+    """
+    The inclusive ?start=&end= range (default: the last `default_days` days
+    through today), or a 400 Response when the dates are invalid.
+    """
+    try:
+        end = request.query_params.get("end")
+        end = date.fromisoformat(end) if end else timezone.now().date()
+        start = request.query_params.get("start")
+        start = (
+            date.fromisoformat(start)
+            if start
+            else end - timedelta(days=default_days - 1)
+        )
+    except ValueError:
+        return Response(
+            {"error": "Invalid date. Use YYYY-MM-DD."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    if start > end:
+        return Response(
+            {"error": "start must not be after end."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    return start, end
+
+
 class AdminStatsAPIView(APIView):
+    """Headline stats from the latest ChatStatsDaily row (refreshed by beat)."""
 
     renderer_classes = [UserRenderer]
     permission_classes = [IsAuthenticated, IsAdminUser]
 
     def get(self, request):
-        try:
-            today = timezone.now().date()
+        from chat.models import ChatStatsDaily
 
-            total_users = User.objects.count()
-            total_sessions = ChatSession.objects.count()
-            total_messages = ChatMessage.objects.count()
-
-            questions_today = (
-                DailyQuestionQuota.objects.filter(date=today).aggregate(
-                    total=Sum("question_count")
-                )["total"]
-                or 0
-            )
-
-            avg_result = DailyQuestionQuota.objects.aggregate(avg=Avg("question_count"))
-            avg_questions_per_user = round(avg_result["avg"] or 0, 2)
+        try:
+            latest = ChatStatsDaily.objects.first()
+            if latest is None:
+                latest = ChatStatsDaily(date=timezone.now().date())
 
             stats = {
-                "total_users": total_users,
-                "total_sessions": total_sessions,
-                "total_messages": total_messages,
-                "questions_today": questions_today,
-                "avg_questions_per_user": avg_questions_per_user,
+                "total_users": latest.total_users,
+                "total_sessions": latest.total_sessions,
+                "total_messages": latest.total_messages,
+                "questions_today": (
+                    latest.questions
+                    if latest.date == timezone.now().date()
+                    else 0
+                ),
+                "avg_questions_per_user": round(
+                    latest.total_questions / (latest.total_user_days or 1), 2
+                ),
+                "updated_at": latest.updated_at,
             }
 
             serializer = AdminStatsSerializer(stats)
@@ -150,3 +181,284 @@ class AdminStatsAPIView(APIView):
                 {"error": "Failed to fetch admin statistics."},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR,
             )
+
+
+class AdminStatsTimeSeriesAPIView(APIView):
+    """Sign-ups, sessions, questions and classifier mix per day."""
+
+    renderer_classes = [UserRenderer]
+    permission_classes = [IsAuthenticated, IsAdminUser]
+
+    def get(self, request):
+        from chat.constants import CHAT_STATS_DEFAULT_DAYS
+        from chat.models import ChatStatsDaily
+        from chat.stats import CLASSIFICATION_FIELDS
+
+        date_range = _date_range(request, CHAT_STATS_DEFAULT_DAYS)
+        if isinstance(date_range, Response):
+            return date_range
+        start, end = date_range
+
+        try:
+            rows = ChatStatsDaily.objects.filter(date__range=(start, end)).order_by(
+                "date"
+            )
+            series = [
+                {
+                    "date": row.date,
+                    "new_users": row.new_users,
+                    "sessions": row.sessions,
+                    "questions": row.questions,
+                    "messages": row.messages,
+                    "active_users": row.active_users,
+                    "classifier_mix": {
+                        value: getattr(row, field)
+                        for value, field in CLASSIFICATION_FIELDS.items()
+                    },
+                }
+                for row in rows
+            ]
+
+            serializer = AdminStatsDaySerializer(series, many=True)
+            return Response(
+                {
+                    "message": "Stats time series fetched successfully.",
+                    "data": {
+                        "start": start.isoformat(),
+                        "end": end.isoformat(),
+                        "days": serializer.data,
+                    },
+                },
+                status=status.HTTP_200_OK,
+            )
+        except Exception as e:
+            logger.error(f"Error fetching stats time series: {str(e)}")
+            return Response(
+                {"error": "Failed to fetch admin statistics."},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            )
+
+
+class ChatExportAPIView(APIView):
+    """
+    Stream chat transcripts as gzip-compressed NDJSON or CSV.
+
+    Filters: start/end (dates, inclusive), language and classification;
+    file_format is ndjson (default) or csv. (DRF reserves ?format=.) Rows
+    are read in chunks while the response is written, so memory stays flat
+    for any range. The first chunk is built before the response starts, so
+    a failing query is a 500; an error after that ends the stream early
+    and leaves a truncated .gz behind.
+    """
+
+    renderer_classes = [UserRenderer]
+    permission_classes = [IsAuthenticated, IsAdminUser]
+
+    def get(self, request):
+        from accounts.constants import LANGUAGE_CHOICES
+        from chat import export
+        from chat.constants import (
+            CHAT_EXPORT_DEFAULT_DAYS,
+            CHAT_EXPORT_FORMATS,
+            CLASSIFICATION_CHOICES,
+        )
+
+        date_range = _date_range(request, CHAT_EXPORT_DEFAULT_DAYS)
+        if isinstance(date_range, Response):
+            return date_range
+        start, end = date_range
+
+        params = request.query_params
+        export_format = params.get("file_format", "ndjson")
+        language = params.get("language") or None
+        classification = params.get("classification") or None
+        for name, value, allowed in (
+            ("file_format", export_format, CHAT_EXPORT_FORMATS),
+            ("language", language, [code for code, _ in LANGUAGE_CHOICES]),
+            (
+                "classification",
+                classification,
+                [value for value, _ in CLASSIFICATION_CHOICES],
+            ),
+        ):
+            if value is not None and value not in allowed:
+                return Response(
+                    {"error": f"{name} must be one of: {', '.join(allowed)}."},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+
+        try:
+            rows = export.export_rows(start, end, language, classification)
+            chunks = export.stream(rows, export_format)
+            # Runs the query here, where its errors can still get a 500
+            first = next(chunks)
+            response = StreamingHttpResponse(
+                chain([first], chunks), content_type="application/gzip"
+            )
+            response["Content-Disposition"] = (
+                f'attachment; filename="chat-{start}-{end}.{export_format}.gz"'
+            )
+            return response
+        except Exception as e:
+            logger.error(f"Error exporting chat transcripts: {str(e)}")
+            return Response(
+                {"error": "Failed to export chat transcripts."},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            )
+
+
+USAGE_FIELDS = (
+    "calls",
+    "errors",
+    "coalesced",
+    "retries",
+    "prompt_tokens",
+    "output_tokens",
+    "thinking_tokens",
+    "cost_usd",
+    "latency_ms",
+)
+
+
+def _usage_row(row: dict, key=None) -> dict:
+    usage = {field: row[field] or 0 for field in USAGE_FIELDS}
+    calls = usage["calls"] or 1
+    usage["avg_latency_ms"] = round(usage.pop("latency_ms") / calls, 1)
+    usage["key"] = key
+    return usage
+
+
+class LLMUsageAPIView(APIView):
+    """LLM calls, tokens and cost per date, user, purpose or model."""
+
+    renderer_classes = [UserRenderer]
+    permission_classes = [IsAuthenticated, IsAdminUser]
+
+    # Grouping column, and the value reported as each row's key
+    GROUP_FIELDS = {
+        "date": ("date", "date"),
+        "user": ("user_id", "user__email"),
+        "purpose": ("purpose", "purpose"),
+        "model": ("model", "model"),
+    }
+
+    def get(self, request):
+        from chat.constants import LLM_USAGE_DEFAULT_DAYS
+        from chat.models import LLMUsageDaily
+
+        group_by = request.query_params.get("group_by", "purpose")
+        if group_by not in self.GROUP_FIELDS:
+            return Response(
+                {"error": f"group_by must be one of: {', '.join(self.GROUP_FIELDS)}."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        date_range = _date_range(request, LLM_USAGE_DEFAULT_DAYS)
+        if isinstance(date_range, Response):
+            return date_range
+        start, end = date_range
+
+        try:
+            group_field, key_field = self.GROUP_FIELDS[group_by]
+            totals = {field: Sum(field) for field in USAGE_FIELDS}
+            rollups = LLMUsageDaily.objects.filter(date__range=(start, end))
+            rows = (
+                rollups.values(group_field, key_field)
+                .annotate(**totals)
+                .order_by("-cost_usd", group_field)
+            )
+
+            serializer = LLMUsageSerializer(
+                [_usage_row(row, row[key_field]) for row in rows], many=True
+            )
+            return Response(
+                {
+                    "message": "LLM usage fetched successfully.",
+                    "data": {
+                        "start": start.isoformat(),
+                        "end": end.isoformat(),
+                        "group_by": group_by,
+                        "totals": LLMUsageSerializer(
+                            _usage_row(rollups.aggregate(**totals))
+                        ).data,
+                        "rows": serializer.data,
+                    },
+                },
+                status=status.HTTP_200_OK,
+            )
+        except Exception as e:
+            logger.error(f"Error fetching LLM usage: {str(e)}")
+            return Response(
+                {"error": "Failed to fetch LLM usage."},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            )
+
+
+class LLMRouteMetricsAPIView(APIView):
+
+    renderer_classes = [UserRenderer]
+    permission_classes = [IsAuthenticated, IsAdminUser]
+
+    def get(self, request):
+        from chat.routing import get_route_metrics
+
+        try:
+            day = request.query_params.get("date")
+            day = date.fromisoformat(day) if day else timezone.now().date()
+        except ValueError:
+            return Response(
+                {"error": "Invalid date. Use YYYY-MM-DD."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        try:
+            metrics = get_route_metrics(day)
+            serializer = LLMRouteMetricSerializer(metrics, many=True)
+            return Response(
+                {
+                    "message": "LLM route metrics fetched successfully.",
+                    "data": {"date": day.isoformat(), "routes": serializer.data},
+                },
+                status=status.HTTP_200_OK,
+            )
+        except Exception as e:
+            logger.error(f"Error fetching LLM route metrics: {str(e)}")
+            return Response(
+                {"error": "Failed to fetch LLM route metrics."},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            )
+
+
+class StageTimingsAPIView(APIView):
+
+    renderer_classes = [UserRenderer]
+    permission_classes = [IsAuthenticated, IsAdminUser]
+
+    def get(self, request):
+        from chat.tracing import get_stage_histograms
+
+        try:
+            day = request.query_params.get("date")
+            day = date.fromisoformat(day) if day else timezone.now().date()
+        except ValueError:
+            return Response(
+                {"error": "Invalid date. Use YYYY-MM-DD."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        try:
+            stages = get_stage_histograms(day)
+            serializer = StageTimingSerializer(stages, many=True)
+            return Response(
+                {
+                    "message": "Stage timings fetched successfully.",
+                    "data": {"date": day.isoformat(), "stages": serializer.data},
+                },
+                status=status.HTTP_200_OK,
+            )
+        except Exception as e:
+            logger.error(f"Error fetching stage timings: {str(e)}")
+            return Response(
+                {"error": "Failed to fetch stage timings."},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            )
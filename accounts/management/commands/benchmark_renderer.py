@@ -0,0 +1,139 @@
+import json
+import time
+import tracemalloc
+import uuid
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from accounts import renders
+from chat.constants import (
+    MESSAGE_TYPE_BOT_ANSWER,
+    MESSAGE_TYPE_USER_QUESTION,
+    SENDER_BOT,
+    SENDER_USER,
+)
+from chat.models import ChatMessage
+from chat.serializers import ChatHistorySerializer
+
+
+class _Response:
+    status_code = 200
+
+
+def _legacy_render(data):
+    """The previous success path: copy, pop, stdlib dumps to str, encode."""
+    data = dict(data)
+    response = {
+        "data": {},
+        "status": True,
+        "message": data.pop("message", "Request was successful"),
+    }
+    response["data"] = data["data"] if list(data.keys()) == ["data"] else data
+    return json.dumps(response).encode("utf-8")
+
+
+def _history_payload(message_count):
+    """A ChatHistoryView body with alternating questions and answers."""
+    session_id = uuid.uuid4()
+    started = timezone.now()
+    messages = [
+        ChatMessage(
+            id=uuid.uuid4(),
+            session_id=session_id,
+            sequence_number=seq,
+            sender=SENDER_USER if seq % 2 else SENDER_BOT,
+            message_type=(
+                MESSAGE_TYPE_USER_QUESTION if seq % 2 else MESSAGE_TYPE_BOT_ANSWER
+            ),
+            message_text=(
+                "What refrigeration capacity do I need for my store?"
+                if seq % 2
+                else "For 5,000 tonnes plan about 140 TR of refrigeration. " * 8
+            ),
+            suggested_questions=(
+                None
+                if seq % 2
+                else ["How much power backup do I need?", "Which insulation?"]
+            ),
+            created_at=started + timedelta(seconds=seq),
+        )
+        for seq in range(1, message_count + 1)
+    ]
+    return {
+        "message": "Chat history retrieved successfully",
+        "data": {
+            "session": {
+                "id": str(session_id),
+                "user": 1,
+                "intake_data": 1,
+                "remaining_daily_questions": 7,
+                "can_ask_question": True,
+                "status": "active",
+                "started_at": started.isoformat(),
+                "ended_at": None,
+                "created_at": started.isoformat(),
+            },
+            "messages": ChatHistorySerializer(messages, many=True).data,
+            "pagination": {
+                "limit": message_count,
+                "has_more": False,
+                "before_seq": None,
+                "after_seq": message_count,
+                "last_seq": message_count,
+            },
+        },
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Microbenchmark UserRenderer against the previous stdlib path on "
+        "ChatHistoryView-shaped payloads: throughput and allocations."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--messages", type=int, nargs="+", default=[10, 50, 200])
+        parser.add_argument("--seconds", type=float, default=1.0)
+
+    def handle(self, *args, **options):
+        renderer = renders.UserRenderer()
+        context = {"response": _Response()}
+        candidates = {
+            "legacy": _legacy_render,
+            "current": lambda data: renderer.render(data, renderer_context=context),
+        }
+        self.stdout.write(
+            f"encoder: {'orjson' if renders.orjson is not None else 'stdlib'}"
+        )
+        self.stdout.write(
+            f"{'messages':>8} {'renderer':<8}{'bytes':>9}{'renders/s':>11}"
+            f"{'us/render':>11}{'peak KiB':>10}"
+        )
+
+        for count in options["messages"]:
+            payload = _history_payload(count)
+            for name, render in candidates.items():
+                body = render(payload)
+
+                iterations = 0
+                started = time.perf_counter()
+                deadline = started + options["seconds"]
+                while time.perf_counter() < deadline:
+                    render(payload)
+                    iterations += 1
+                elapsed = time.perf_counter() - started
+
+                # Peak memory allocated while rendering once
+                tracemalloc.start()
+                render(payload)
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+
+                self.stdout.write(
+                    f"{count:>8} {name:<8}{len(body):>9}"
+                    f"{iterations / elapsed:>11.0f}"
+                    f"{elapsed / iterations * 1e6:>11.1f}"
+                    f"{peak / 1024:>10.1f}"
+                )
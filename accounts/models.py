@@ -24,6 +24,10 @@ class User(AbstractUser):
     phone_number = models.CharField(max_length=20, blank=True, null=True, unique=True)
     is_sso_user = models.BooleanField(default=False)
 
+    class Meta(AbstractUser.Meta):
+        # Daily sign-up counts for the admin stats rollups
+        indexes = [models.Index(fields=["date_joined"])]
+
     def __str__(self):
         return self.email or self.username
 
@@ -63,6 +67,16 @@ class SystemConfiguration(models.Model):
 
     custom_instructions = models.TextField(blank=True, default="")
 
+    llm_model_routes = models.JSONField(
+        default=dict,
+        blank=True,
+        help_text=(
+            "Per-purpose LLM route overrides, e.g. "
+            '{"CLASSIFIER": ["gemini:gemini-2.5-flash-lite", "groq:llama-3.1-8b-instant"]}. '
+            "Later targets are fallbacks."
+        ),
+    )
+
     updated_at = models.DateTimeField(auto_now=True)
     updated_by = models.ForeignKey(
         User,
@@ -1,81 +1,98 @@
 import json
 
 from rest_framework import renderers
+from rest_framework.utils import encoders
+
+try:
+    import orjson
+except ImportError:  # Falls back to the stdlib encoder
+    orjson = None
+
+SUCCESS_MESSAGE = "Request was successful"
+ERROR_MESSAGE = "Something went wrong"
+# Checked in order for a top-level error message
+ERROR_MESSAGE_KEYS = ("message", "detail", "error", "non_field_errors")
+# Payloads shaped {"message": ..., "data": ...} are flattened into the envelope
+FLAT_KEYS = ({"data"}, {"data", "message"})
+
+_default = encoders.JSONEncoder().default
+
+if orjson is not None:
+    _ORJSON_OPTIONS = (
+        orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+    )
+
+
+def dumps(obj) -> bytes:
+    """
+    Compact UTF-8 JSON bytes. UUIDs, datetimes ("Z" for UTC, like DRF),
+    Decimals and lazy strings are supported; orjson is used when installed.
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default, option=_ORJSON_OPTIONS)
+    return json.dumps(
+        obj, cls=encoders.JSONEncoder, ensure_ascii=False, separators=(",", ":")
+    ).encode()
+
+
+def _first_error(errors):
+    """First message of a {field: [errors]} mapping, or None."""
+    for value in errors.values():
+        if isinstance(value, list) and value:
+            return value[0]
+        if isinstance(value, str):
+            return value
+    return None
+
+
+def get_error_message(data) -> str:
+    """Single human-readable message for an error response body."""
+    if not isinstance(data, dict):
+        return ERROR_MESSAGE
+
+    message = None
+    for key in ERROR_MESSAGE_KEYS:
+        message = data.get(key)
+        if message:
+            break
+    # Fall back to the first field error
+    if not message:
+        message = _first_error(data)
+
+    if isinstance(message, dict):
+        message = _first_error(message) or message
+    elif isinstance(message, list) and message:
+        message = message[0]
+
+    return str(message) if message else ERROR_MESSAGE
 
 
 class UserRenderer(renderers.JSONRenderer):
+    """
+    Wraps every response as {"data", "status", "message"}.
+
+    Success payloads are placed in the envelope as-is (the view's data is
+    neither copied nor mutated unless it carries extra keys next to
+    "message"), and the whole envelope is encoded straight to bytes.
+    """
+
     charset = "utf-8"
 
     def render(self, data, accepted_media_type=None, renderer_context=None):
-        response = {
-            "data": {},
-            "status": True,
-            "message": "",
-        }
-
-        if renderer_context:
-            response_status = renderer_context.get("response").status_code
-
-            if response_status >= 400:
-                response["status"] = False
-
-                if isinstance(data, dict):
-                    message = (
-                        data.get("message")
-                        or data.get("detail")
-                        or data.get("error")
-                        or data.get("non_field_errors")
-                    )
-
-                    # If message is still None or empty, try to extract first field error
-                    if not message:
-                        for field, errors in data.items():
-                            if isinstance(errors, list) and errors:
-                                message = errors[0]
-                                break
-                            elif isinstance(errors, str):
-                                message = errors
-                                break
-
-                    # If message is still a dict or list, convert to string
-                    if isinstance(message, dict):
-                        # Extract first error from nested dictionary
-                        for field, errors in message.items():
-                            if isinstance(errors, list) and errors:
-                                message = errors[0]
-                                break
-                            elif isinstance(errors, str):
-                                message = errors
-                                break
-                    elif isinstance(message, list) and message:
-                        message = message[0]
-
-                    # Ensure message is always a string
-                    response["message"] = (
-                        str(message) if message else "Something went wrong"
-                    )
-                else:
-                    response["message"] = "Something went wrong"
-
-                response["data"] = {}
-
-            else:
-                if isinstance(data, dict):
-                    # Preferably fetch and pop 'message' first to avoid data nesting
-                    response["message"] = data.pop("message", "Request was successful")
-
-                    # If after popping, the remaining dict is exactly {"data": [...]}, flatten it
-                    if list(data.keys()) == ["data"]:
-                        response["data"] = data["data"]
-                    else:
-                        response["data"] = data
-
-                elif isinstance(data, list):
-                    response["data"] = data
-                    response["message"] = "Request was successful"
-
-                else:
-                    response["data"] = data
-                    response["message"] = "Request was successful"
-
-        return json.dumps(response)
+        if not renderer_context:
+            return dumps({"data": {}, "status": True, "message": ""})
+
+        if renderer_context["response"].status_code >= 400:
+            return dumps(
+                {"data": {}, "status": False, "message": get_error_message(data)}
+            )
+
+        message = SUCCESS_MESSAGE
+        if isinstance(data, dict):
+            message = data.get("message", SUCCESS_MESSAGE)
+            if data.keys() in FLAT_KEYS:
+                data = data["data"]
+            elif "message" in data:
+                data = {key: value for key, value in data.items() if key != "message"}
+
+        return dumps({"data": data, "status": True, "message": message})
@@ -1,3 +1,246 @@
-from django.test import TestCase
+import csv
+import gzip
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+import jwt
+from django.conf import settings
+from django.db import DatabaseError
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from accounts.models import SystemConfiguration, UserOTP
+from advisory.testing import PASSWORD, QueryBudgetTestCase
+from chat import stats
+from chat.constants import CLASSIFICATION_ANSWER_DIRECTLY, SENDER_USER
+from chat.models import ChatMessage, LLMUsageDaily
+
+
+class AccountsQueryBudgetTests(QueryBudgetTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = cls.make_user("farmer@example.com")
+        cls.make_session(cls.user, messages=2)
+        cls.admin = cls.make_user("admin@example.com", is_staff=True)
+        SystemConfiguration.objects.create()
+        ChatMessage.objects.filter(sender=SENDER_USER).update(
+            classification=CLASSIFICATION_ANSWER_DIRECTLY
+        )
+        stats.refresh()
+        for purpose in ("CLASSIFIER", "ANSWER_GENERATOR"):
+            LLMUsageDaily.objects.create(
+                date=timezone.now().date(),
+                user=cls.user,
+                purpose=purpose,
+                model="gemini-2.5-flash",
+                calls=10,
+                prompt_tokens=20_000,
+                output_tokens=4_000,
+                cost_usd="0.016",
+                latency_ms=12_000,
+            )
+
+    def setUp(self):
+        self.anonymous = APIClient()
+        self.client = self.client_for(self.user)
+        self.admin_client = self.client_for(self.admin)
+
+    def test_signup(self):
+        self.assertWithinBudget(
+            self.anonymous,
+            "signup",
+            "POST",
+            "/signup/",
+            {"email": "new@example.com", "password": PASSWORD, "first_name": "New"},
+            expected_status=201,
+        )
+
+    def test_email_login(self):
+        self.assertWithinBudget(
+            self.anonymous,
+            "email_login",
+            "POST",
+            "/login/",
+            {"email": self.user.email, "password": PASSWORD},
+        )
+
+    def test_token_refresh(self):
+        self.assertWithinBudget(
+            self.anonymous,
+            "token_refresh",
+            "POST",
+            "/token/refresh/",
+            {"refresh": str(RefreshToken.for_user(self.user))},
+        )
+
+    def test_forgot_password(self):
+        self.assertWithinBudget(
+            self.anonymous,
+            "forgot_password",
+            "POST",
+            "/forgot-password/",
+            {"email": self.user.email},
+        )
+
+    def test_verify_otp(self):
+        UserOTP.objects.create(
+            user=self.user, purpose="forgot_password", otp_code="123456"
+        )
+        self.assertWithinBudget(
+            self.anonymous,
+            "verify_otp",
+            "POST",
+            "/verify-otp/",
+            {"email": self.user.email, "otp": "123456"},
+        )
+
+    def test_reset_password(self):
+        UserOTP.objects.create(
+            user=self.user, purpose="forgot_password", otp_code="123456"
+        )
+        self.assertWithinBudget(
+            self.anonymous,
+            "reset_password",
+            "POST",
+            "/reset-password/",
+            {"email": self.user.email, "otp": "123456", "new_password": PASSWORD},
+        )
+
+    def test_user_detail(self):
+        self.assertWithinBudget(self.client, "user-detail", "GET", "/user/profile/")
+
+    def test_update_user_language(self):
+        # Switching language re-localizes the active intake's onboarding
+        self.assertWithinBudget(
+            self.client,
+            "user-detail",
+            "POST",
+            "/user/profile/",
+            {"preferred_language": "hi"},
+        )
+
+    def test_admin_config(self):
+        self.assertWithinBudget(
+            self.admin_client, "admin-config", "GET", "/settings/config/"
+        )
+
+    def test_update_admin_config(self):
+        self.assertWithinBudget(
+            self.admin_client,
+            "admin-config",
+            "POST",
+            "/settings/config/",
+            {"max_daily_questions": 15},
+        )
+
+    def test_admin_config_choices(self):
+        self.assertWithinBudget(
+            self.admin_client,
+            "admin-config-choices",
+            "GET",
+            "/settings/config/choices/",
+        )
+
+    def test_admin_stats(self):
+        response = self.assertWithinBudget(
+            self.admin_client, "admin-stats", "GET", "/settings/stats/"
+        )
+        data = response.json()["data"]
+        self.assertEqual((data["total_users"], data["total_messages"]), (2, 2))
+
+    def test_admin_stats_timeseries(self):
+        response = self.assertWithinBudget(
+            self.admin_client,
+            "admin-stats-timeseries",
+            "GET",
+            "/settings/stats/timeseries/",
+            {"start": (timezone.now() - timedelta(days=6)).date().isoformat()},
+        )
+        days = response.json()["data"]["days"]
+        self.assertEqual(days[-1]["sessions"], 1)
+        self.assertIn("ANSWER_DIRECTLY", days[-1]["classifier_mix"])
+
+    def test_admin_llm_usage(self):
+        response = self.assertWithinBudget(
+            self.admin_client,
+            "admin-llm-usage",
+            "GET",
+            "/settings/llm-usage/",
+            {"group_by": "user"},
+        )
+        data = response.json()["data"]
+        self.assertEqual(data["rows"][0]["key"], self.user.email)
+        self.assertEqual(data["totals"]["calls"], 20)
+
+    def test_admin_chat_export(self):
+        response = self.assertWithinBudget(
+            self.admin_client,
+            "admin-chat-export",
+            "GET",
+            "/settings/chat-export/",
+            {
+                "file_format": "csv",
+                "language": "en",
+                "classification": "ANSWER_DIRECTLY",
+            },
+        )
+        self.assertEqual(response["Content-Type"], "application/gzip")
+        body = gzip.decompress(response.streamed_body).decode()
+        rows = list(csv.reader(body.splitlines()))
+        self.assertEqual(rows[0][:3], ["session_id", "user_id", "language"])
+        # The classified question and the bot reply that follows it
+        self.assertEqual([row[4] for row in rows[1:]], ["user", "bot"])
+
+        response = self.admin_client.get(
+            "/settings/chat-export/", {"classification": "UNKNOWN"}
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_admin_chat_export_query_error_is_a_500(self):
+        def failing_rows(*args):
+            raise DatabaseError("statement timeout")
+            yield
+
+        with mock.patch("chat.export.export_rows", side_effect=failing_rows):
+            response = self.admin_client.get("/settings/chat-export/")
+        self.assertEqual(response.status_code, 500)
+        self.assertFalse(response.streaming)
+
+    def test_admin_llm_route_metrics(self):
+        # Route metrics live in Redis only
+        with mock.patch("chat.routing.get_route_metrics", return_value=[]):
+            self.assertWithinBudget(
+                self.admin_client,
+                "admin-llm-route-metrics",
+                "GET",
+                "/settings/llm-routes/metrics/",
+            )
+
+    def test_admin_stage_timings(self):
+        # Stage histograms live in Redis only
+        with mock.patch("chat.tracing.get_stage_histograms", return_value=[]):
+            self.assertWithinBudget(
+                self.admin_client,
+                "admin-stage-timings",
+                "GET",
+                "/settings/stage-timings/",
+            )
+
+    def test_sso_verify_token(self):
+        token = jwt.encode(
+            {
+                "phone": "+919999999999",
+                "first_name": "Sso",
+                "exp": timezone.now() + timedelta(minutes=5),
+            },
+            settings.SSO_SECRET_KEY,
+            algorithm="HS256",
+        )
+        self.assertWithinBudget(
+            self.anonymous,
+            "sso-verify-token",
+            "POST",
+            "/sso/verify-token/",
+            {"token": token},
+        )
@@ -3,7 +3,12 @@ from rest_framework_simplejwt.views import TokenRefreshView
 
 from accounts.admin_views import (
     AdminStatsAPIView,
+    AdminStatsTimeSeriesAPIView,
+    ChatExportAPIView,
     ConfigurationChoicesAPIView,
+    LLMRouteMetricsAPIView,
+    LLMUsageAPIView,
+    StageTimingsAPIView,
     SystemConfigurationAPIView,
 )
 from accounts.sso_views import SSOVerifyTokenAPIView
@@ -35,5 +40,22 @@ urlpatterns = [
         name="admin-config-choices",
     ),
     path("settings/stats/", AdminStatsAPIView.as_view(), name="admin-stats"),
+    path(
+        "settings/stats/timeseries/",
+        AdminStatsTimeSeriesAPIView.as_view(),
+        name="admin-stats-timeseries",
+    ),
+    path(
+        "settings/llm-routes/metrics/",
+        LLMRouteMetricsAPIView.as_view(),
+        name="admin-llm-route-metrics",
+    ),
+    path("settings/llm-usage/", LLMUsageAPIView.as_view(), name="admin-llm-usage"),
+    path("settings/chat-export/", ChatExportAPIView.as_view(), name="admin-chat-export"),
+    path(
+        "settings/stage-timings/",
+        StageTimingsAPIView.as_view(),
+        name="admin-stage-timings",
+    ),
     path("sso/verify-token/", SSOVerifyTokenAPIView.as_view(), name="sso-verify-token"),
 ]
@@ -328,6 +328,8 @@ class UserDetailAPIView(APIView):
 
             user.save()
 
+            onboarding_task_id = None
+
             if (
                 "preferred_language" in data
                 and data["preferred_language"] != old_language
@@ -337,8 +339,9 @@ class UserDetailAPIView(APIView):
                     TYPE_EXISTING,
                 )
                 from chat.constants import WELCOME_MESSAGE_BUILD, WELCOME_MESSAGE_EXISTING
+                from usecase_engine import onboarding_cache
                 from usecase_engine.models import UserInput
-                from usecase_engine.utils import generate_localized_onboarding_content
+                from usecase_engine.tasks import generate_onboarding_content_task
 
                 active_intake = UserInput.objects.filter(
                     user=user, is_active=True
@@ -352,24 +355,39 @@ class UserDetailAPIView(APIView):
                     else:
                         original_welcome = "Welcome! How can I help you today?"
 
-                    welcome_message, suggestions = (
-                        generate_localized_onboarding_content(
-                            active_intake.user_choice,
-                            active_intake.intake_data,
-                            user.preferred_language,
-                            original_welcome,
-                        )
+                    cached = onboarding_cache.get_cached_content(
+                        active_intake.user_choice,
+                        user.preferred_language,
+                        active_intake.intake_data,
+                        original_welcome,
                     )
 
-                    active_intake.welcome_message = welcome_message
-                    active_intake.suggestions = suggestions
-                    active_intake.save(update_fields=["welcome_message", "suggestions"])
+                    if cached:
+                        active_intake.welcome_message, active_intake.suggestions = (
+                            cached
+                        )
+                        active_intake.save(
+                            update_fields=["welcome_message", "suggestions"]
+                        )
+                    else:
+                        # Re-localized in the background; the previous content
+                        # stays in place until the task finishes
+                        task = generate_onboarding_content_task.delay(
+                            user_input_id=active_intake.id,
+                            language=user.preferred_language,
+                            original_welcome=original_welcome,
+                        )
+                        onboarding_task_id = task.id
 
             serializer = UserSerializer(user)
+            user_data = serializer.data
+            if onboarding_task_id:
+                user_data["onboarding_task_id"] = onboarding_task_id
+
             return Response(
                 {
                     "message": "User updated successfully",
-                    "data": serializer.data,
+                    "data": user_data,
                 },
                 status=status.HTTP_200_OK,
             )
@@ -0,0 +1,174 @@
+"""
+Low-overhead logging for the chat hot path.
+
+`build_logging()` returns the LOGGING dict for an environment: plain text
+or one JSON object per line, optionally behind a queue so request and task
+threads only enqueue records while a background thread formats and writes
+them. Prompt bodies go through `log_prompt()`, which logs at DEBUG only,
+samples, redacts emails and phone numbers and truncates, so the full
+prompt is never formatted when nobody will read it.
+
+Settings imports this module, so it must not touch django.conf at import.
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import re
+import sys
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+_EMAIL_RE = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+# 10-13 digits, optionally led by + and split by spaces or hyphens
+_PHONE_RE = re.compile(r"(?<![\w.])\+?(?:\d[\s-]?){9,12}\d(?![\w.])")
+
+# Attributes every LogRecord has; anything else was passed via `extra`
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {
+    "message",
+    "asctime",
+    "correlation_id",
+}
+
+_plain = logging.Formatter()
+
+
+def redact(text, max_chars: int = None) -> str:
+    """Mask emails and phone numbers, then truncate to `max_chars`."""
+    text = str(text)
+    if "@" in text:
+        text = _EMAIL_RE.sub("[email]", text)
+    text = _PHONE_RE.sub("[phone]", text)
+    if max_chars and len(text) > max_chars:
+        return f"{text[:max_chars]}... [+{len(text) - max_chars} chars]"
+    return text
+
+
+def log_prompt(logger, label: str, prompt: str):
+    """Log a sampled, redacted and truncated prompt body at DEBUG."""
+    if not logger.isEnabledFor(logging.DEBUG):
+        return
+
+    from django.conf import settings
+
+    if random.random() >= settings.LOG_PROMPT_SAMPLE_RATE:
+        return
+    logger.debug(
+        "%s prompt (%d chars): %s",
+        label,
+        len(prompt),
+        redact(prompt, settings.LOG_PROMPT_MAX_CHARS),
+    )
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, with the correlation ID and `extra` fields."""
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        correlation_id = getattr(record, "correlation_id", None)
+        if correlation_id:
+            entry["correlation_id"] = correlation_id
+        for name, value in vars(record).items():
+            if name not in _RECORD_ATTRS:
+                entry[name] = value
+
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class QueueStreamHandler(QueueHandler):
+    """
+    Write to a stream from a background thread; callers only enqueue.
+
+    The listener thread is restarted in forked children (prefork Celery
+    workers, preloading web servers), where the parent's thread is gone.
+    """
+
+    def __init__(self, stream=None):
+        super().__init__(queue.SimpleQueue())
+        self.target = logging.StreamHandler(stream or sys.stderr)
+        self.listener = None
+        self._start()
+        os.register_at_fork(after_in_child=self._start)
+        atexit.register(self.close)
+
+    def _start(self):
+        self.queue = queue.SimpleQueue()
+        self.listener = QueueListener(self.queue, self.target)
+        self.listener.start()
+
+    def setFormatter(self, fmt):
+        # Formatting happens on the listener thread
+        self.target.setFormatter(fmt)
+
+    def prepare(self, record):
+        # Resolve args and tracebacks now, as they may change later. Not
+        # copied: this only pre-renders what every formatter would render
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info and not record.exc_text:
+            record.exc_text = _plain.formatException(record.exc_info)
+        return record
+
+    def close(self):
+        if self.listener is not None and self.listener._thread is not None:
+            self.listener.stop()
+        super().close()
+
+
+def build_logging(
+    level: str = "DEBUG",
+    structured: bool = False,
+    queued: bool = False,
+    prompt_level: str = None,
+) -> dict:
+    """
+    LOGGING for one environment.
+
+    `level` applies to the chat loggers; `prompt_level` (default `level`)
+    to chat.prompts, whose DEBUG records are the prompt bodies. Everything
+    else logs WARNING and above through the same handler.
+    """
+    handler = {"formatter": "json" if structured else "verbose"}
+    if queued:
+        handler["()"] = QueueStreamHandler
+    else:
+        handler["class"] = "logging.StreamHandler"
+    handler["filters"] = ["correlation_id"]
+
+    return {
+        "version": 1,
+        "disable_existing_loggers": False,
+        "filters": {
+            "correlation_id": {"()": "chat.tracing.CorrelationIdFilter"},
+        },
+        "formatters": {
+            "verbose": {
+                "format": "{levelname} {asctime} {module} {message}",
+                "style": "{",
+            },
+            "simple": {
+                "format": "{levelname} {message}",
+                "style": "{",
+            },
+            "json": {"()": JsonFormatter},
+        },
+        "handlers": {"console": handler},
+        "root": {"handlers": ["console"], "level": "WARNING"},
+        "loggers": {
+            "chat": {"handlers": ["console"], "level": level, "propagate": False},
+            "chat.prompts": {"level": prompt_level or level},
+        },
+    }
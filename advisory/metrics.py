@@ -0,0 +1,358 @@
+"""
+Prometheus-style metrics shared by every web and Celery process.
+
+Observations are buffered in process memory and flushed to Redis in one
+pipeline once MAX_PENDING pile up or FLUSH_INTERVAL_SECONDS have passed
+(checked as requests finish, see MetricsMiddleware), after each Celery task
+and at exit, so any web worker can export the totals of all workers without
+a shared multiprocess directory. `/metrics/` renders them in the Prometheus
+text exposition format; gauges are read when scraped.
+
+Recording never fails the caller: if Redis is down the buffered
+observations are dropped with a warning, like the LLM route metrics.
+"""
+
+import atexit
+import hmac
+import logging
+import threading
+import time
+
+from celery.signals import task_postrun, task_prerun
+from django.conf import settings
+from django.http import HttpResponse
+
+logger = logging.getLogger(__name__)
+
+METRICS_KEY_PREFIX = "metrics"
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+# A request flushes only when this many observations are buffered or the
+# last flush is this old, so most requests make no Redis round-trip
+MAX_PENDING = 500
+FLUSH_INTERVAL_SECONDS = 5.0
+
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+LLM_LATENCY_BUCKETS = (0.25, 0.5, 1, 2, 4, 8, 15, 30, 60)
+TASK_RUNTIME_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 40, 80)
+
+_registry = {}
+_pending = []
+_pending_lock = threading.Lock()
+_last_flush = time.monotonic()
+# Called with no arguments on every flush, to write other buffers with it
+_flush_callbacks = []
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Metric:
+    type = None
+
+    def __init__(self, name: str, documentation: str, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.key = f"{METRICS_KEY_PREFIX}:{name}"
+        _registry[name] = self
+
+    def _labels(self, labels: dict) -> str:
+        return ",".join(
+            f'{name}="{_escape(labels.get(name, ""))}"' for name in self.labelnames
+        )
+
+    def header(self) -> list:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type}",
+        ]
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        _record([(self.key, self._labels(labels), amount)])
+
+    def render(self, values: dict) -> list:
+        return [
+            f"{self.name}{{{labels}}} {_format_value(value)}"
+            if labels
+            else f"{self.name} {_format_value(value)}"
+            for labels, value in sorted(values.items())
+        ]
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, **labels):
+        labels = self._labels(labels)
+        bucket = next((le for le in self.buckets if value <= le), "+Inf")
+        _record(
+            [
+                (self.key, f"{labels}\t{bucket}", 1),
+                (self.key, f"{labels}\tsum", value),
+                (self.key, f"{labels}\tcount", 1),
+            ]
+        )
+
+    def render(self, values: dict) -> list:
+        series = {}
+        for field, value in values.items():
+            labels, suffix = field.split("\t")
+            series.setdefault(labels, {})[suffix] = value
+
+        lines = []
+        for labels, data in sorted(series.items()):
+            prefix = f"{labels}," if labels else ""
+            cumulative = 0
+            for le in self.buckets:
+                cumulative += data.get(str(le), 0)
+                lines.append(
+                    f'{self.name}_bucket{{{prefix}le="{le}"}} '
+                    f"{_format_value(cumulative)}"
+                )
+            count = data.get("count", 0)
+            lines.append(
+                f'{self.name}_bucket{{{prefix}le="+Inf"}} {_format_value(count)}'
+            )
+            suffix = f"{{{labels}}}" if labels else ""
+            lines.append(f"{self.name}_sum{suffix} {_format_value(data.get('sum', 0))}")
+            lines.append(f"{self.name}_count{suffix} {_format_value(count)}")
+        return lines
+
+
+class Gauge(Metric):
+    """Read when scraped: `collect()` returns [(labels dict, value), ...]."""
+
+    type = "gauge"
+
+    def __init__(self, name, documentation, labelnames=(), collect=None):
+        super().__init__(name, documentation, labelnames)
+        self.collect = collect
+
+    def render(self, values=None) -> list:
+        lines = []
+        for labels, value in self.collect():
+            labels = self._labels(labels)
+            suffix = f"{{{labels}}}" if labels else ""
+            lines.append(f"{self.name}{suffix} {_format_value(value)}")
+        return lines
+
+
+def _record(observations):
+    with _pending_lock:
+        _pending.extend(observations)
+        full = len(_pending) >= MAX_PENDING
+    if full:
+        flush()
+
+
+def on_flush(callback):
+    """Run `callback` on every flush (usable as a decorator)."""
+    _flush_callbacks.append(callback)
+    return callback
+
+
+def flush_if_due():
+    """Flush when the buffer is full or FLUSH_INTERVAL_SECONDS have passed."""
+    with _pending_lock:
+        due = (
+            len(_pending) >= MAX_PENDING
+            or time.monotonic() - _last_flush >= FLUSH_INTERVAL_SECONDS
+        )
+    if due:
+        flush()
+
+
+@atexit.register
+def flush():
+    """Write buffered observations to Redis in one pipeline."""
+    from django_redis import get_redis_connection
+
+    global _pending, _last_flush
+    with _pending_lock:
+        observations, _pending = _pending, []
+        _last_flush = time.monotonic()
+
+    for callback in _flush_callbacks:
+        try:
+            callback()
+        except Exception as e:
+            logger.warning(f"Metrics flush callback {callback.__name__} failed: {e}")
+    if not observations:
+        return
+
+    try:
+        pipe = get_redis_connection("default").pipeline(transaction=False)
+        for key, field, amount in observations:
+            pipe.hincrbyfloat(key, field, amount)
+        pipe.execute()
+    except Exception as e:
+        logger.warning(f"Failed to flush {len(observations)} metric observations: {e}")
+
+
+def render() -> str:
+    """All registered metrics in the Prometheus text exposition format."""
+    from django_redis import get_redis_connection
+
+    flush()
+
+    stored = [metric for metric in _registry.values() if metric.type != "gauge"]
+    pipe = get_redis_connection("default").pipeline(transaction=False)
+    for metric in stored:
+        pipe.hgetall(metric.key)
+    values = {
+        metric.name: {field.decode(): float(value) for field, value in raw.items()}
+        for metric, raw in zip(stored, pipe.execute())
+    }
+
+    lines = []
+    for name, metric in sorted(_registry.items()):
+        try:
+            samples = metric.render(values.get(name))
+        except Exception as e:
+            logger.warning(f"Failed to collect metric {name}: {e}")
+            continue
+        lines.extend(metric.header() + samples)
+    return "\n".join(lines) + "\n"
+
+
+def metrics_view(request):
+    """Prometheus scrape endpoint, enabled by METRICS_AUTH_TOKEN."""
+    token = settings.METRICS_AUTH_TOKEN
+    if not token:
+        return HttpResponse("Metrics are disabled.", status=404)
+
+    header = request.headers.get("Authorization", "")
+    if not hmac.compare_digest(header.encode(), f"Bearer {token}".encode()):
+        return HttpResponse("Unauthorized", status=401)
+
+    try:
+        return HttpResponse(render(), content_type=CONTENT_TYPE)
+    except Exception as e:
+        logger.error(f"Error exporting metrics: {str(e)}")
+        return HttpResponse("Metrics store unavailable.", status=503)
+
+
+def celery_queue_depth(queue: str = None) -> int:
+    """Messages waiting in a Celery queue (default: the task default queue)."""
+    from advisory.celery import app
+
+    queue = queue or app.conf.task_default_queue
+    with app.connection_for_read() as conn:
+        return conn.default_channel.queue_declare(
+            queue=queue, passive=True
+        ).message_count
+
+
+# HTTP -------------------------------------------------------------------
+
+http_requests = Counter(
+    "http_requests_total",
+    "HTTP requests by view, method and status code.",
+    ("view", "method", "status"),
+)
+http_request_duration = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by view and method.",
+    ("view", "method"),
+)
+
+# LLM --------------------------------------------------------------------
+
+llm_calls = Counter(
+    "llm_calls_total",
+    "LLM provider calls by purpose, route and outcome.",
+    ("purpose", "provider", "model", "outcome"),
+)
+llm_call_duration = Histogram(
+    "llm_call_duration_seconds",
+    "LLM provider call latency by purpose and route.",
+    ("purpose", "provider", "model"),
+    buckets=LLM_LATENCY_BUCKETS,
+)
+llm_tokens = Counter(
+    "llm_tokens_total",
+    "LLM tokens by purpose, model and kind (prompt, output, thinking).",
+    ("purpose", "model", "kind"),
+)
+llm_structured_output = Counter(
+    "llm_structured_output_total",
+    "Structured-output responses repaired locally or retried.",
+    ("purpose", "model", "outcome"),
+)
+
+# Chat -------------------------------------------------------------------
+
+chat_classifications = Counter(
+    "chat_classifications_total",
+    "Classifier outcomes for user questions.",
+    ("classification",),
+)
+chat_quota_rejections = Counter(
+    "chat_quota_rejections_total",
+    "Questions rejected by the daily quota, by where the check ran.",
+    ("stage",),
+)
+cache_lookups = Counter(
+    "cache_lookups_total",
+    "Cache lookups by cache and result (hit, miss).",
+    ("cache", "result"),
+)
+
+# Celery -----------------------------------------------------------------
+
+celery_tasks = Counter(
+    "celery_tasks_total",
+    "Finished Celery tasks by task and final state.",
+    ("task", "state"),
+)
+celery_task_duration = Histogram(
+    "celery_task_duration_seconds",
+    "Celery task runtime by task.",
+    ("task",),
+    buckets=TASK_RUNTIME_BUCKETS,
+)
+
+
+def _queue_depths():
+    from advisory.celery import app
+
+    queue = app.conf.task_default_queue
+    return [({"queue": queue}, celery_queue_depth(queue))]
+
+
+celery_queue_messages = Gauge(
+    "celery_queue_messages",
+    "Messages waiting in the Celery queue.",
+    ("queue",),
+    collect=_queue_depths,
+)
+
+_task_started = {}
+
+
+@task_prerun.connect
+def _task_prerun(task_id=None, **kwargs):
+    _task_started[task_id] = time.perf_counter()
+
+
+@task_postrun.connect
+def _task_postrun(task_id=None, task=None, state=None, **kwargs):
+    started = _task_started.pop(task_id, None)
+    if started is not None and task is not None:
+        name = task.name.rsplit(".", 1)[-1]
+        celery_task_duration.observe(time.perf_counter() - started, task=name)
+        celery_tasks.inc(task=name, state=state or "UNKNOWN")
+    flush()
@@ -0,0 +1,25 @@
+import time
+
+from advisory import metrics
+
+
+class MetricsMiddleware:
+    """Records per-view request latency; metrics are flushed when due."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        started = time.perf_counter()
+        response = self.get_response(request)
+
+        match = request.resolver_match
+        view = match.view_name if match else "unmatched"
+        metrics.http_request_duration.observe(
+            time.perf_counter() - started, view=view, method=request.method
+        )
+        metrics.http_requests.inc(
+            view=view, method=request.method, status=response.status_code
+        )
+        metrics.flush_if_due()
+        return response
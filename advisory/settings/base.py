@@ -15,6 +15,8 @@ from pathlib import Path
 
 from decouple import config
 
+from advisory.log import build_logging
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -84,6 +86,7 @@ SIMPLE_JWT = {
 }
 
 MIDDLEWARE = [
+    "advisory.middleware.MetricsMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -187,57 +190,66 @@ CELERY_TASK_SERIALIZER = "json"
 CELERY_RESULT_SERIALIZER = "json"
 CELERY_TIMEZONE = TIME_ZONE
 CELERY_RESULT_EXTENDED = True  # Store additional task metadata
-
-
-# Logging configuration
-LOGGING = {
-    "version": 1,
-    "disable_existing_loggers": False,
-    "formatters": {
-        "verbose": {
-            "format": "{levelname} {asctime} {module} {message}",
-            "style": "{",
-        },
-        "simple": {
-            "format": "{levelname} {message}",
-            "style": "{",
-        },
+# Periodic tasks, run by `celery -A advisory beat`
+CELERY_BEAT_SCHEDULE = {
+    "flush-llm-call-log": {
+        "task": "chat.tasks.flush_llm_call_log_task",
+        "schedule": 30.0,
     },
-    "handlers": {
-        "console": {
-            "level": "DEBUG",
-            "class": "logging.StreamHandler",
-            "formatter": "verbose",
-        },
+    "refresh-chat-stats": {
+        "task": "chat.tasks.refresh_chat_stats_task",
+        "schedule": 60.0,
     },
-    "loggers": {
-        "chat": {
-            "handlers": ["console"],
-            "level": "DEBUG",
-            "propagate": True,
-        },
-        "chat.service": {
-            "handlers": ["console"],
-            "level": "DEBUG",
-            "propagate": False,
-        },
-        "chat.prompts": {
-            "handlers": ["console"],
-            "level": "DEBUG",
-            "propagate": False,
-        },
-        "chat.tasks": {
-            "handlers": ["console"],
-            "level": "DEBUG",
-            "propagate": False,
-        },
-        "chat.views": {
-            "handlers": ["console"],
-            "level": "DEBUG",
-            "propagate": False,
-        },
+    "expire-chat-sessions": {
+        "task": "chat.tasks.expire_chat_sessions_task",
+        "schedule": 3600.0,
     },
 }
+# Record STARTED (and its timestamp) so queue wait can be measured
+CELERY_TASK_TRACK_STARTED = config("CELERY_TASK_TRACK_STARTED", default=False, cast=bool)
+
+
+# Cache settings (Redis, shared by web and Celery workers)
+CACHES = {
+    "default": {
+        "BACKEND": "django_redis.cache.RedisCache",
+        "LOCATION": config("REDIS_CACHE_URL", default="redis://127.0.0.1:6379/6"),
+        "OPTIONS": {
+            "CLIENT_CLASS": "django_redis.client.DefaultClient",
+        },
+        "KEY_PREFIX": "advisory",
+    }
+}
+
+
+# Offline LLM stub (tests, benchmarks, load tests): every purpose is routed
+# to canned responses instead of a provider
+LLM_STUB_ENABLED = config("LLM_STUB_ENABLED", default=False, cast=bool)
+LLM_STUB_LATENCY_SECONDS = config("LLM_STUB_LATENCY_SECONDS", default=0.0, cast=float)
+
+
+# Knowledge base: embedding search is optional and needs NumPy plus
+# embeddings written by `manage.py ingest_knowledge_base --embed`
+KNOWLEDGE_BASE_DIR = config(
+    "KNOWLEDGE_BASE_DIR", default=str(BASE_DIR.parent / "var" / "knowledge_base")
+)
+KNOWLEDGE_BASE_USE_EMBEDDINGS = config(
+    "KNOWLEDGE_BASE_USE_EMBEDDINGS", default=False, cast=bool
+)
+
+
+# Logging configuration. LOG_FORMAT=json writes one JSON object per line;
+# prompt bodies are logged at DEBUG, sampled, redacted and truncated
+LOG_FORMAT = config("LOG_FORMAT", default="text")
+LOG_PROMPT_SAMPLE_RATE = config("LOG_PROMPT_SAMPLE_RATE", default=1.0, cast=float)
+LOG_PROMPT_MAX_CHARS = config("LOG_PROMPT_MAX_CHARS", default=2000, cast=int)
+LOGGING = build_logging(
+    level=config("LOG_LEVEL", default="DEBUG"),
+    structured=LOG_FORMAT == "json",
+)
+
+# Prometheus scrape endpoint (/metrics/), disabled while the token is empty
+METRICS_AUTH_TOKEN = config("METRICS_AUTH_TOKEN", default="")
 
 # SSO Configuration
 SSO_SECRET_KEY = config("SSO_SECRET_KEY")
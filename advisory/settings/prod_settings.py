@@ -58,5 +58,17 @@ SECURE_SSL_REDIRECT = False
 #     "http://72.62.248.39:8007",
 # ]
 
+# Logging: JSON lines written off the request thread. Prompt bodies stay
+# off unless LOG_PROMPT_LEVEL=DEBUG, and then only a 1% sample
+LOG_FORMAT = "json"
+LOG_PROMPT_SAMPLE_RATE = config("LOG_PROMPT_SAMPLE_RATE", default=0.01, cast=float)
+LOG_PROMPT_MAX_CHARS = config("LOG_PROMPT_MAX_CHARS", default=500, cast=int)
+LOGGING = build_logging(
+    level=config("LOG_LEVEL", default="INFO"),
+    structured=True,
+    queued=True,
+    prompt_level=config("LOG_PROMPT_LEVEL", default="INFO"),
+)
+
 # This would allow you to set this configuration
 #  export DJANGO_SETTINGS_MODULE=advisory.settings.prod_settings
@@ -37,6 +37,17 @@ CORS_ALLOW_ALL_ORIGINS = True
 # Allow credentials
 CORS_ALLOW_CREDENTIALS = True
 
+# Logging: JSON lines written off the request thread, with a 10% sample
+# of prompt bodies for debugging prompt changes
+LOG_FORMAT = "json"
+LOG_PROMPT_SAMPLE_RATE = config("LOG_PROMPT_SAMPLE_RATE", default=0.1, cast=float)
+LOG_PROMPT_MAX_CHARS = config("LOG_PROMPT_MAX_CHARS", default=1000, cast=int)
+LOGGING = build_logging(
+    level=config("LOG_LEVEL", default="INFO"),
+    structured=True,
+    queued=True,
+    prompt_level=config("LOG_PROMPT_LEVEL", default="DEBUG"),
+)
 
 # This would allow you to set this configuration
 #  export DJANGO_SETTINGS_MODULE=advisory.settings.stage_settings
@@ -0,0 +1,37 @@
+from advisory.settings.base import *
+
+# Self-contained settings for the test suite: no PostgreSQL, Redis, SMTP
+# or LLM provider needed. Redis-only features (rate limiter, route
+# metrics) fail open against the local-memory cache.
+
+DATABASES = {
+    "default": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": ":memory:",
+    }
+}
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "KEY_PREFIX": "advisory",
+    }
+}
+
+EMAIL_BACKEND = "django.core.mail.backends.locmem.EmailBackend"
+
+# Tasks run inline, so a request's full flow happens inside the test
+CELERY_TASK_ALWAYS_EAGER = True
+CELERY_TASK_EAGER_PROPAGATES = True
+CELERY_TASK_STORE_EAGER_RESULT = True
+
+LLM_STUB_ENABLED = True
+LLM_STUB_LATENCY_SECONDS = 0.0
+
+# Covering-index INCLUDE columns are PostgreSQL-only
+SILENCED_SYSTEM_CHECKS = ["models.W040"]
+
+PASSWORD_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
+
+# This would allow you to set this configuration
+#  export DJANGO_SETTINGS_MODULE=advisory.settings.test_settings
@@ -0,0 +1,214 @@
+"""
+Query-count budgets for API endpoints.
+
+Each endpoint test calls `assertWithinBudget`, which issues the request,
+records the DB queries it ran (count and total time) and the response
+size (a streamed body is read inside the recording and kept as
+`response.streamed_body`), and compares them with the checked-in budgets in
+`advisory/query_budgets.json`. A request that runs more queries or
+returns a bigger body than its budget fails. Query time varies with the
+machine and its load, so going over `query_ms` only warns.
+
+After an intentional change, re-record the budgets with
+
+    QUERY_BUDGETS_UPDATE=1 python manage.py test \
+        --settings=advisory.settings.test_settings
+
+and commit the updated JSON with the change.
+"""
+
+import json
+import logging
+import math
+import os
+import time
+import warnings
+from pathlib import Path
+
+from django.db import connection
+from rest_framework.test import APIClient, APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+BUDGETS_PATH = Path(__file__).resolve().parent / "query_budgets.json"
+UPDATE_ENV = "QUERY_BUDGETS_UPDATE"
+
+# Headroom written when budgets are re-recorded; query counts are exact
+QUERY_TIME_HEADROOM = 5
+QUERY_TIME_FLOOR_MS = 25
+BYTES_HEADROOM = 1.25
+
+PASSWORD = "Budget-pass-123"
+SAMPLE_INTAKE = {
+    "storage_capacity": "5,000 MT",
+    "potato_variety": "Kufri Jyoti",
+    "location": "Agra, Uttar Pradesh",
+    "storage_type": "Multi-chamber",
+    "budget": "4.5 crore",
+}
+
+
+class QueryRecorder:
+    """Counts and times every query run on the default connection."""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((sql, time.perf_counter() - started))
+
+    def __enter__(self):
+        self._wrapper = connection.execute_wrapper(self)
+        self._wrapper.__enter__()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._wrapper.__exit__(*exc_info)
+
+    @property
+    def count(self):
+        return len(self.queries)
+
+    @property
+    def time_ms(self):
+        return sum(seconds for _, seconds in self.queries) * 1000
+
+
+def load_budgets() -> dict:
+    try:
+        return json.loads(BUDGETS_PATH.read_text())
+    except FileNotFoundError:
+        return {}
+
+
+def budget_key(url_name: str, method: str) -> str:
+    return f"{url_name} {method.upper()}"
+
+
+class QueryBudgetTestCase(APITestCase):
+    """Base class for endpoint budget tests; see the module docstring."""
+
+    recorded = {}
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.budgets = load_budgets()
+        cls.update = os.environ.get(UPDATE_ENV) == "1"
+        # Fail-open warnings from Redis-only features are expected here
+        logging.disable(logging.WARNING)
+
+    @classmethod
+    def tearDownClass(cls):
+        logging.disable(logging.NOTSET)
+        if cls.update and cls.recorded:
+            budgets = load_budgets()
+            budgets.update(cls.recorded)
+            BUDGETS_PATH.write_text(
+                json.dumps(dict(sorted(budgets.items())), indent=2) + "\n"
+            )
+            cls.recorded = {}
+        super().tearDownClass()
+
+    @classmethod
+    def make_user(cls, email, **extra):
+        from accounts.models import User
+
+        return User.objects.create_user(
+            username=email.split("@")[0], email=email, password=PASSWORD, **extra
+        )
+
+    @classmethod
+    def make_session(cls, user, messages=20):
+        """Active intake plus a session holding `messages` alternating turns."""
+        from chat.constants import (
+            MESSAGE_TYPE_BOT_ANSWER,
+            MESSAGE_TYPE_USER_QUESTION,
+            SENDER_BOT,
+            SENDER_USER,
+        )
+        from chat.models import ChatMessage, ChatSession
+        from usecase_engine.calculations import compute_metrics
+        from usecase_engine.models import UserInput
+
+        intake = UserInput.objects.create(
+            user=user,
+            user_choice="build",
+            intake_data=SAMPLE_INTAKE,
+            welcome_message="Welcome!",
+            suggestions=["What temperature should I store potatoes at?"],
+            calculated_metrics=compute_metrics(SAMPLE_INTAKE, "build"),
+        )
+        session = ChatSession.objects.create(user=user, intake_data=intake)
+        for i in range(messages):
+            ChatMessage.objects.create(
+                session=session,
+                sender=SENDER_BOT if i % 2 else SENDER_USER,
+                message_type=(
+                    MESSAGE_TYPE_BOT_ANSWER if i % 2 else MESSAGE_TYPE_USER_QUESTION
+                ),
+                message_text=f"Message {i} about potato cold storage.",
+            )
+        return session
+
+    def client_for(self, user) -> APIClient:
+        """Client authenticated the way the frontend is, with a JWT."""
+        client = APIClient()
+        token = RefreshToken.for_user(user).access_token
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+        return client
+
+    def assertWithinBudget(
+        self, client, url_name, method, path, data=None, expected_status=200, **extra
+    ):
+        """Issue the request and check it against the endpoint's budget."""
+        key = budget_key(url_name, method)
+        with QueryRecorder() as recorder:
+            response = getattr(client, method.lower())(
+                path, data, format="json", **extra
+            )
+            # A streamed body runs its queries as it is read; keep it readable
+            if response.streaming:
+                response.streamed_body = b"".join(response.streaming_content)
+        body = response.streamed_body if response.streaming else response.content
+
+        self.assertEqual(
+            response.status_code,
+            expected_status,
+            f"{key}: {body[:500]!r}",
+        )
+        size = len(body)
+
+        if self.update:
+            QueryBudgetTestCase.recorded[key] = {
+                "queries": recorder.count,
+                "query_ms": max(
+                    math.ceil(recorder.time_ms * QUERY_TIME_HEADROOM),
+                    QUERY_TIME_FLOOR_MS,
+                ),
+                "bytes": math.ceil(size * BYTES_HEADROOM),
+            }
+            return response
+
+        budget = self.budgets.get(key)
+        self.assertIsNotNone(budget, f"No query budget recorded for {key}")
+        statements = "\n".join(sql for sql, _ in recorder.queries)
+        self.assertLessEqual(
+            recorder.count,
+            budget["queries"],
+            f"{key} ran {recorder.count} queries (budget {budget['queries']}):\n"
+            f"{statements}",
+        )
+        if recorder.time_ms > budget["query_ms"]:
+            warnings.warn(
+                f"{key} spent {recorder.time_ms:.1f}ms in queries "
+                f"(budget {budget['query_ms']}ms)",
+                stacklevel=2,
+            )
+        self.assertLessEqual(
+            size, budget["bytes"], f"{key} returned {size} bytes ({budget['bytes']})"
+        )
+        return response
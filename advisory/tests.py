@@ -0,0 +1,75 @@
+import logging
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+
+from advisory import log, metrics
+
+
+class MetricsExporterTests(SimpleTestCase):
+    def setUp(self):
+        # The middleware's flush warns without Redis
+        logging.disable(logging.WARNING)
+        self.addCleanup(logging.disable, logging.NOTSET)
+
+    def test_disabled_without_token(self):
+        with override_settings(METRICS_AUTH_TOKEN=""):
+            self.assertEqual(self.client.get("/metrics/").status_code, 404)
+
+    @override_settings(METRICS_AUTH_TOKEN="scrape-token")
+    def test_requires_bearer_token(self):
+        response = self.client.get(
+            "/metrics/", HTTP_AUTHORIZATION="Bearer wrong-token"
+        )
+        self.assertEqual(response.status_code, 401)
+
+    def test_histogram_exposition_is_cumulative(self):
+        labels = metrics.llm_call_duration._labels(
+            {"purpose": "CLASSIFIER", "provider": "stub", "model": "stub-fast"}
+        )
+        lines = metrics.llm_call_duration.render(
+            {
+                f"{labels}\t0.5": 2,
+                f"{labels}\t2": 1,
+                f"{labels}\t+Inf": 1,
+                f"{labels}\tsum": 65.5,
+                f"{labels}\tcount": 4,
+            }
+        )
+        self.assertIn(f'llm_call_duration_seconds_bucket{{{labels},le="1"}} 2', lines)
+        self.assertIn(f'llm_call_duration_seconds_bucket{{{labels},le="2"}} 3', lines)
+        self.assertIn(
+            f'llm_call_duration_seconds_bucket{{{labels},le="+Inf"}} 4', lines
+        )
+        self.assertIn(f"llm_call_duration_seconds_sum{{{labels}}} 65.5", lines)
+
+    def test_requests_flush_only_when_due(self):
+        with mock.patch.object(metrics, "flush") as flush:
+            with mock.patch.object(metrics, "FLUSH_INTERVAL_SECONDS", 3600):
+                self.client.get("/metrics/")
+            flush.assert_not_called()
+
+            with mock.patch.object(metrics, "FLUSH_INTERVAL_SECONDS", 0):
+                self.client.get("/metrics/")
+            flush.assert_called_once()
+
+
+class PromptLoggingTests(SimpleTestCase):
+    def test_prompts_are_redacted_truncated_and_sampled(self):
+        prompt = "Call +91 98765 43210 or owner@example.com. Store: 5,000 MT. " * 20
+        self.assertTrue(
+            log.redact(prompt, 60).startswith(
+                "Call [phone] or [email]. Store: 5,000 MT. Call [phone]"
+            )
+        )
+        self.assertIn("chars]", log.redact(prompt, 60))
+
+        logger = logging.getLogger("chat.prompts")
+        with override_settings(LOG_PROMPT_SAMPLE_RATE=1.0):
+            with self.assertLogs(logger, "DEBUG") as logs:
+                log.log_prompt(logger, "answer", prompt)
+        self.assertNotIn("owner@example.com", logs.output[0])
+
+        with override_settings(LOG_PROMPT_SAMPLE_RATE=0.0):
+            with self.assertNoLogs(logger, "DEBUG"):
+                log.log_prompt(logger, "answer", prompt)
@@ -23,6 +23,8 @@ from drf_yasg import openapi
 from drf_yasg.views import get_schema_view
 from rest_framework import permissions
 
+from advisory.metrics import metrics_view
+
 schema_view = get_schema_view(
     openapi.Info(
         title="Cold Storage Advisory API",
@@ -40,6 +42,7 @@ admin.site.index_title = "Cold Storage Advisory Admin"
 urlpatterns = (
     [
         path("admin/", admin.site.urls),
+        path("metrics/", metrics_view, name="metrics"),
         path(
             "swagger/",
             schema_view.with_ui("swagger", cache_timeout=0),
@@ -1,7 +1,15 @@
 from django.contrib import admin
 from django.utils.html import format_html
 
-from chat.models import ChatMessage, ChatSession, DailyQuestionQuota
+from chat.models import (
+    ChatMessage,
+    ChatSession,
+    ChatSessionArchive,
+    ChatStatsDaily,
+    DailyQuestionQuota,
+    LLMCallLog,
+    LLMUsageDaily,
+)
 
 
 class ChatMessageInline(admin.TabularInline):
@@ -42,6 +50,8 @@ class ChatSessionAdmin(admin.ModelAdmin):
         "title",
         "status",
         "started_at",
+        "message_count",
+        "last_message_at",
     )
 
     list_filter = (
@@ -54,6 +64,8 @@ class ChatSessionAdmin(admin.ModelAdmin):
         "user",
         "intake_data",
         "started_at",
+        "message_count",
+        "last_message_at",
         "created_at",
         "updated_at",
     )
@@ -69,6 +81,7 @@ class ChatMessageAdmin(admin.ModelAdmin):
         "sequence_number",
         "sender",
         "message_type",
+        "classification",
     )
 
     readonly_fields = (
@@ -77,6 +90,7 @@ class ChatMessageAdmin(admin.ModelAdmin):
         "sequence_number",
         "sender",
         "message_type",
+        "classification",
         "message_text",
         "suggested_questions",
         "mcq_options",
@@ -108,3 +122,105 @@ class DailyQuestionQuotaAdmin(admin.ModelAdmin):
         return obj.remaining_questions()
 
     remaining_questions.short_description = "Remaining"
+
+
+@admin.register(LLMCallLog)
+class LLMCallLogAdmin(admin.ModelAdmin):
+    list_display = (
+        "created_at",
+        "user",
+        "purpose",
+        "provider",
+        "model",
+        "prompt_tokens",
+        "output_tokens",
+        "cost_usd",
+        "latency_ms",
+        "cache_status",
+        "success",
+    )
+
+    list_filter = (
+        "purpose",
+        "model",
+        "cache_status",
+        "success",
+    )
+
+    raw_id_fields = ("user", "session")
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(LLMUsageDaily)
+class LLMUsageDailyAdmin(admin.ModelAdmin):
+    list_display = (
+        "date",
+        "user",
+        "purpose",
+        "model",
+        "calls",
+        "errors",
+        "prompt_tokens",
+        "output_tokens",
+        "cost_usd",
+    )
+
+    list_filter = (
+        "date",
+        "purpose",
+        "model",
+    )
+
+    raw_id_fields = ("user",)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(ChatStatsDaily)
+class ChatStatsDailyAdmin(admin.ModelAdmin):
+    list_display = (
+        "date",
+        "new_users",
+        "sessions",
+        "questions",
+        "messages",
+        "active_users",
+        "updated_at",
+    )
+
+    date_hierarchy = "date"
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(ChatSessionArchive)
+class ChatSessionArchiveAdmin(admin.ModelAdmin):
+    list_display = (
+        "session",
+        "month",
+        "message_count",
+        "archived_at",
+    )
+
+    date_hierarchy = "month"
+    raw_id_fields = ("session",)
+    exclude = ("payload",)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
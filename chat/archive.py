@@ -0,0 +1,237 @@
+"""
+Session lifecycle: abandoning idle sessions and archiving old ones.
+
+Archiving moves every message of a session into one ChatSessionArchive row,
+a zlib-compressed JSON list, and deletes the ChatMessage rows, so the hot
+table and its indexes only hold recent conversations. The session row,
+with its message_count, stays for the session list; the history endpoint
+reads archived messages through load(), and a new turn in the session
+restores them first (reopen()).
+"""
+
+import json
+import zlib
+from datetime import timedelta
+from itertools import groupby
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from chat.constants import (
+    CHAT_ARCHIVE_AFTER_DAYS,
+    CHAT_ARCHIVE_BATCH_SIZE,
+    DEFAULT_SESSION_TIMEOUT_HOURS,
+    SESSION_ABANDONED,
+    SESSION_ACTIVE,
+)
+
+# ChatMessage columns kept in the archive, besides the session
+MESSAGE_FIELDS = (
+    "id",
+    "sequence_number",
+    "sender",
+    "message_text",
+    "message_type",
+    "classification",
+    "suggested_questions",
+    "mcq_options",
+    "mcq_selected_option",
+    "parent_message_id",
+    "created_at",
+)
+
+
+def _idle_since(cutoff):
+    from chat.models import ChatSession
+
+    return ChatSession.objects.filter(
+        Q(last_message_at__lt=cutoff)
+        | Q(last_message_at__isnull=True, started_at__lt=cutoff)
+    )
+
+
+def abandon_idle(now=None) -> int:
+    """
+    Mark active sessions idle for DEFAULT_SESSION_TIMEOUT_HOURS as
+    abandoned and return how many were.
+    """
+    now = now or timezone.now()
+    cutoff = now - timedelta(hours=DEFAULT_SESSION_TIMEOUT_HOURS)
+    # update() skips auto_now, and updated_at feeds the history ETag
+    return (
+        _idle_since(cutoff)
+        .filter(status=SESSION_ACTIVE)
+        .update(status=SESSION_ABANDONED, ended_at=now, updated_at=now)
+    )
+
+
+def _compress(rows) -> bytes:
+    messages = []
+    for row in rows:
+        fields = dict(zip(MESSAGE_FIELDS, row))
+        # Full precision; DjangoJSONEncoder would cut to milliseconds
+        fields["created_at"] = fields["created_at"].isoformat()
+        messages.append(fields)
+    # default=str for the UUIDs
+    return zlib.compress(json.dumps(messages, default=str).encode())
+
+
+def _archive_batch(cutoff, batch_size):
+    """Archive one batch; returns (sessions selected, archives written)."""
+    from chat.models import ChatMessage, ChatSession, ChatSessionArchive
+
+    with transaction.atomic():
+        # Locked so a turn cannot add messages between the read and the
+        # delete below; sessions a turn holds are left for the next run
+        selected = list(
+            _idle_since(cutoff)
+            .exclude(status=SESSION_ACTIVE)
+            .filter(archive__isnull=True, message_count__gt=0)
+            .select_for_update(skip_locked=True, of=("self",))
+            .order_by("started_at")
+            .values_list("id", "last_message_at", "started_at")[:batch_size]
+        )
+        if not selected:
+            return 0, 0
+
+        messages = list(
+            ChatMessage.objects.filter(session_id__in=[row[0] for row in selected])
+            .order_by("session_id", "sequence_number")
+            .values_list("session_id", *MESSAGE_FIELDS)
+        )
+        # Backends without row locks: skip sessions written to since selected
+        current = dict(
+            ChatSession.objects.filter(
+                id__in=[row[0] for row in selected]
+            ).values_list("id", "last_message_at")
+        )
+        sessions = {
+            session_id: last_message_at or started_at
+            for session_id, last_message_at, started_at in selected
+            if current.get(session_id) == last_message_at
+        }
+
+        archives = []
+        for session_id, rows in groupby(messages, key=lambda row: row[0]):
+            if session_id not in sessions:
+                continue
+            rows = [row[1:] for row in rows]
+            archives.append(
+                ChatSessionArchive(
+                    session_id=session_id,
+                    month=sessions[session_id].date().replace(day=1),
+                    message_count=len(rows),
+                    payload=_compress(rows),
+                )
+            )
+        ChatSessionArchive.objects.bulk_create(archives)
+        # A stale message_count with no rows left would select the session
+        # on every batch; correct it so the loop moves past it
+        empty = set(sessions) - {archive.session_id for archive in archives}
+        if empty:
+            ChatSession.objects.filter(id__in=empty).update(message_count=0)
+        # One DELETE: parent_message (SET_NULL) makes delete() load and null
+        # every row first, but parents are always in the same session
+        ChatMessage.objects.filter(session_id__in=sessions)._raw_delete(
+            ChatMessage.objects.db
+        )
+        return len(selected), len(archives)
+
+
+def archive_inactive(
+    days: int = CHAT_ARCHIVE_AFTER_DAYS,
+    batch_size: int = CHAT_ARCHIVE_BATCH_SIZE,
+    now=None,
+) -> int:
+    """
+    Archive the messages of ended sessions idle for `days` days, one
+    transaction per `batch_size` sessions, and return how many sessions
+    were archived.
+    """
+    cutoff = (now or timezone.now()) - timedelta(days=days)
+    archived = 0
+    while True:
+        selected, written = _archive_batch(cutoff, batch_size)
+        archived += written
+        if selected < batch_size:
+            return archived
+
+
+def _messages(archive) -> list:
+    from chat.models import ChatMessage
+
+    messages = []
+    for fields in json.loads(zlib.decompress(archive.payload)):
+        fields["created_at"] = parse_datetime(fields["created_at"])
+        messages.append(ChatMessage(session_id=archive.session_id, **fields))
+    return messages
+
+
+def load(session_id):
+    """
+    The archived messages of a session as unsaved ChatMessage instances,
+    in sequence order, or None when the session is not archived.
+    """
+    from chat.models import ChatSessionArchive
+
+    archive = ChatSessionArchive.objects.filter(session_id=session_id).first()
+    return _messages(archive) if archive else None
+
+
+def reopen(session) -> bool:
+    """
+    Make an abandoned session writable again before a new turn: restore its
+    archived messages, so sequence numbers continue after them, and mark it
+    active. Returns False when the session was not abandoned.
+    """
+    from chat.models import ChatSession
+
+    if session.status != SESSION_ABANDONED:
+        return False
+
+    with transaction.atomic():
+        # Waits for an archive batch holding the row, re-checks the status
+        locked = (
+            ChatSession.objects.select_for_update()
+            .filter(id=session.id, status=SESSION_ABANDONED)
+            .values_list("id", flat=True)
+            .first()
+        )
+        if locked is None:
+            session.refresh_from_db(fields=["status", "ended_at", "updated_at"])
+            return False
+
+        restore(session.id)
+        now = timezone.now()
+        ChatSession.objects.filter(id=session.id).update(
+            status=SESSION_ACTIVE, ended_at=None, updated_at=now
+        )
+    session.status, session.ended_at, session.updated_at = SESSION_ACTIVE, None, now
+    return True
+
+
+@transaction.atomic
+def restore(session_id) -> int:
+    """Move an archived session's messages back into ChatMessage."""
+    from chat.models import ChatMessage, ChatSessionArchive
+
+    archive = (
+        ChatSessionArchive.objects.select_for_update()
+        .filter(session_id=session_id)
+        .first()
+    )
+    if archive is None:
+        return 0
+
+    # bulk_create skips ChatMessage.save(), which would bump message_count,
+    # but not auto_now_add, so the original timestamps are written after
+    messages = _messages(archive)
+    created_at = [message.created_at for message in messages]
+    ChatMessage.objects.bulk_create(messages)
+    for message, timestamp in zip(messages, created_at):
+        message.created_at = timestamp
+    ChatMessage.objects.bulk_update(messages, ["created_at"])
+    archive.delete()
+    return len(messages)
@@ -0,0 +1,154 @@
+import logging
+import time
+
+from django.core.cache import cache
+
+from chat.constants import (
+    LLM_CIRCUIT_BREAKER_DEFAULTS,
+    LLM_CIRCUIT_BREAKER_KEY_PREFIX,
+    LLM_CIRCUIT_BREAKER_PURPOSES,
+)
+
+logger = logging.getLogger("chat.circuit_breaker")
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the provider while the breaker is open."""
+
+    def __init__(self, name: str, retry_after: float):
+        self.name = name
+        self.retry_after = max(1, int(retry_after + 0.999))
+        super().__init__(
+            f"LLM circuit for {name} is open, retry in {self.retry_after}s"
+        )
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker shared by every web and Celery worker through Redis.
+
+    Calls are counted in fixed windows. When a window has at least
+    `min_calls` and its error or slow-call rate crosses the threshold, the
+    breaker opens and every caller fails fast for `open_seconds`. After that
+    a single probe is let through (half-open); its outcome closes or re-opens
+    the circuit. Redis errors leave the breaker closed.
+
+    Settings come from the purpose; `key` (default: the purpose) names the
+    circuit, e.g. "ANSWER_GENERATOR:gemini-2.5-flash" for one per model.
+    """
+
+    def __init__(self, purpose: str, key: str = None):
+        self.purpose = purpose
+        self.name = key or purpose
+        self.settings = {
+            **LLM_CIRCUIT_BREAKER_DEFAULTS,
+            **LLM_CIRCUIT_BREAKER_PURPOSES.get(purpose, {}),
+        }
+        self.prefix = f"{LLM_CIRCUIT_BREAKER_KEY_PREFIX}:{self.name}"
+        self._is_probe = False
+
+    def _key(self, suffix: str) -> str:
+        return f"{self.prefix}:{suffix}"
+
+    def _window_key(self, counter: str) -> str:
+        window = int(time.time() // self.settings["window_seconds"])
+        return self._key(f"{window}:{counter}")
+
+    def _incr(self, key: str) -> int:
+        cache.add(key, 0, timeout=self.settings["window_seconds"] * 2)
+        return cache.incr(key)
+
+    def get_state(self) -> str:
+        try:
+            if cache.get(self._key("open")):
+                return STATE_OPEN
+            if cache.get(self._key("tripped")):
+                return STATE_HALF_OPEN
+        except Exception:
+            pass
+        return STATE_CLOSED
+
+    def before_call(self):
+        """Raise CircuitOpenError unless this caller may reach the provider."""
+        if not self.settings["enabled"]:
+            return
+
+        try:
+            open_until = cache.get(self._key("open"))
+            if open_until:
+                raise CircuitOpenError(self.name, open_until - time.time())
+
+            if cache.get(self._key("tripped")):
+                # Half-open: exactly one caller probes the provider
+                probe_timeout = int(self.settings["slow_call_seconds"]) + 5
+                if not cache.add(self._key("probe"), 1, timeout=probe_timeout):
+                    raise CircuitOpenError(self.name, probe_timeout)
+                self._is_probe = True
+        except CircuitOpenError:
+            raise
+        except Exception as e:
+            logger.warning(f"[{self.name}] Circuit breaker unavailable: {e}")
+
+    def record_success(self, latency: float):
+        if not self.settings["enabled"]:
+            return
+
+        try:
+            if self._is_probe:
+                self._close()
+                return
+
+            calls = self._incr(self._window_key("calls"))
+            if latency >= self.settings["slow_call_seconds"]:
+                slow = self._incr(self._window_key("slow"))
+                if self._exceeds(slow, calls, "slow_call_rate_threshold"):
+                    self._trip(f"{slow}/{calls} slow calls")
+        except Exception as e:
+            logger.warning(f"[{self.name}] Failed to record success: {e}")
+
+    def record_failure(self):
+        if not self.settings["enabled"]:
+            return
+
+        try:
+            if self._is_probe:
+                self._trip("probe failed")
+                return
+
+            calls = self._incr(self._window_key("calls"))
+            failures = self._incr(self._window_key("failures"))
+            if self._exceeds(failures, calls, "error_rate_threshold"):
+                self._trip(f"{failures}/{calls} failed calls")
+        except Exception as e:
+            logger.warning(f"[{self.name}] Failed to record failure: {e}")
+
+    def _exceeds(self, count: int, calls: int, threshold: str) -> bool:
+        return (
+            calls >= self.settings["min_calls"]
+            and count / calls >= self.settings[threshold]
+        )
+
+    def _trip(self, reason: str):
+        open_seconds = self.settings["open_seconds"]
+        cache.set(self._key("open"), time.time() + open_seconds, timeout=open_seconds)
+        cache.set(self._key("tripped"), 1, timeout=open_seconds * 10)
+        cache.delete(self._key("probe"))
+        self._is_probe = False
+        logger.error(f"[{self.name}] Circuit opened for {open_seconds}s: {reason}")
+
+    def _close(self):
+        cache.delete_many(
+            [
+                self._key("tripped"),
+                self._key("probe"),
+                self._window_key("calls"),
+                self._window_key("failures"),
+                self._window_key("slow"),
+            ]
+        )
+        self._is_probe = False
+        logger.info(f"[{self.name}] Circuit closed after successful probe")
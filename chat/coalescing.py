@@ -0,0 +1,87 @@
+import hashlib
+import logging
+import time
+import uuid
+
+from django.core.cache import cache
+
+from advisory import metrics
+from chat.constants import (
+    COALESCE_KEY_PREFIX,
+    COALESCE_LEASE_SECONDS,
+    COALESCE_POLL_INTERVAL_SECONDS,
+    COALESCE_RESULT_TTL_SECONDS,
+    COALESCE_WAIT_TIMEOUT_SECONDS,
+)
+
+logger = logging.getLogger("chat.coalescing")
+
+
+def prompt_hash(*parts) -> str:
+    """Stable hash of everything that determines an LLM response."""
+    hasher = hashlib.sha256()
+    for part in parts:
+        hasher.update(str(part).encode("utf-8"))
+        hasher.update(b"\x00")
+    return hasher.hexdigest()
+
+
+def single_flight(key: str, fn, purpose: str = "unknown"):
+    """
+    Run `fn` once across all workers for concurrent callers sharing `key`.
+
+    The first caller takes a short Redis lease and performs the call; the
+    others poll for its result until COALESCE_WAIT_TIMEOUT_SECONDS. If the
+    owner fails, its lease expires, or the wait times out, the waiter falls
+    back to calling `fn` itself, so coalescing never makes a call fail.
+    """
+    lease_key = f"{COALESCE_KEY_PREFIX}:lease:{key}"
+    result_key = f"{COALESCE_KEY_PREFIX}:result:{key}"
+    owner = uuid.uuid4().hex
+
+    try:
+        acquired = cache.add(lease_key, owner, timeout=COALESCE_LEASE_SECONDS)
+    except Exception as e:
+        logger.warning(f"[{purpose}] Coalescing store unavailable: {e}")
+        return fn()
+
+    if acquired:
+        metrics.cache_lookups.inc(cache="llm_coalescing", result="miss")
+        try:
+            result = fn()
+            try:
+                cache.set(result_key, result, timeout=COALESCE_RESULT_TTL_SECONDS)
+            except Exception as e:
+                logger.warning(f"[{purpose}] Failed to publish coalesced result: {e}")
+            return result
+        finally:
+            try:
+                if cache.get(lease_key) == owner:
+                    cache.delete(lease_key)
+            except Exception:
+                pass
+
+    deadline = time.monotonic() + COALESCE_WAIT_TIMEOUT_SECONDS
+    try:
+        while time.monotonic() < deadline:
+            result = cache.get(result_key)
+            if result is not None:
+                logger.info(f"[{purpose}] Reused in-flight LLM result")
+                metrics.cache_lookups.inc(cache="llm_coalescing", result="hit")
+                return result
+            if cache.get(lease_key) is None:
+                # Owner may have published between the two reads
+                result = cache.get(result_key)
+                if result is not None:
+                    metrics.cache_lookups.inc(cache="llm_coalescing", result="hit")
+                    return result
+                # Owner failed without publishing, or its lease expired
+                break
+            time.sleep(COALESCE_POLL_INTERVAL_SECONDS)
+        else:
+            logger.warning(f"[{purpose}] Timed out waiting for in-flight LLM call")
+    except Exception as e:
+        logger.warning(f"[{purpose}] Coalescing wait failed: {e}")
+
+    metrics.cache_lookups.inc(cache="llm_coalescing", result="miss")
+    return fn()
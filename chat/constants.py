@@ -35,16 +35,231 @@ SESSION_STATUS_CHOICES = [
     (SESSION_ABANDONED, "Abandoned"),
 ]
 
+# Classifier outcomes, stored on the user's question message
+CLASSIFICATION_META = "META"
+CLASSIFICATION_ANSWER_DIRECTLY = "ANSWER_DIRECTLY"
+CLASSIFICATION_NEEDS_FOLLOW_UP = "NEEDS_FOLLOW_UP"
+CLASSIFICATION_OUT_OF_CONTEXT = "OUT_OF_CONTEXT"
+
+CLASSIFICATION_CHOICES = [
+    (CLASSIFICATION_META, "Meta"),
+    (CLASSIFICATION_ANSWER_DIRECTLY, "Answer Directly"),
+    (CLASSIFICATION_NEEDS_FOLLOW_UP, "Needs Follow-up"),
+    (CLASSIFICATION_OUT_OF_CONTEXT, "Out of Context"),
+]
+
 # Configuration
 DEFAULT_MAX_DAILY_QUESTIONS = 10
 DEFAULT_SESSION_TIMEOUT_HOURS = 24
 
+# Chat history pagination
+CHAT_HISTORY_PAGE_SIZE = 50
+CHAT_HISTORY_MAX_PAGE_SIZE = 200
+
+# Session list pagination
+SESSION_LIST_PAGE_SIZE = 20
+SESSION_LIST_MAX_PAGE_SIZE = 100
+
+# Idempotent question submission
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+IDEMPOTENCY_KEY_PREFIX = "chat:idempotency"
+IDEMPOTENCY_WINDOW_SECONDS = 60  # Time bucket for derived keys
+IDEMPOTENCY_KEY_TTL_SECONDS = 10 * 60  # How long a submission is remembered
+
+# Single-flight coalescing of identical in-flight LLM calls
+COALESCE_KEY_PREFIX = "chat:llm:inflight"
+COALESCE_LEASE_SECONDS = 30  # Lease held by the caller performing the call
+COALESCE_RESULT_TTL_SECONDS = 30  # How long waiters can pick up the result
+COALESCE_WAIT_TIMEOUT_SECONDS = 20  # Upper bound on waiting for another caller
+COALESCE_POLL_INTERVAL_SECONDS = 0.1
+
 # LLM Model Configuration
 # LLM_MODEL_NAME = "gemini-3-flash-preview"
 LLM_MODEL_NAME = "gemini-2.5-flash"
 LLM_MODEL_VERSION = "3.0"
 TEMPERATURE = 0.3
 
+# LLM providers and per-purpose model routing
+LLM_PROVIDER_GEMINI = "gemini"
+LLM_PROVIDER_GROQ = "groq"
+LLM_PROVIDER_STUB = "stub"  # Offline canned responses, see settings.LLM_STUB_ENABLED
+# Questions containing this are classified NEEDS_FOLLOW_UP by the stub, so
+# load tests can drive the MCQ flow
+LLM_STUB_FOLLOW_UP_MARKER = "(details needed)"
+
+LLM_PROVIDER_API_KEYS = {
+    LLM_PROVIDER_GEMINI: "GEMINI_API_KEY",
+    LLM_PROVIDER_GROQ: "GROQ_API_KEY",
+}
+
+# Short keys for intake fields rendered into prompts; unknown keys are kept
+INTAKE_SHORT_KEYS = {
+    "user_choice": "choice",
+    "storage_capacity": "capacity",
+    "storage_capacity_tonnes": "capacity",
+    "capacity_tonnes": "capacity",
+    "potato_variety": "variety",
+    "storage_type": "type",
+    "storage_duration_months": "months",
+    "storage_duration": "months",
+    "storage_temperature": "temp",
+    "target_temperature": "temp",
+    "number_of_chambers": "chambers",
+    "primary_problem": "problem",
+    "electricity_rate": "tariff",
+    "electricity_tariff": "tariff",
+    "insulation_thickness": "insulation",
+    "ambient_temperature": "ambient",
+}
+PROMPT_INTAKE_CACHE_SIZE = 1024  # Rendered intakes memoized per worker
+
+# Versioned intake snapshots handed to chat tasks by reference
+INTAKE_SNAPSHOT_KEY_PREFIX = "intake_snapshot"
+INTAKE_SNAPSHOT_TTL_SECONDS = 24 * 3600  # Misses are rebuilt from the database
+
+LLM_PURPOSES = [
+    "CLASSIFIER",
+    "META_RESPONSE",
+    "OUT_OF_CONTEXT_RESPONSE",
+    "MCQ_GENERATOR",
+    "ANSWER_GENERATOR",
+    "ONBOARDING",
+]
+
+# Ordered "provider:model" targets; later entries are fallbacks on error.
+# Overridable per purpose through SystemConfiguration.llm_model_routes.
+LLM_DEFAULT_ROUTES = {
+    "CLASSIFIER": [
+        "gemini:gemini-2.5-flash-lite",
+        "gemini:gemini-2.5-flash",
+        "groq:llama-3.1-8b-instant",
+    ],
+    "META_RESPONSE": [
+        "gemini:gemini-2.5-flash-lite",
+        "groq:llama-3.1-8b-instant",
+    ],
+    "OUT_OF_CONTEXT_RESPONSE": [
+        "gemini:gemini-2.5-flash-lite",
+        "groq:llama-3.1-8b-instant",
+    ],
+    "MCQ_GENERATOR": [
+        f"gemini:{LLM_MODEL_NAME}",
+        "groq:llama-3.3-70b-versatile",
+    ],
+    "ANSWER_GENERATOR": [
+        f"gemini:{LLM_MODEL_NAME}",
+        "groq:llama-3.3-70b-versatile",
+    ],
+    "ONBOARDING": [
+        "gemini:gemini-2.5-flash-lite",
+        "groq:llama-3.1-8b-instant",
+    ],
+}
+LLM_ROUTES_CACHE_SECONDS = 30  # Per-process cache of the configured routes
+
+# USD per 1M tokens (thinking tokens are billed as output)
+LLM_MODEL_PRICING = {
+    "gemini-2.5-flash": {"input": 0.30, "output": 2.50},
+    "gemini-2.5-flash-lite": {"input": 0.10, "output": 0.40},
+    "llama-3.1-8b-instant": {"input": 0.05, "output": 0.08},
+    "llama-3.3-70b-versatile": {"input": 0.59, "output": 0.79},
+}
+LLM_ROUTE_METRICS_KEY_PREFIX = "chat:llm:routes"
+LLM_ROUTE_METRICS_TTL_DAYS = 30
+# Most recent call latencies kept per purpose, for percentiles
+LLM_ROUTE_LATENCY_SAMPLES_KEY_PREFIX = "chat:llm:route_latency"
+LLM_ROUTE_LATENCY_SAMPLES_MAX = 5000
+
+# LLM call ledger: calls are queued in Redis and written in batches by
+# flush_llm_call_log_task (CELERY_BEAT_SCHEDULE)
+LLM_LEDGER_KEY = "chat:llm:ledger"
+LLM_LEDGER_BATCH_SIZE = 500
+# Flushes an entry may fail before it moves to the dead-letter list
+LLM_LEDGER_MAX_ATTEMPTS = 5
+LLM_LEDGER_DEAD_LETTER_KEY = "chat:llm:ledger:dead"
+LLM_LEDGER_DEAD_LETTER_MAX = 10000
+LLM_CACHE_MISS = "miss"  # Went to the provider
+LLM_CACHE_COALESCED = "coalesced"  # Reused an identical in-flight call
+LLM_CACHE_STATUS_CHOICES = [
+    (LLM_CACHE_MISS, "Provider call"),
+    (LLM_CACHE_COALESCED, "Coalesced"),
+]
+LLM_USAGE_DEFAULT_DAYS = 7
+
+# Admin stats rollups (ChatStatsDaily), refreshed by refresh_chat_stats_task.
+# The last few days are recomputed on every run to pick up late writes
+CHAT_STATS_REFRESH_DAYS = 2
+CHAT_STATS_DEFAULT_DAYS = 30
+
+# Transcript export: rows per server-side cursor fetch, and compressed bytes
+# gathered before each streamed chunk
+CHAT_EXPORT_CHUNK_SIZE = 2000
+CHAT_EXPORT_FLUSH_BYTES = 64 * 1024
+CHAT_EXPORT_DEFAULT_DAYS = 30
+CHAT_EXPORT_FORMATS = ["ndjson", "csv"]
+
+# Session lifecycle (expire_chat_sessions_task). Active sessions idle for
+# DEFAULT_SESSION_TIMEOUT_HOURS are abandoned; ended sessions idle for
+# CHAT_ARCHIVE_AFTER_DAYS have their messages moved to one compressed
+# ChatSessionArchive row, CHAT_ARCHIVE_BATCH_SIZE sessions per transaction
+CHAT_ARCHIVE_AFTER_DAYS = 90
+CHAT_ARCHIVE_BATCH_SIZE = 200
+
+# Client-side LLM rate limits (per model, shared by all workers)
+LLM_RATE_LIMIT_KEY_PREFIX = "chat:llm:ratelimit"
+LLM_RATE_LIMITS = {
+    "gemini-2.5-flash": {"rpm": 1000, "tpm": 1_000_000},
+    "gemini-2.5-flash-lite": {"rpm": 4000, "tpm": 4_000_000},
+    "llama-3.1-8b-instant": {"rpm": 30, "tpm": 6000},
+    "llama-3.3-70b-versatile": {"rpm": 30, "tpm": 12_000},
+}
+LLM_DEFAULT_RATE_LIMIT = {"rpm": 60, "tpm": 250_000}
+# Stub models only exercise the limiter; they must not throttle load tests
+LLM_STUB_RATE_LIMIT = {"rpm": 1_000_000, "tpm": 1_000_000_000}
+LLM_ESTIMATED_OUTPUT_TOKENS = 800  # Reserved per call until usage is known
+LLM_TYPICAL_TURN_TOKENS = 6000  # Budget a question needs (2-3 calls)
+LLM_ADMISSION_MAX_WAIT_SECONDS = 5  # Delay a call up to this, then shed it
+
+# Shared circuit breaker per LLM purpose (fixed windows, state in Redis)
+LLM_CIRCUIT_BREAKER_KEY_PREFIX = "chat:llm:breaker"
+LLM_CIRCUIT_BREAKER_DEFAULTS = {
+    "enabled": True,
+    "window_seconds": 60,
+    "min_calls": 10,  # Calls in a window before the rates are trusted
+    "error_rate_threshold": 0.5,
+    "slow_call_seconds": 20,
+    "slow_call_rate_threshold": 0.8,
+    "open_seconds": 30,  # Fail fast this long, then let one probe through
+}
+LLM_CIRCUIT_BREAKER_PURPOSES = {
+    "ANSWER_GENERATOR": {"slow_call_seconds": 30},
+}
+
+# Hedged requests: fire a duplicate call after the purpose's p95 latency
+LLM_LATENCY_KEY_PREFIX = "chat:llm:latency"
+LLM_LATENCY_SAMPLE_SIZE = 200
+LLM_HEDGING_DEFAULTS = {
+    "enabled": False,
+    "min_samples": 20,  # Below this, use fallback_delay_seconds
+    "fallback_delay_seconds": 4.0,
+    "min_delay_seconds": 1.0,
+    "max_delay_seconds": 10.0,
+}
+# Threads for hedged calls per process; more calls queue for a free one
+LLM_HEDGING_MAX_WORKERS = 16
+LLM_HEDGING_PURPOSES = {
+    "CLASSIFIER": {"enabled": True},
+    "META_RESPONSE": {"enabled": True},
+    "OUT_OF_CONTEXT_RESPONSE": {"enabled": True},
+}
+
+# Per-stage timing of a chat turn, see chat.tracing
+CORRELATION_ID_HEADER = "X-Request-ID"
+TRACE_STAGE_KEY_PREFIX = "chat:trace:stages"
+TRACE_STAGE_TTL_DAYS = 30
+# Histogram bucket upper bounds; slower observations only count towards +Inf
+TRACE_STAGE_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
 # Welcome Messages based on user choice
 WELCOME_MESSAGE_BUILD = (
     "Hello! I'm Alu Mitra, your potato storage advisor. 🥔 "
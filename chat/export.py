@@ -0,0 +1,129 @@
+"""
+Streaming export of chat transcripts for analytics.
+
+Messages are read through a server-side cursor in CHAT_EXPORT_CHUNK_SIZE
+chunks and written as gzip-compressed NDJSON or CSV while they are read,
+so memory stays constant however many rows match. Used by the admin
+export endpoint and the `export_chat_transcripts` command.
+"""
+
+import csv
+import json
+import zlib
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+
+from django.db.models import Exists, OuterRef, Q
+
+from chat.constants import (
+    CHAT_EXPORT_CHUNK_SIZE,
+    CHAT_EXPORT_FLUSH_BYTES,
+    MESSAGE_TYPE_USER_QUESTION,
+    SENDER_BOT,
+)
+
+FIELDS = (
+    "session_id",
+    "user_id",
+    "language",
+    "sequence_number",
+    "sender",
+    "message_type",
+    "classification",
+    "message_text",
+    "mcq_selected_option",
+    "created_at",
+)
+# values_list() lookups for FIELDS, in order
+_LOOKUPS = (
+    "session_id",
+    "session__user_id",
+    "session__user__preferred_language",
+    "sequence_number",
+    "sender",
+    "message_type",
+    "classification",
+    "message_text",
+    "mcq_selected_option",
+    "created_at",
+)
+
+
+def export_rows(start, end, language=None, classification=None):
+    """
+    Message rows (tuples in FIELDS order) created from `start` through
+    `end` (dates, inclusive), ordered by session and sequence.
+
+    `classification` keeps the questions with that classifier outcome and
+    the bot replies that directly follow them. Messages of archived
+    sessions (chat.archive) are not exported.
+    """
+    from chat.models import ChatMessage
+
+    messages = ChatMessage.objects.filter(
+        created_at__gte=datetime.combine(start, time.min, tzinfo=dt_timezone.utc),
+        created_at__lt=datetime.combine(
+            end + timedelta(days=1), time.min, tzinfo=dt_timezone.utc
+        ),
+    )
+    if language:
+        messages = messages.filter(session__user__preferred_language=language)
+    if classification:
+        answered = ChatMessage.objects.filter(
+            session=OuterRef("session"),
+            sequence_number=OuterRef("sequence_number") - 1,
+            message_type=MESSAGE_TYPE_USER_QUESTION,
+            classification=classification,
+        )
+        messages = messages.filter(
+            Q(message_type=MESSAGE_TYPE_USER_QUESTION, classification=classification)
+            | (Exists(answered) & Q(sender=SENDER_BOT))
+        )
+
+    return (
+        messages.order_by("session_id", "sequence_number")
+        .values_list(*_LOOKUPS)
+        .iterator(chunk_size=CHAT_EXPORT_CHUNK_SIZE)
+    )
+
+
+def _ndjson_lines(rows):
+    for row in rows:
+        record = dict(zip(FIELDS, row))
+        record["session_id"] = str(record["session_id"])
+        record["created_at"] = record["created_at"].isoformat()
+        yield json.dumps(record, ensure_ascii=False) + "\n"
+
+
+class _Line:
+    """File-like target that hands back what csv.writer writes."""
+
+    def write(self, value):
+        return value
+
+
+def _csv_lines(rows):
+    writer = csv.writer(_Line())
+    yield writer.writerow(FIELDS)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def stream(rows, export_format: str = "ndjson"):
+    """Gzip-compressed export of `rows`, as bytes chunks."""
+    lines = _csv_lines(rows) if export_format == "csv" else _ndjson_lines(rows)
+    # wbits=31: a gzip container, readable by gunzip and pandas
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+
+    pending = []
+    pending_bytes = 0
+    for line in lines:
+        chunk = compressor.compress(line.encode())
+        if chunk:
+            pending.append(chunk)
+            pending_bytes += len(chunk)
+        if pending_bytes >= CHAT_EXPORT_FLUSH_BYTES:
+            yield b"".join(pending)
+            pending, pending_bytes = [], 0
+
+    pending.append(compressor.flush())
+    yield b"".join(pending)
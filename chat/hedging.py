@@ -0,0 +1,137 @@
+import logging
+import math
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from chat.constants import (
+    LLM_HEDGING_DEFAULTS,
+    LLM_HEDGING_MAX_WORKERS,
+    LLM_HEDGING_PURPOSES,
+    LLM_LATENCY_KEY_PREFIX,
+    LLM_LATENCY_SAMPLE_SIZE,
+)
+
+logger = logging.getLogger("chat.hedging")
+
+# Per-process cache of p95 delays so a hedge decision is not a Redis read
+_P95_CACHE_SECONDS = 30
+_p95_cache = {}
+
+# Shared by every hedged call in the process; each call holds at most two
+_executor = ThreadPoolExecutor(
+    max_workers=LLM_HEDGING_MAX_WORKERS, thread_name_prefix="llm-hedge"
+)
+
+
+def get_hedging_settings(purpose: str) -> dict:
+    return {**LLM_HEDGING_DEFAULTS, **LLM_HEDGING_PURPOSES.get(purpose, {})}
+
+
+def record_latency(purpose: str, latency: float):
+    """Keep the last LLM_LATENCY_SAMPLE_SIZE successful latencies per purpose."""
+    from django_redis import get_redis_connection
+
+    key = f"{LLM_LATENCY_KEY_PREFIX}:{purpose}"
+    try:
+        pipe = get_redis_connection("default").pipeline()
+        pipe.lpush(key, f"{latency:.3f}")
+        pipe.ltrim(key, 0, LLM_LATENCY_SAMPLE_SIZE - 1)
+        pipe.execute()
+    except Exception as e:
+        logger.warning(f"[{purpose}] Failed to record latency: {e}")
+
+
+def get_hedge_delay(purpose: str) -> float:
+    """p95 latency of recent calls for `purpose`, clamped to the configured range."""
+    cached = _p95_cache.get(purpose)
+    if cached and cached[1] > time.monotonic():
+        return cached[0]
+
+    settings = get_hedging_settings(purpose)
+    delay = settings["fallback_delay_seconds"]
+
+    try:
+        from django_redis import get_redis_connection
+
+        samples = sorted(
+            float(value)
+            for value in get_redis_connection("default").lrange(
+                f"{LLM_LATENCY_KEY_PREFIX}:{purpose}", 0, -1
+            )
+        )
+        if len(samples) >= settings["min_samples"]:
+            delay = samples[math.ceil(0.95 * len(samples)) - 1]
+    except Exception as e:
+        logger.warning(f"[{purpose}] Failed to read latency samples: {e}")
+
+    delay = min(
+        max(delay, settings["min_delay_seconds"]), settings["max_delay_seconds"]
+    )
+    _p95_cache[purpose] = (delay, time.monotonic() + _P95_CACHE_SECONDS)
+    return delay
+
+
+def _timed(fn):
+    started_at = time.monotonic()
+    return fn(), time.monotonic() - started_at
+
+
+def _settle_loser(purpose: str, future, on_discard):
+    """Pass the losing call's response to `on_discard` once it arrives."""
+
+    def callback(future):
+        if future.cancelled() or future.exception() is not None:
+            return
+        try:
+            on_discard(*future.result())
+        except Exception as e:
+            logger.warning(f"[{purpose}] Failed to record discarded hedge: {e}")
+
+    future.add_done_callback(callback)
+
+
+def hedged_call(purpose: str, fn, before_hedge=None, on_discard=None):
+    """
+    Call `fn`, firing a duplicate if it has not finished after the p95 delay.
+
+    The first successful response wins. `before_hedge` runs before the
+    duplicate is sent (e.g. rate-limit admission); if it raises, no hedge is
+    sent and the primary call is awaited. The losing call is left to finish
+    in the background; it is still billed, so when it succeeds its response
+    and latency are passed to `on_discard(response, latency)`.
+    """
+    settings = get_hedging_settings(purpose)
+    if not settings["enabled"]:
+        return fn()
+
+    delay = get_hedge_delay(purpose)
+    primary = _executor.submit(_timed, fn)
+    done, _ = wait([primary], timeout=delay)
+    if done:
+        return primary.result()[0]
+
+    try:
+        if before_hedge:
+            before_hedge()
+    except Exception as e:
+        logger.info(f"[{purpose}] Skipping hedge: {e}")
+        return primary.result()[0]
+
+    logger.info(f"[{purpose}] No response after {delay:.1f}s, sending hedge")
+    pending = {primary, _executor.submit(_timed, fn)}
+    last_error = None
+
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            try:
+                response = future.result()[0]
+            except Exception as e:
+                last_error = e
+                continue
+            if on_discard:
+                for loser in (done | pending) - {future}:
+                    _settle_loser(purpose, loser, on_discard)
+            return response
+
+    raise last_error
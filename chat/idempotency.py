@@ -0,0 +1,80 @@
+import hashlib
+import logging
+import time
+
+from django.core.cache import cache
+
+from chat.constants import (
+    IDEMPOTENCY_HEADER,
+    IDEMPOTENCY_KEY_PREFIX,
+    IDEMPOTENCY_KEY_TTL_SECONDS,
+    IDEMPOTENCY_WINDOW_SECONDS,
+)
+
+logger = logging.getLogger("chat.idempotency")
+
+# Placeholder stored while the first request is still enqueueing its task
+_IN_FLIGHT = {"status": "IN_FLIGHT"}
+
+
+def _digest(*parts) -> str:
+    raw = "|".join(str(part) for part in parts)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def build_question_key(request, session_id, question: str) -> str:
+    """
+    Build the dedup key for a question submission.
+
+    Clients may send an explicit Idempotency-Key header. Otherwise the key is
+    derived from user, session, normalized question and the current time bucket,
+    so a retry of the same question within the window maps to the same key.
+    """
+    user_id = request.user.id
+    client_key = request.headers.get(IDEMPOTENCY_HEADER)
+
+    if client_key:
+        return f"{IDEMPOTENCY_KEY_PREFIX}:{user_id}:client:{_digest(client_key)}"
+
+    bucket = int(time.time() // IDEMPOTENCY_WINDOW_SECONDS)
+    normalized_question = " ".join(question.lower().split())
+    digest = _digest(user_id, session_id or "new", normalized_question, bucket)
+
+    return f"{IDEMPOTENCY_KEY_PREFIX}:{user_id}:auto:{digest}"
+
+
+def claim(key: str):
+    """
+    Try to claim the key for a new submission.
+
+    Returns (claimed, existing): `claimed` is True when the caller owns the key
+    and must enqueue the work; otherwise `existing` holds the stored submission
+    (or the in-flight placeholder). Redis failures never block a submission.
+    """
+    try:
+        if cache.add(key, _IN_FLIGHT, timeout=IDEMPOTENCY_KEY_TTL_SECONDS):
+            return True, None
+        return False, cache.get(key)
+    except Exception as e:
+        logger.warning(f"Idempotency store unavailable, skipping dedup: {e}")
+        return True, None
+
+
+def is_in_flight(submission) -> bool:
+    return not submission or submission.get("status") == _IN_FLIGHT["status"]
+
+
+def store(key: str, submission: dict):
+    """Record the enqueued submission so duplicates can reuse its task_id."""
+    try:
+        cache.set(key, submission, timeout=IDEMPOTENCY_KEY_TTL_SECONDS)
+    except Exception as e:
+        logger.warning(f"Failed to store idempotency key {key}: {e}")
+
+
+def release(key: str):
+    """Forget a claimed key when the submission was rejected before enqueueing."""
+    try:
+        cache.delete(key)
+    except Exception as e:
+        logger.warning(f"Failed to release idempotency key {key}: {e}")
@@ -0,0 +1,104 @@
+import logging
+import threading
+
+from cachetools import LRUCache
+from django.core.cache import cache
+
+from advisory import metrics
+from chat.constants import (
+    INTAKE_SNAPSHOT_KEY_PREFIX,
+    INTAKE_SNAPSHOT_TTL_SECONDS,
+    PROMPT_INTAKE_CACHE_SIZE,
+)
+from chat.prompt_serialization import RenderedIntake, render_intake
+
+logger = logging.getLogger("chat.intake_snapshot")
+
+_local_snapshots = LRUCache(maxsize=PROMPT_INTAKE_CACHE_SIZE)
+_local_lock = threading.Lock()
+
+
+def get_version(user_input) -> str:
+    """Snapshot version of an intake; changes whenever the row is saved."""
+    return f"{user_input.id}.{int(user_input.updated_at.timestamp() * 1_000_000)}"
+
+
+def _key(version: str) -> str:
+    return f"{INTAKE_SNAPSHOT_KEY_PREFIX}:{version}"
+
+
+def _build(user_input) -> dict:
+    intake_data = {
+        "user_choice": user_input.user_choice,
+        "intake_data": user_input.intake_data,
+        "calculated_metrics": user_input.calculated_metrics,
+    }
+    rendered = render_intake(intake_data)
+    return {
+        "intake_data": intake_data,
+        "intake": rendered.intake,
+        "metrics": rendered.metrics,
+    }
+
+
+def _remember(version: str, snapshot: dict):
+    with _local_lock:
+        _local_snapshots[version] = snapshot
+
+
+def publish(user_input) -> str:
+    """
+    Make sure the snapshot for `user_input` is in the shared cache and
+    return its version. Versions this process already published are not
+    re-sent to Redis.
+    """
+    version = get_version(user_input)
+
+    with _local_lock:
+        if version in _local_snapshots:
+            return version
+
+    snapshot = _build(user_input)
+    try:
+        cache.add(_key(version), snapshot, timeout=INTAKE_SNAPSHOT_TTL_SECONDS)
+    except Exception as e:
+        # Tasks rebuild missing snapshots from the database
+        logger.warning(f"Failed to publish intake snapshot {version}: {e}")
+
+    _remember(version, snapshot)
+    return version
+
+
+def load(session, version: str) -> RenderedIntake:
+    """
+    Pre-rendered intake for `version`: process memory first, then Redis,
+    then rebuilt from the session's intake row.
+    """
+    with _local_lock:
+        snapshot = _local_snapshots.get(version)
+    metrics.cache_lookups.inc(
+        cache="intake_snapshot.process", result="miss" if snapshot is None else "hit"
+    )
+
+    if snapshot is None:
+        try:
+            snapshot = cache.get(_key(version))
+        except Exception as e:
+            logger.warning(f"Intake snapshot cache unavailable: {e}")
+        metrics.cache_lookups.inc(
+            cache="intake_snapshot.redis", result="miss" if snapshot is None else "hit"
+        )
+
+    if snapshot is None:
+        user_input = session.intake_data
+        current = get_version(user_input)
+        if current != version:
+            logger.info(f"Intake snapshot {version} superseded by {current}")
+        snapshot = _build(user_input)
+        try:
+            cache.set(_key(current), snapshot, timeout=INTAKE_SNAPSHOT_TTL_SECONDS)
+        except Exception as e:
+            logger.warning(f"Failed to store intake snapshot {current}: {e}")
+
+    _remember(version, snapshot)
+    return RenderedIntake(intake=snapshot["intake"], metrics=snapshot["metrics"])
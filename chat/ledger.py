@@ -0,0 +1,252 @@
+import json
+import logging
+from collections import defaultdict
+from datetime import datetime
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from chat.constants import (
+    LLM_CACHE_COALESCED,
+    LLM_CACHE_MISS,
+    LLM_LEDGER_BATCH_SIZE,
+    LLM_LEDGER_DEAD_LETTER_KEY,
+    LLM_LEDGER_DEAD_LETTER_MAX,
+    LLM_LEDGER_KEY,
+    LLM_LEDGER_MAX_ATTEMPTS,
+)
+
+logger = logging.getLogger("chat.ledger")
+
+_ROLLUP_COUNTERS = (
+    "calls",
+    "errors",
+    "coalesced",
+    "retries",
+    "prompt_tokens",
+    "output_tokens",
+    "thinking_tokens",
+    "cost_usd",
+    "latency_ms",
+)
+
+
+def record(
+    purpose: str,
+    provider: str,
+    model: str,
+    latency: float,
+    success: bool = True,
+    prompt_tokens: int = 0,
+    output_tokens: int = 0,
+    thinking_tokens: int = 0,
+    user_id: int = None,
+    session_id=None,
+    retries: int = 0,
+    fallback: bool = False,
+    cache_status: str = LLM_CACHE_MISS,
+):
+    """Queue one LLM call for the ledger; a single RPUSH on the hot path."""
+    from django_redis import get_redis_connection
+
+    from chat.routing import estimate_cost
+
+    entry = {
+        "user_id": user_id,
+        "session_id": str(session_id) if session_id else None,
+        "purpose": purpose,
+        "provider": provider,
+        "model": model,
+        "prompt_tokens": prompt_tokens,
+        "output_tokens": output_tokens,
+        "thinking_tokens": thinking_tokens,
+        "cost_usd": round(
+            estimate_cost(model, prompt_tokens, output_tokens + thinking_tokens), 8
+        ),
+        "latency_ms": round(latency * 1000),
+        "retries": retries,
+        "fallback": fallback,
+        "cache_status": cache_status,
+        "success": success,
+        "created_at": timezone.now().isoformat(),
+    }
+
+    try:
+        get_redis_connection("default").rpush(LLM_LEDGER_KEY, json.dumps(entry))
+    except Exception as e:
+        logger.warning(f"[{purpose}] Failed to queue LLM call log: {e}")
+
+
+def _drain(batch_size: int) -> list:
+    """Atomically take up to `batch_size` queued entries."""
+    from django_redis import get_redis_connection
+
+    pipe = get_redis_connection("default").pipeline()
+    pipe.lrange(LLM_LEDGER_KEY, 0, batch_size - 1)
+    pipe.ltrim(LLM_LEDGER_KEY, batch_size, -1)
+    raw, _ = pipe.execute()
+
+    entries = []
+    for value in raw:
+        try:
+            entries.append(json.loads(value))
+        except ValueError:
+            _dead_letter([value])
+    return entries
+
+
+def _requeue(entries: list):
+    """Put failed entries back at the head of the queue, in order."""
+    from django_redis import get_redis_connection
+
+    get_redis_connection("default").lpush(
+        LLM_LEDGER_KEY, *[json.dumps(entry) for entry in reversed(entries)]
+    )
+
+
+def _dead_letter(values: list):
+    """Park raw entries that cannot be written, for inspection by hand."""
+    from django_redis import get_redis_connection
+
+    logger.error(
+        "Moving %d LLM call log entries to %s", len(values), LLM_LEDGER_DEAD_LETTER_KEY
+    )
+    pipe = get_redis_connection("default").pipeline()
+    pipe.rpush(LLM_LEDGER_DEAD_LETTER_KEY, *values)
+    pipe.ltrim(LLM_LEDGER_DEAD_LETTER_KEY, -LLM_LEDGER_DEAD_LETTER_MAX, -1)
+    pipe.execute()
+
+
+def _increment_rollup(key: tuple, totals: dict):
+    from chat.models import LLMUsageDaily
+
+    date, user_id, purpose, model = key
+    rows = LLMUsageDaily.objects.filter(
+        date=date, user_id=user_id, purpose=purpose, model=model
+    )
+    increments = {field: F(field) + totals[field] for field in _ROLLUP_COUNTERS}
+
+    if rows.update(**increments):
+        return
+    try:
+        with transaction.atomic():
+            LLMUsageDaily.objects.create(
+                date=date, user_id=user_id, purpose=purpose, model=model, **totals
+            )
+    except IntegrityError:
+        # Another flush created the row first
+        rows.update(**increments)
+
+
+@transaction.atomic
+def write_batch(entries: list) -> int:
+    """Persist ledger entries and fold them into the daily rollups."""
+    from accounts.models import User
+    from chat.models import ChatSession, LLMCallLog
+
+    # Users or sessions deleted since the call was queued are kept as NULL
+    user_ids = set(
+        User.objects.filter(
+            id__in={entry["user_id"] for entry in entries if entry["user_id"]}
+        ).values_list("id", flat=True)
+    )
+    session_ids = {
+        str(session_id)
+        for session_id in ChatSession.objects.filter(
+            id__in={entry["session_id"] for entry in entries if entry["session_id"]}
+        ).values_list("id", flat=True)
+    }
+
+    logs = []
+    rollups = defaultdict(lambda: dict.fromkeys(_ROLLUP_COUNTERS, 0))
+    for entry in entries:
+        user_id = entry["user_id"] if entry["user_id"] in user_ids else None
+        created_at = datetime.fromisoformat(entry["created_at"])
+        cost = Decimal(str(entry["cost_usd"]))
+
+        logs.append(
+            LLMCallLog(
+                user_id=user_id,
+                session_id=(
+                    entry["session_id"] if entry["session_id"] in session_ids else None
+                ),
+                purpose=entry["purpose"],
+                provider=entry["provider"],
+                model=entry["model"],
+                prompt_tokens=entry["prompt_tokens"],
+                output_tokens=entry["output_tokens"],
+                thinking_tokens=entry["thinking_tokens"],
+                cost_usd=cost,
+                latency_ms=entry["latency_ms"],
+                retries=entry["retries"],
+                fallback=entry["fallback"],
+                cache_status=entry["cache_status"],
+                success=entry["success"],
+                created_at=created_at,
+            )
+        )
+
+        totals = rollups[(created_at.date(), user_id, entry["purpose"], entry["model"])]
+        totals["calls"] += 1
+        totals["errors"] += int(not entry["success"])
+        totals["coalesced"] += int(entry["cache_status"] == LLM_CACHE_COALESCED)
+        totals["retries"] += entry["retries"]
+        totals["prompt_tokens"] += entry["prompt_tokens"]
+        totals["output_tokens"] += entry["output_tokens"]
+        totals["thinking_tokens"] += entry["thinking_tokens"]
+        totals["cost_usd"] += cost
+        totals["latency_ms"] += entry["latency_ms"]
+
+    LLMCallLog.objects.bulk_create(logs, batch_size=LLM_LEDGER_BATCH_SIZE)
+    for key, totals in rollups.items():
+        _increment_rollup(key, totals)
+
+    return len(logs)
+
+
+def flush(batch_size: int = LLM_LEDGER_BATCH_SIZE, max_batches: int = 20) -> int:
+    """Move queued entries into the database; returns how many were written."""
+    written = 0
+    for _ in range(max_batches):
+        entries = _drain(batch_size)
+        if not entries:
+            break
+        try:
+            written += write_batch(entries)
+        except Exception as e:
+            logger.warning(
+                "Failed to write %d LLM call log entries, retrying one by one: %s",
+                len(entries),
+                e,
+            )
+            written += _write_each(entries)
+            break
+        if len(entries) < batch_size:
+            break
+    return written
+
+
+def _write_each(entries: list) -> int:
+    """
+    Write a failed batch entry by entry, so one bad entry does not hold back
+    the rest. Entries that still fail are requeued until they have failed
+    LLM_LEDGER_MAX_ATTEMPTS flushes, then dead-lettered.
+    """
+    written = 0
+    retry, dead = [], []
+    for entry in entries:
+        try:
+            written += write_batch([entry])
+        except Exception:
+            entry["attempts"] = entry.get("attempts", 0) + 1
+            if entry["attempts"] < LLM_LEDGER_MAX_ATTEMPTS:
+                retry.append(entry)
+            else:
+                dead.append(json.dumps(entry, default=str))
+    if retry:
+        _requeue(retry)
+    if dead:
+        _dead_letter(dead)
+    return written
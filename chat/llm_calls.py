@@ -0,0 +1,308 @@
+"""
+Calling an LLM purpose through its provider route.
+
+call_route() is the one path to a provider: the chat turn (ChatService)
+and onboarding generation both use it, so every call gets the same
+circuit breaker, rate-limit admission, retries, hedging, single-flight
+coalescing and call ledger.
+"""
+
+import logging
+import time
+
+from advisory.log import redact
+from chat import ledger, llm_providers, rate_limiter, routing
+from chat.circuit_breaker import STATE_OPEN, CircuitBreaker
+from chat.coalescing import prompt_hash, single_flight
+from chat.constants import LLM_CACHE_COALESCED
+from chat.hedging import hedged_call, record_latency
+from chat.schemas import StructuredOutputError, get_json_schema, parse_response
+
+logger = logging.getLogger("chat.llm_calls")
+
+
+def call_route(
+    purpose: str,
+    system_prompt: str,
+    user_prompt: str,
+    temperature: float,
+    user_id: int = None,
+    session_id=None,
+) -> dict:
+    """
+    Parsed JSON reply for `purpose` from the first route that answers.
+
+    Each (provider, model) of the purpose's route gets retries, hedging and
+    single-flight coalescing of identical prompts; every call is recorded in
+    the routing metrics and the ledger under `user_id` and `session_id`.
+    Raises the last route's error when every route fails, including
+    CircuitOpenError and RateLimitExceeded when they were shed.
+    """
+    caller = {"user_id": user_id, "session_id": session_id}
+    route = routing.get_route(purpose)
+    last_error = None
+
+    for index, (provider, model) in enumerate(route):
+        if index:
+            logger.warning(
+                "[%s] Falling back to %s:%s after %s",
+                purpose,
+                provider,
+                model,
+                type(last_error).__name__,
+            )
+
+        # Identical prompts in flight on other workers share one provider call
+        key = prompt_hash(provider, model, temperature, system_prompt, user_prompt)
+
+        # Set when this worker made the call rather than joining another's
+        provider_called = False
+
+        def generate():
+            nonlocal provider_called
+            provider_called = True
+            return _generate_content(
+                provider,
+                model,
+                system_prompt,
+                user_prompt,
+                temperature,
+                purpose,
+                caller,
+                fallback=index > 0,
+            )
+
+        started_at = time.monotonic()
+        try:
+            result = single_flight(key, generate, purpose=purpose)
+        except Exception as e:
+            last_error = e
+            continue
+
+        if not provider_called:
+            _log_call(
+                purpose,
+                provider,
+                model,
+                started_at,
+                caller,
+                fallback=index > 0,
+                cache_status=LLM_CACHE_COALESCED,
+            )
+        return result
+
+    raise last_error
+
+def _log_call(purpose, provider, model, started_at, caller, **details):
+    """Queue a call_route outcome for the LLM call ledger."""
+    ledger.record(
+        purpose, provider, model, time.monotonic() - started_at, **caller, **details
+    )
+
+def _log_discarded(
+    purpose, provider, model, estimated_tokens, caller, response, latency, fallback
+):
+    """Bill the losing call of a hedge, which finished after the winner."""
+    rate_limiter.reconcile(model, estimated_tokens, response.total_tokens)
+    routing.record_call(
+        purpose, provider, model, latency, True, response, fallback
+    )
+    ledger.record(
+        purpose,
+        provider,
+        model,
+        latency,
+        prompt_tokens=response.prompt_tokens,
+        output_tokens=response.output_tokens,
+        thinking_tokens=response.thinking_tokens,
+        fallback=fallback,
+        **caller,
+    )
+
+def _generate_content(
+    provider: str,
+    model: str,
+    system_prompt: str,
+    user_prompt: str,
+    temperature: float,
+    purpose: str,
+    caller: dict,
+    fallback: bool = False,
+) -> dict:
+    max_retries = 3
+    last_error = None
+    call_started_at = time.monotonic()
+    # Parse retries are billed too, so the ledger sums every attempt
+    usage = {"prompt_tokens": 0, "output_tokens": 0, "thinking_tokens": 0}
+
+    estimated_tokens = rate_limiter.estimate_tokens(system_prompt, user_prompt)
+    breaker = CircuitBreaker(purpose, key=f"{purpose}:{model}")
+
+    for attempt in range(1, max_retries + 1):
+        # Fail fast while the provider is known to be unhealthy
+        breaker.before_call()
+
+        # Shed or delay before the provider rejects us with a 429
+        rate_limiter.acquire(model, estimated_tokens, purpose)
+
+        started_at = time.monotonic()
+
+        try:
+            response = hedged_call(
+                purpose,
+                lambda: llm_providers.generate(
+                    provider,
+                    model,
+                    system_prompt,
+                    user_prompt,
+                    temperature,
+                    response_schema=get_json_schema(purpose),
+                ),
+                before_hedge=lambda: rate_limiter.acquire(
+                    model, estimated_tokens, purpose
+                ),
+                on_discard=lambda response, latency: _log_discarded(
+                    purpose,
+                    provider,
+                    model,
+                    estimated_tokens,
+                    caller,
+                    response,
+                    latency,
+                    fallback,
+                ),
+            )
+
+            latency = time.monotonic() - started_at
+            breaker.record_success(latency)
+            record_latency(purpose, latency)
+            routing.record_call(
+                purpose, provider, model, latency, True, response, fallback
+            )
+            for field in usage:
+                usage[field] += getattr(response, field)
+
+            if response.total_tokens:
+                # Counted by metrics and the call ledger; details only
+                logger.debug(
+                    "[%s] Token usage (%s:%s): prompt=%d output=%d "
+                    "thinking=%d total=%d",
+                    purpose,
+                    provider,
+                    model,
+                    response.prompt_tokens,
+                    response.output_tokens,
+                    response.thinking_tokens,
+                    response.total_tokens,
+                )
+
+                rate_limiter.reconcile(
+                    model, estimated_tokens, response.total_tokens
+                )
+
+            # Minor JSON defects are repaired locally, not re-requested
+            result, repaired = parse_response(purpose, response.text)
+            if repaired:
+                logger.warning("[%s] Repaired malformed JSON locally", purpose)
+                routing.record_parse_outcome(purpose, provider, model, "repaired")
+            _log_call(
+                purpose,
+                provider,
+                model,
+                call_started_at,
+                caller,
+                retries=attempt - 1,
+                fallback=fallback,
+                **usage,
+            )
+            return result
+
+        except StructuredOutputError as e:
+            last_error = e
+            routing.record_parse_outcome(purpose, provider, model, "parse_retries")
+            logger.error(
+                "[%s] JSON parse error (attempt %d/%d): %s; raw response: %s",
+                purpose,
+                attempt,
+                max_retries,
+                e,
+                redact(response.text or "", 500),
+            )
+            if attempt < max_retries:
+                time.sleep(1 * attempt)
+                continue
+
+        except Exception as e:
+            last_error = e
+            error_str = str(e).lower()
+            breaker.record_failure()
+            routing.record_call(
+                purpose,
+                provider,
+                model,
+                time.monotonic() - started_at,
+                False,
+                fallback=fallback,
+            )
+
+            # Check if it's a quota/rate limit error - DON'T retry these
+            if (
+                "429" in error_str
+                or "quota" in error_str
+                or "resource_exhausted" in error_str
+            ):
+                logger.error(
+                    "[%s] Quota exceeded, not retrying: %s: %.200s",
+                    purpose,
+                    type(e).__name__,
+                    e,
+                )
+                _log_call(
+                    purpose,
+                    provider,
+                    model,
+                    call_started_at,
+                    caller,
+                    success=False,
+                    retries=attempt - 1,
+                    fallback=fallback,
+                    **usage,
+                )
+                raise e  # Fail immediately, no retry
+
+            logger.error(
+                "[%s] API error (attempt %d/%d): %s: %s",
+                purpose,
+                attempt,
+                max_retries,
+                type(e).__name__,
+                e,
+            )
+
+            # Retry on timeout or 500 errors, unless the circuit just opened
+            if any(x in error_str for x in ["timeout", "500"]):
+                if attempt < max_retries and breaker.get_state() != STATE_OPEN:
+                    time.sleep(2**attempt)
+                    continue
+
+            # For other errors, don't retry
+            break
+
+    logger.error(
+        "[%s] All retries exhausted. Final error: %s: %s",
+        purpose,
+        type(last_error).__name__,
+        last_error,
+    )
+    _log_call(
+        purpose,
+        provider,
+        model,
+        call_started_at,
+        caller,
+        success=False,
+        retries=attempt - 1,
+        fallback=fallback,
+        **usage,
+    )
+    raise last_error
@@ -0,0 +1,127 @@
+from collections import namedtuple
+
+from decouple import config
+
+from chat.constants import (
+    LLM_PROVIDER_API_KEYS,
+    LLM_PROVIDER_GEMINI,
+    LLM_PROVIDER_GROQ,
+    LLM_PROVIDER_STUB,
+)
+
+# Provider-neutral view of a completion and its token usage
+LLMResponse = namedtuple(
+    "LLMResponse",
+    ["text", "prompt_tokens", "output_tokens", "thinking_tokens", "total_tokens"],
+)
+
+
+def get_api_key(provider: str):
+    if provider == LLM_PROVIDER_STUB:
+        return "stub"
+    env_name = LLM_PROVIDER_API_KEYS.get(provider)
+    return config(env_name, default=None) if env_name else None
+
+
+def generate_gemini(
+    model: str,
+    system_prompt: str,
+    user_prompt: str,
+    temperature: float,
+    response_schema: dict = None,
+) -> LLMResponse:
+    from google import genai
+    from google.genai import types
+
+    api_key = get_api_key(LLM_PROVIDER_GEMINI)
+    if not api_key:
+        raise Exception("GEMINI_API_KEY not configured in environment")
+
+    client = genai.Client(api_key=api_key)
+
+    response = client.models.generate_content(
+        model=model,
+        config=types.GenerateContentConfig(
+            system_instruction=system_prompt,
+            temperature=temperature,
+            response_mime_type="application/json",
+            response_json_schema=response_schema,
+        ),
+        contents=user_prompt,
+    )
+
+    usage = getattr(response, "usage_metadata", None)
+
+    return LLMResponse(
+        text=response.text,
+        prompt_tokens=getattr(usage, "prompt_token_count", 0) or 0,
+        output_tokens=getattr(usage, "candidates_token_count", 0) or 0,
+        thinking_tokens=getattr(usage, "thoughts_token_count", 0) or 0,
+        total_tokens=getattr(usage, "total_token_count", 0) or 0,
+    )
+
+
+def generate_groq(
+    model: str,
+    system_prompt: str,
+    user_prompt: str,
+    temperature: float,
+    response_schema: dict = None,
+) -> LLMResponse:
+    # JSON mode only; the schema is enforced by local validation
+    from groq import Groq
+
+    api_key = get_api_key(LLM_PROVIDER_GROQ)
+    if not api_key:
+        raise Exception("GROQ_API_KEY not configured in environment")
+
+    client = Groq(api_key=api_key)
+
+    response = client.chat.completions.create(
+        model=model,
+        messages=[
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt},
+        ],
+        temperature=temperature,
+        response_format={"type": "json_object"},
+    )
+
+    usage = response.usage
+
+    return LLMResponse(
+        text=response.choices[0].message.content,
+        prompt_tokens=getattr(usage, "prompt_tokens", 0) or 0,
+        output_tokens=getattr(usage, "completion_tokens", 0) or 0,
+        thinking_tokens=0,
+        total_tokens=getattr(usage, "total_tokens", 0) or 0,
+    )
+
+
+def generate_stub(*args, **kwargs) -> LLMResponse:
+    from chat.llm_stub import generate_stub
+
+    return generate_stub(*args, **kwargs)
+
+
+PROVIDERS = {
+    LLM_PROVIDER_GEMINI: generate_gemini,
+    LLM_PROVIDER_GROQ: generate_groq,
+    LLM_PROVIDER_STUB: generate_stub,
+}
+
+
+def generate(
+    provider: str,
+    model: str,
+    system_prompt: str,
+    user_prompt: str,
+    temperature: float,
+    response_schema: dict = None,
+) -> LLMResponse:
+    if provider not in PROVIDERS:
+        raise Exception(f"Unknown LLM provider: {provider}")
+
+    return PROVIDERS[provider](
+        model, system_prompt, user_prompt, temperature, response_schema
+    )
@@ -0,0 +1,92 @@
+import math
+import re
+import time
+
+from django.conf import settings
+
+from chat.constants import LLM_STUB_FOLLOW_UP_MARKER
+from chat.llm_providers import LLMResponse
+
+_PIECE_RE = re.compile(r"[^\W\d_]+|\d+|\s+|[^\w\s]", re.UNICODE)
+
+# Canned replies keyed by response schema title; valid for each schema
+_REPLIES = {
+    "ClassifierResponse": (
+        '{"classification": "ANSWER_DIRECTLY", "meta_subtype": null, '
+        '"out_of_context_type": null, "missing_field": null, '
+        '"language": "en", "reasoning": "Stub classification."}'
+    ),
+    "FollowUpClassifierResponse": (
+        '{"classification": "NEEDS_FOLLOW_UP", "meta_subtype": null, '
+        '"out_of_context_type": null, "missing_field": "storage_capacity", '
+        '"language": "en", "reasoning": "Stub follow-up."}'
+    ),
+    "MCQResponse": (
+        '{"question": "What is your storage capacity?", "options": '
+        '["Under 1,000 tonnes", "1,000-5,000 tonnes", "5,000-10,000 tonnes", '
+        '"Over 10,000 tonnes"]}'
+    ),
+    "AnswerResponse": (
+        '{"answer": "Stub answer: keep table potatoes at 2-4°C and 85-90% '
+        'relative humidity.", "suggested_questions": ["How do I control '
+        'sprouting?", "What insulation should I use?", "How can I cut '
+        'energy costs?"]}'
+    ),
+    "ShortAnswerResponse": '{"answer": "Stub response."}',
+    "OnboardingResponse": (
+        '{"welcome_message": "Welcome! Ask me anything about potato cold '
+        'storage.", "suggested_questions": ["What temperature should I '
+        'use?", "How do I size my chambers?", "How do I reduce losses?"]}'
+    ),
+}
+
+
+def count_tokens(text: str) -> int:
+    """
+    Approximate subword token count.
+
+    Words cost one token per 5 letters, digit runs one per 3 digits and
+    punctuation one each. A single space is absorbed by the next word;
+    longer whitespace runs (newlines, indentation) cost one per 4 chars,
+    as they do in SentencePiece/BPE vocabularies.
+    """
+    tokens = 0
+    for piece in _PIECE_RE.findall(text or ""):
+        if piece.isspace():
+            if piece != " ":
+                tokens += math.ceil(len(piece) / 4)
+        elif piece.isdigit():
+            tokens += math.ceil(len(piece) / 3)
+        elif piece[0].isalpha():
+            tokens += math.ceil(len(piece) / 5)
+        else:
+            tokens += 1
+    return tokens
+
+
+def generate_stub(
+    model: str,
+    system_prompt: str,
+    user_prompt: str,
+    temperature: float,
+    response_schema: dict = None,
+) -> LLMResponse:
+    """Deterministic offline provider for tests, benchmarks and load tests."""
+    latency = getattr(settings, "LLM_STUB_LATENCY_SECONDS", 0)
+    if latency:
+        time.sleep(latency)
+
+    title = (response_schema or {}).get("title")
+    if title == "ClassifierResponse" and LLM_STUB_FOLLOW_UP_MARKER in user_prompt:
+        title = "FollowUpClassifierResponse"
+    text = _REPLIES.get(title, '{"answer": "Stub response."}')
+
+    prompt_tokens = count_tokens(system_prompt) + count_tokens(user_prompt)
+    output_tokens = count_tokens(text)
+    return LLMResponse(
+        text=text,
+        prompt_tokens=prompt_tokens,
+        output_tokens=output_tokens,
+        thinking_tokens=0,
+        total_tokens=prompt_tokens + output_tokens,
+    )
@@ -0,0 +1,42 @@
+import uuid
+
+from django.core.management.base import BaseCommand
+
+from chat import archive
+from chat.constants import CHAT_ARCHIVE_AFTER_DAYS, CHAT_ARCHIVE_BATCH_SIZE
+
+
+class Command(BaseCommand):
+    help = (
+        "Abandon idle chat sessions and move the messages of ended sessions "
+        "idle for --days days into compressed archive rows, as the hourly "
+        "beat task does; or --restore one session's messages."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=CHAT_ARCHIVE_AFTER_DAYS)
+        parser.add_argument(
+            "--batch-size", type=int, default=CHAT_ARCHIVE_BATCH_SIZE
+        )
+        parser.add_argument(
+            "--restore",
+            type=uuid.UUID,
+            metavar="SESSION_ID",
+            help="Move an archived session's messages back and exit",
+        )
+
+    def handle(self, *args, **options):
+        if options["restore"]:
+            restored = archive.restore(options["restore"])
+            self.stdout.write(self.style.SUCCESS(f"Restored {restored} messages"))
+            return
+
+        abandoned = archive.abandon_idle()
+        archived = archive.archive_inactive(
+            days=options["days"], batch_size=options["batch_size"]
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Abandoned {abandoned} and archived {archived} sessions"
+            )
+        )
@@ -0,0 +1,160 @@
+import logging
+import logging.config
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+
+from advisory.log import build_logging, log_prompt
+from chat import prompts
+from chat.management.commands.prompt_token_report import (
+    QUESTION,
+    SAMPLE_HISTORY,
+    SAMPLE_INTAKE,
+)
+from usecase_engine.calculations import compute_metrics
+
+# name: (build_logging kwargs, prompt sample rate); "off" disables logging
+# and "legacy" runs the previous log calls under the previous DEBUG config
+MODES = {
+    "off": None,
+    "legacy": None,
+    "dev": ({"level": "DEBUG"}, 1.0),
+    "stage": (
+        {"level": "INFO", "structured": True, "queued": True, "prompt_level": "DEBUG"},
+        0.1,
+    ),
+    "prod": ({"level": "INFO", "structured": True, "queued": True}, 0.01),
+}
+
+
+def _turn(turn_prompts):
+    """The log calls of one answered turn, as ChatService makes them now."""
+    prompt_logger = logging.getLogger("chat.prompts")
+    service_logger = logging.getLogger("chat.service")
+    call_logger = logging.getLogger("chat.llm_calls")
+
+    service_logger.debug("📝 User question: %s", QUESTION)
+    for purpose, user_prompt in turn_prompts:
+        log_prompt(prompt_logger, purpose.lower(), user_prompt)
+        call_logger.debug(
+            "[%s] Token usage (%s:%s): prompt=%d output=%d thinking=%d total=%d",
+            purpose,
+            "gemini",
+            "gemini-2.5-flash",
+            1200,
+            300,
+            0,
+            1500,
+        )
+        if purpose == "CLASSIFIER":
+            service_logger.debug("🔍 Classifier result: %s", "ANSWER_DIRECTLY")
+
+
+def _legacy_turn(turn_prompts):
+    """The same turn with the previous eager, full-prompt INFO logging."""
+    prompt_logger = logging.getLogger("chat.prompts")
+    service_logger = logging.getLogger("chat.service")
+
+    service_logger.info(
+        f"📝 User prompt: {QUESTION[:100]}{'...' if len(QUESTION) > 100 else ''}"
+    )
+    for purpose, user_prompt in turn_prompts:
+        prompt_logger.info(f"user prompt {purpose.lower()}: {user_prompt}")
+        service_logger.info(
+            f"[{purpose}] Token Usage (gemini:gemini-2.5-flash):\n"
+            f"   ├─ Prompt (input):    {1200:,} tokens\n"
+            f"   ├─ Response (output): {300:,} tokens\n"
+            f"   ├─ Thinking:          {0:,} tokens\n"
+            f"   └─ Total:             {1500:,} tokens"
+        )
+        if purpose == "CLASSIFIER":
+            service_logger.info(f"🔍 Classifier result: {'ANSWER_DIRECTLY'}")
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure the per-turn cost of chat logging on the calling thread "
+        "under each environment's logging config, against logging off and "
+        "the previous eager, full-prompt INFO logging."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--turns", type=int, default=2000)
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        turns = options["turns"]
+        intake = {
+            "user_choice": "build",
+            "intake_data": SAMPLE_INTAKE,
+            "calculated_metrics": compute_metrics(SAMPLE_INTAKE, "build"),
+        }
+        # Prompts are built once; only the logging is timed
+        turn_prompts = [
+            (
+                "CLASSIFIER",
+                prompts.get_classifier_prompt(intake, SAMPLE_HISTORY, QUESTION)[1],
+            ),
+            (
+                "ANSWER_GENERATOR",
+                prompts.get_answer_generator_prompt(
+                    intake, SAMPLE_HISTORY, QUESTION, "English"
+                )[1],
+            ),
+        ]
+
+        self.stdout.write(
+            f"{'mode':<8}{'wall us':>9}{'cpu us':>9}{'overhead':>10}"
+            f"{'lines':>7}{'bytes':>7}  (per turn; cpu is the calling thread)"
+        )
+        baseline = None
+        try:
+            for name, mode in MODES.items():
+                if mode is None:
+                    config = build_logging(level="DEBUG")
+                    sample_rate = 0.0
+                else:
+                    kwargs, sample_rate = mode
+                    config = build_logging(**kwargs)
+
+                with tempfile.TemporaryFile("w+") as stream:
+                    config["handlers"]["console"]["stream"] = stream
+                    logging.config.dictConfig(config)
+                    if name == "off":
+                        logging.disable(logging.CRITICAL)
+
+                    wall, cpu = [], []
+                    with override_settings(LOG_PROMPT_SAMPLE_RATE=sample_rate):
+                        for _ in range(options["repeat"]):
+                            started = time.perf_counter()
+                            cpu_started = time.thread_time()
+                            for _ in range(turns):
+                                if name == "legacy":
+                                    _legacy_turn(turn_prompts)
+                                else:
+                                    _turn(turn_prompts)
+                            cpu.append(time.thread_time() - cpu_started)
+                            wall.append(time.perf_counter() - started)
+
+                    # Drain queued handlers before measuring their output
+                    logging.disable(logging.NOTSET)
+                    logging.config.dictConfig(build_logging(level="CRITICAL"))
+                    stream.seek(0)
+                    output = stream.read()
+                    lines = output.count("\n")
+
+                logged = turns * options["repeat"]
+                wall_us = min(wall) / turns * 1e6
+                cpu_us = min(cpu) / turns * 1e6
+                baseline = cpu_us if baseline is None else baseline
+                self.stdout.write(
+                    f"{name:<8}{wall_us:>9.1f}{cpu_us:>9.1f}"
+                    f"{cpu_us - baseline:>+10.1f}{lines / logged:>7.1f}"
+                    f"{len(output.encode()) / logged:>7.0f}"
+                )
+        finally:
+            logging.disable(logging.NOTSET)
+            logging.config.dictConfig(settings.LOGGING)
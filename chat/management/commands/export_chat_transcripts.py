@@ -0,0 +1,64 @@
+import sys
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from accounts.constants import LANGUAGE_CHOICES
+from chat import export
+from chat.constants import (
+    CHAT_EXPORT_DEFAULT_DAYS,
+    CHAT_EXPORT_FORMATS,
+    CLASSIFICATION_CHOICES,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Write chat transcripts as gzip-compressed NDJSON or CSV, streamed "
+        "from a server-side cursor in constant memory."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--start", type=date.fromisoformat, help="YYYY-MM-DD")
+        parser.add_argument("--end", type=date.fromisoformat, help="YYYY-MM-DD")
+        parser.add_argument(
+            "--language", choices=[code for code, _ in LANGUAGE_CHOICES]
+        )
+        parser.add_argument(
+            "--classification",
+            choices=[value for value, _ in CLASSIFICATION_CHOICES],
+        )
+        parser.add_argument("--format", choices=CHAT_EXPORT_FORMATS, default="ndjson")
+        parser.add_argument(
+            "--output", "-o", help="File to write (default: stdout)", default="-"
+        )
+
+    def handle(self, *args, **options):
+        end = options["end"] or timezone.now().date()
+        start = options["start"] or end - timedelta(days=CHAT_EXPORT_DEFAULT_DAYS - 1)
+        if start > end:
+            raise CommandError("--start must not be after --end")
+
+        rows = export.export_rows(
+            start, end, options["language"], options["classification"]
+        )
+        chunks = export.stream(rows, options["format"])
+
+        if options["output"] == "-":
+            for chunk in chunks:
+                sys.stdout.buffer.write(chunk)
+            sys.stdout.buffer.flush()
+            return
+
+        written = 0
+        with open(options["output"], "wb") as output:
+            for chunk in chunks:
+                output.write(chunk)
+                written += len(chunk)
+        self.stderr.write(
+            self.style.SUCCESS(
+                f"Exported {start} to {end} ({written:,} compressed bytes) "
+                f"to {options['output']}"
+            )
+        )
@@ -0,0 +1,446 @@
+import json
+import threading
+import time
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone as dt_timezone
+from pathlib import Path
+
+import httpx
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from advisory import metrics
+from chat import routing
+from chat.constants import LLM_STUB_FOLLOW_UP_MARKER
+
+DEFAULT_BASELINE = settings.BASE_DIR.parent / "var" / "loadtest" / "baseline.json"
+PURPOSES = (
+    "CLASSIFIER",
+    "MCQ_GENERATOR",
+    "ANSWER_GENERATOR",
+    "META_RESPONSE",
+    "OUT_OF_CONTEXT_RESPONSE",
+    "ONBOARDING",
+)
+QUESTIONS = [
+    "What temperature should I keep table potatoes at?",
+    "How much insulation do the chamber walls need?",
+    "How can I reduce electricity costs in summer?",
+    "How do I stop sprouting without chemicals?",
+]
+INTAKE = {
+    "storage_capacity": "5,000 MT",
+    "potato_variety": "Kufri Jyoti",
+    "location": "Agra, Uttar Pradesh",
+    "storage_type": "Multi-chamber",
+    "budget": "4.5 crore",
+}
+TERMINAL_STATES = ("SUCCESS", "FAILURE")
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of an unsorted list (None when empty)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(int(round(pct / 100 * len(ordered) + 0.5)) - 1, 0)
+    return ordered[min(rank, len(ordered) - 1)]
+
+
+def summarize(values):
+    return {
+        "count": len(values),
+        "p50": percentile(values, 50),
+        "p95": percentile(values, 95),
+        "p99": percentile(values, 99),
+        "max": max(values) if values else None,
+    }
+
+
+class _Recorder:
+    """Thread-safe latency and error collection for one run."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.queue_wait = []
+
+    def add(self, name, started, status_code=None, ok=True):
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        with self._lock:
+            self.latencies[name].append(elapsed_ms)
+            if not ok:
+                self.errors[f"{name} {status_code}"] += 1
+
+    def add_queue_wait(self, elapsed_ms):
+        with self._lock:
+            self.queue_wait.append(elapsed_ms)
+
+
+class _Sampler(threading.Thread):
+    """Samples Celery queue depth and DB connections while the run lasts."""
+
+    def __init__(self, interval):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.stopped = threading.Event()
+        self.queue_depth = []
+        self.db_connections = []
+        self.db_active = []
+
+    def _db_connections(self):
+        if connection.vendor != "postgresql":
+            return None
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT count(*), count(*) FILTER (WHERE state = 'active') "
+                "FROM pg_stat_activity WHERE datname = current_database() "
+                "AND pid <> pg_backend_pid()"
+            )
+            return cursor.fetchone()
+
+    def run(self):
+        try:
+            while not self.stopped.wait(self.interval):
+                try:
+                    self.queue_depth.append(metrics.celery_queue_depth())
+                except Exception:
+                    pass
+                usage = self._db_connections()
+                if usage:
+                    self.db_connections.append(usage[0])
+                    self.db_active.append(usage[1])
+        finally:
+            connection.close()
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-test the ask -> task -> status pipeline against a running "
+        "server and Celery worker (run both with LLM_STUB_ENABLED=1). "
+        "Reports per-endpoint and per-LLM-purpose latency percentiles, "
+        "queue wait, queue depth and DB connections, and saves/compares "
+        "baselines."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+        parser.add_argument("--users", type=int, default=20)
+        parser.add_argument("--sessions-per-user", type=int, default=1)
+        parser.add_argument("--questions", type=int, default=2)
+        parser.add_argument(
+            "--follow-up-every",
+            type=int,
+            default=2,
+            help="Every Nth question asks for details, driving the MCQ flow "
+            "(0 disables).",
+        )
+        parser.add_argument("--concurrency", type=int, default=10)
+        parser.add_argument("--poll-interval", type=float, default=0.2)
+        parser.add_argument("--task-timeout", type=float, default=60.0)
+        parser.add_argument("--sample-interval", type=float, default=0.5)
+        parser.add_argument(
+            "--save-baseline",
+            nargs="?",
+            const=str(DEFAULT_BASELINE),
+            help=f"Write the report as a baseline (default {DEFAULT_BASELINE}).",
+        )
+        parser.add_argument(
+            "--compare",
+            nargs="?",
+            const=str(DEFAULT_BASELINE),
+            help="Compare p95 latencies with a saved baseline.",
+        )
+        parser.add_argument(
+            "--keep-users",
+            action="store_true",
+            help="Keep the synthetic users and their data after the run.",
+        )
+
+    def handle(self, *args, **options):
+        from accounts.models import User
+
+        self.options = options
+        self.recorder = _Recorder()
+        run_id = uuid.uuid4().hex[:8]
+
+        users = [
+            User.objects.create_user(
+                username=f"loadtest-{run_id}-{i}",
+                email=f"loadtest-{run_id}-{i}@example.com",
+                password=uuid.uuid4().hex,
+            )
+            for i in range(options["users"])
+        ]
+        tokens = [str(RefreshToken.for_user(user).access_token) for user in users]
+
+        before = self._purpose_totals()
+        sampler = _Sampler(options["sample_interval"])
+        sampler.start()
+
+        started = time.perf_counter()
+        try:
+            with ThreadPoolExecutor(max_workers=options["concurrency"]) as pool:
+                results = list(pool.map(self._run_user, tokens))
+        finally:
+            elapsed = time.perf_counter() - started
+            sampler.stopped.set()
+            sampler.join()
+
+        try:
+            report = self._report(results, elapsed, before, sampler)
+        finally:
+            if not options["keep_users"]:
+                User.objects.filter(id__in=[user.id for user in users]).delete()
+
+        self._print(report)
+        if options["compare"]:
+            self._compare(report, Path(options["compare"]))
+        if options["save_baseline"]:
+            path = Path(options["save_baseline"])
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(json.dumps(report, indent=2) + "\n")
+            self.stdout.write(self.style.SUCCESS(f"Baseline saved to {path}"))
+
+    # Synthetic sessions -------------------------------------------------
+
+    def _request(self, client, name, method, path, ok_status=(200,), **kwargs):
+        started = time.perf_counter()
+        try:
+            response = client.request(method, path, **kwargs)
+        except httpx.HTTPError:
+            self.recorder.add(name, started, "error", ok=False)
+            return None
+        ok = response.status_code in ok_status
+        self.recorder.add(name, started, response.status_code, ok=ok)
+        return response.json()["data"] if ok and response.content else None
+
+    def _wait_for_task(self, client, task_id, started):
+        """Poll the task until it finishes; returns its data or None."""
+        deadline = started + self.options["task_timeout"]
+        while time.perf_counter() < deadline:
+            data = self._request(
+                client, "task-status", "GET", f"/task/{task_id}/status/"
+            )
+            if data and data.get("task_status") in TERMINAL_STATES:
+                self.recorder.add(
+                    "turn",
+                    started,
+                    data["task_status"],
+                    ok=data["task_status"] == "SUCCESS",
+                )
+                return data
+            time.sleep(self.options["poll_interval"])
+        self.recorder.add("turn", started, "timeout", ok=False)
+        return None
+
+    def _enqueue(self, client, name, path, payload):
+        """Submit a turn and wait for it; turn latency includes the submit."""
+        started = time.perf_counter()
+        data = self._request(
+            client, name, "POST", path, ok_status=(202,), json=payload
+        )
+        if not data:
+            return None
+        result = self._wait_for_task(client, data["task_id"], started)
+
+        # Timed by the task from the enqueue time the view sent with it
+        timings = (result or {}).get("timings") or {}
+        for span in timings.get("spans", ()):
+            if span["stage"] == "queue_wait":
+                self.recorder.add_queue_wait(span["ms"])
+        return result
+
+    def _run_user(self, token):
+        options = self.options
+        turns = 0
+        with httpx.Client(
+            base_url=options["base_url"],
+            headers={"Authorization": f"Bearer {token}"},
+            timeout=options["task_timeout"],
+        ) as client:
+            intake = self._request(
+                client,
+                "intake",
+                "POST",
+                "/intake/",
+                ok_status=(201,),
+                json={"user_choice": "build", "intake_data": INTAKE},
+            )
+            if not intake:
+                return turns
+
+            for _ in range(options["sessions_per_user"]):
+                session = self._request(
+                    client, "create-session", "POST", "/sessions/create/",
+                    ok_status=(201,),
+                )
+                if not session:
+                    continue
+                session_id = session["session_id"]
+
+                for number in range(1, options["questions"] + 1):
+                    question = QUESTIONS[(number - 1) % len(QUESTIONS)]
+                    every = options["follow_up_every"]
+                    if every and number % every == 0:
+                        question = f"{question} {LLM_STUB_FOLLOW_UP_MARKER}"
+
+                    result = self._enqueue(
+                        client,
+                        "ask",
+                        "/ask/",
+                        {"question": question, "session_id": session_id},
+                    )
+                    turns += 1
+                    if result and result.get("type") == "mcq":
+                        self._enqueue(
+                            client,
+                            "mcq-response",
+                            "/mcq-response/",
+                            {
+                                "mcq_message_id": result["mcq_message_id"],
+                                "selected_value": result["mcq"]["options"][0],
+                            },
+                        )
+                        turns += 1
+
+                self._request(client, "history", "GET", f"/history/{session_id}/")
+        return turns
+
+    # Reporting ----------------------------------------------------------
+
+    def _purpose_totals(self):
+        """(calls, total latency ms) per purpose from the route metrics."""
+        totals = defaultdict(lambda: [0, 0.0])
+        try:
+            for route in routing.get_route_metrics():
+                totals[route["purpose"]][0] += route["calls"]
+                totals[route["purpose"]][1] += (
+                    route["avg_latency_ms"] * route["calls"]
+                )
+        except Exception as e:
+            self.stderr.write(f"Route metrics unavailable: {e}")
+        return totals
+
+    def _purposes(self, before):
+        after = self._purpose_totals()
+        purposes = {}
+        for purpose in PURPOSES:
+            calls = after[purpose][0] - before[purpose][0]
+            if calls <= 0:
+                continue
+            samples = routing.get_latency_samples(purpose, calls)
+            purposes[purpose] = {
+                **summarize(samples),
+                "count": calls,
+                "mean": round((after[purpose][1] - before[purpose][1]) / calls, 1),
+            }
+        return purposes
+
+    def _report(self, results, elapsed, before, sampler):
+        latencies = self.recorder.latencies
+        requests = sum(
+            len(values) for name, values in latencies.items() if name != "turn"
+        )
+        queue_wait = self.recorder.queue_wait
+        return {
+            "recorded_at": datetime.now(dt_timezone.utc).isoformat(),
+            "config": {
+                key: self.options[key]
+                for key in (
+                    "users",
+                    "sessions_per_user",
+                    "questions",
+                    "follow_up_every",
+                    "concurrency",
+                )
+            },
+            "duration_s": round(elapsed, 2),
+            "throughput": {
+                "requests_per_s": round(requests / elapsed, 2),
+                "turns_per_s": round(sum(results) / elapsed, 2),
+            },
+            "endpoints": {
+                name: summarize(values) for name, values in sorted(latencies.items())
+            },
+            "purposes": self._purposes(before),
+            "queue_wait_ms": summarize(queue_wait) if queue_wait else None,
+            "queue_depth": summarize(sampler.queue_depth),
+            "db_connections": (
+                {
+                    "peak": max(sampler.db_connections),
+                    "peak_active": max(sampler.db_active),
+                    "mean": round(
+                        sum(sampler.db_connections) / len(sampler.db_connections), 1
+                    ),
+                }
+                if sampler.db_connections
+                else None
+            ),
+            "errors": dict(self.recorder.errors),
+        }
+
+    def _print(self, report):
+        def fmt(value):
+            return "-" if value is None else f"{value:.0f}"
+
+        def table(title, rows):
+            self.stdout.write(
+                f"\n{title:<26}{'count':>7}{'p50':>8}{'p95':>8}{'p99':>8}{'max':>8}"
+            )
+            for name, stats in rows.items():
+                self.stdout.write(
+                    f"{name:<26}{stats['count']:>7}{fmt(stats['p50']):>8}"
+                    f"{fmt(stats['p95']):>8}{fmt(stats['p99']):>8}"
+                    f"{fmt(stats['max']):>8}"
+                )
+
+        throughput = report["throughput"]
+        self.stdout.write(
+            f"{report['duration_s']}s, {throughput['requests_per_s']} req/s, "
+            f"{throughput['turns_per_s']} turns/s"
+        )
+        table("endpoint (ms)", report["endpoints"])
+        if report["purposes"]:
+            table("LLM purpose (ms)", report["purposes"])
+
+        queue_wait = report["queue_wait_ms"]
+        if queue_wait:
+            table("queue", {"wait (ms)": queue_wait})
+        if report["queue_depth"]["count"]:
+            table("queue", {"depth (messages)": report["queue_depth"]})
+        if report["db_connections"]:
+            usage = report["db_connections"]
+            self.stdout.write(
+                f"\nDB connections: peak {usage['peak']} "
+                f"({usage['peak_active']} active), mean {usage['mean']}"
+            )
+        if report["errors"]:
+            self.stdout.write(self.style.WARNING(f"\nErrors: {report['errors']}"))
+
+    def _compare(self, report, path):
+        if not path.exists():
+            raise CommandError(f"No baseline at {path}")
+        baseline = json.loads(path.read_text())
+
+        self.stdout.write(f"\np95 vs baseline {path} ({baseline['recorded_at']})")
+        for section in ("endpoints", "purposes"):
+            for name, stats in report[section].items():
+                old = baseline.get(section, {}).get(name, {}).get("p95")
+                if not old or stats["p95"] is None:
+                    continue
+                change = (stats["p95"] - old) / old * 100
+                self.stdout.write(
+                    f"  {name:<24}{old:>8.0f} -> {stats['p95']:>6.0f} ms "
+                    f"({change:+.0f}%)"
+                )
+        old_rps = baseline["throughput"]["requests_per_s"]
+        self.stdout.write(
+            f"  {'requests/s':<24}{old_rps:>8} -> "
+            f"{report['throughput']['requests_per_s']:>6}"
+        )
@@ -0,0 +1,74 @@
+from django.core.management.base import BaseCommand
+
+from chat import prompts
+from chat.llm_stub import count_tokens
+from usecase_engine.calculations import compute_metrics
+from usecase_engine.constants import SUGGESTED_QUESTIONS_SYSTEM_PROMPT
+from usecase_engine.utils import get_suggested_questions_user_prompt
+
+SAMPLE_INTAKE = {
+    "storage_capacity": "5,000 MT",
+    "potato_variety": "Kufri Jyoti",
+    "location": "Agra, Uttar Pradesh",
+    "storage_type": "Multi-chamber",
+    "budget": "4.5 crore",
+    "primary_problem": "",
+    "storage_duration_months": 8,
+    "existing_equipment": [],
+    "notes": None,
+    "power_backup": {"available": True, "type": ""},
+}
+
+SAMPLE_HISTORY = [
+    {"sender": "user", "message": "How many chambers should I plan?"},
+    {"sender": "bot", "message": "For 5,000 tonnes plan about five chambers."},
+]
+
+QUESTION = "What refrigeration capacity do I need for my store?"
+
+
+class Command(BaseCommand):
+    help = (
+        "Report system/user prompt token counts per purpose for a sample "
+        "intake, using the stub LLM's token counter."
+    )
+
+    def handle(self, *args, **options):
+        intake = {
+            "user_choice": "build",
+            "intake_data": SAMPLE_INTAKE,
+            "calculated_metrics": compute_metrics(SAMPLE_INTAKE, "build"),
+        }
+
+        cases = {
+            "CLASSIFIER": prompts.get_classifier_prompt(
+                intake, SAMPLE_HISTORY, QUESTION
+            ),
+            "META_RESPONSE": prompts.get_meta_response_prompt(
+                QUESTION, "capabilities", "English"
+            ),
+            "OUT_OF_CONTEXT_RESPONSE": prompts.get_out_of_context_response_prompt(
+                QUESTION, "unrelated", "English"
+            ),
+            "MCQ_GENERATOR": prompts.get_mcq_generator_prompt(
+                intake, QUESTION, "storage_temperature", "English"
+            ),
+            "ANSWER_GENERATOR": prompts.get_answer_generator_prompt(
+                intake, SAMPLE_HISTORY, QUESTION, "English"
+            ),
+            "ONBOARDING": (
+                SUGGESTED_QUESTIONS_SYSTEM_PROMPT,
+                get_suggested_questions_user_prompt(
+                    "build", SAMPLE_INTAKE, "English", "Welcome!"
+                ),
+            ),
+        }
+
+        self.stdout.write(f"{'purpose':<26}{'system':>8}{'user':>8}{'total':>8}")
+        for purpose, (system_prompt, user_prompt) in cases.items():
+            system_tokens = count_tokens(system_prompt)
+            user_tokens = count_tokens(user_prompt)
+            self.stdout.write(
+                f"{purpose:<26}{system_tokens:>8}{user_tokens:>8}"
+                f"{system_tokens + user_tokens:>8}"
+            )
@@ -0,0 +1,29 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from chat import stats
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the ChatStatsDaily rollups behind the admin stats "
+        "endpoints, from the first sign-up or from --start, e.g. after "
+        "deleting users or sessions."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--start",
+            type=date.fromisoformat,
+            help="First day to recompute (YYYY-MM-DD); running totals "
+            "continue from the day before",
+        )
+
+    def handle(self, *args, **options):
+        if options["start"]:
+            written = stats.refresh(start=options["start"])
+        else:
+            written = stats.rebuild()
+
+        self.stdout.write(self.style.SUCCESS(f"Recomputed {written} days of stats"))
@@ -0,0 +1,54 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from chat.models import ChatMessage, ChatSession
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the denormalized message_count and last_message_at of "
+        "chat sessions from their messages, e.g. after adding the columns."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        messages = ChatMessage.objects.filter(session=OuterRef("pk")).values(
+            "session"
+        )
+        # Archived sessions keep the counts they had when archived
+        activity = ChatSession.objects.filter(archive__isnull=True).annotate(
+            counted=Coalesce(
+                Subquery(messages.annotate(n=Count("id")).values("n")), 0
+            ),
+            latest=Subquery(
+                messages.annotate(latest=Max("created_at")).values("latest")
+            ),
+        ).only("id", "message_count", "last_message_at")
+
+        batch = []
+        updated = 0
+        for session in activity.iterator(chunk_size=options["batch_size"]):
+            if (session.message_count, session.last_message_at) == (
+                session.counted,
+                session.latest,
+            ):
+                continue
+            session.message_count = session.counted
+            session.last_message_at = session.latest
+            batch.append(session)
+            if len(batch) >= options["batch_size"]:
+                updated += self._update(batch)
+                batch = []
+        if batch:
+            updated += self._update(batch)
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Recomputed activity for {updated} sessions")
+        )
+
+    def _update(self, batch):
+        ChatSession.objects.bulk_update(batch, ["message_count", "last_message_at"])
+        return len(batch)
@@ -1,11 +1,15 @@
 import uuid
 
 from django.conf import settings
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F
 from django.utils import timezone
 
 from chat.constants import (
+    CLASSIFICATION_CHOICES,
     DEFAULT_MAX_DAILY_QUESTIONS,
+    LLM_CACHE_MISS,
+    LLM_CACHE_STATUS_CHOICES,
     MESSAGE_TYPE_CHOICES,
     SENDER_BOT,
     SENDER_CHOICES,
@@ -48,6 +52,7 @@ class DailyQuestionQuota(models.Model):
     class Meta:
         unique_together = ["user", "date"]
         ordering = ["-date"]
+        indexes = [models.Index(fields=["date"])]
 
     def __str__(self):
         max_questions = get_max_daily_questions()
@@ -113,6 +118,10 @@ class ChatSession(models.Model):
     started_at = models.DateTimeField(auto_now_add=True)
     ended_at = models.DateTimeField(null=True, blank=True)
 
+    # Maintained by ChatMessage.save() in the insert's transaction
+    message_count = models.PositiveIntegerField(default=0, editable=False)
+    last_message_at = models.DateTimeField(null=True, blank=True, editable=False)
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -121,6 +130,14 @@ class ChatSession(models.Model):
         indexes = [
             models.Index(fields=["user"]),
             models.Index(fields=["status", "started_at"]),
+            models.Index(fields=["started_at"]),
+            # Keyset pagination of a user's session list, answered from the
+            # index alone (PostgreSQL INCLUDE)
+            models.Index(
+                fields=["user", "-started_at", "-id"],
+                include=["title", "status", "message_count", "last_message_at"],
+                name="chat_session_user_list_idx",
+            ),
         ]
 
     def __str__(self):
@@ -176,6 +193,14 @@ class ChatMessage(models.Model):
         help_text="Type of message for flow control",
     )
 
+    classification = models.CharField(
+        max_length=20,
+        choices=CLASSIFICATION_CHOICES,
+        null=True,
+        blank=True,
+        help_text="Classifier outcome, set on user questions",
+    )
+
     suggested_questions = models.JSONField(
         null=True,
         blank=True,
@@ -220,16 +245,192 @@ class ChatMessage(models.Model):
         return f"[{self.session.user.username}] #{self.sequence_number}: {self.get_sender_display()}"
 
     def save(self, *args, **kwargs):
-        """Auto-set sequence number if not provided"""
-        if not self.sequence_number:
-            last_message = (
-                ChatMessage.objects.filter(session=self.session)
-                .order_by("-sequence_number")
-                .first()
+        """
+        Auto-set sequence number if not provided and, for new messages,
+        bump the session's message_count/last_message_at in the same
+        transaction. The session UPDATE runs first, so its row lock also
+        serializes sequence number allocation.
+        """
+        if not self._state.adding:
+            super().save(*args, **kwargs)
+            return
+
+        with transaction.atomic():
+            ChatSession.objects.filter(id=self.session_id).update(
+                message_count=F("message_count") + 1,
+                last_message_at=timezone.now(),
             )
 
-            self.sequence_number = (
-                (last_message.sequence_number + 1) if last_message else 1
-            )
+            if not self.sequence_number:
+                last_message = (
+                    ChatMessage.objects.filter(session=self.session)
+                    .order_by("-sequence_number")
+                    .first()
+                )
+
+                self.sequence_number = (
+                    (last_message.sequence_number + 1) if last_message else 1
+                )
+
+            super().save(*args, **kwargs)
+
+
+class LLMCallLog(models.Model):
+    """One call_gemini invocation, written in batches by flush_llm_call_log."""
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name="llm_calls",
+    )
+    session = models.ForeignKey(
+        ChatSession,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name="llm_calls",
+    )
+
+    purpose = models.CharField(max_length=40)
+    provider = models.CharField(max_length=20)
+    model = models.CharField(max_length=60)
+
+    prompt_tokens = models.PositiveIntegerField(default=0)
+    output_tokens = models.PositiveIntegerField(default=0)
+    thinking_tokens = models.PositiveIntegerField(default=0)
+    cost_usd = models.DecimalField(max_digits=14, decimal_places=8, default=0)
+
+    latency_ms = models.PositiveIntegerField(default=0)
+    retries = models.PositiveSmallIntegerField(
+        default=0, help_text="Attempts beyond the first on the final route"
+    )
+    fallback = models.BooleanField(default=False)
+    cache_status = models.CharField(
+        max_length=10, choices=LLM_CACHE_STATUS_CHOICES, default=LLM_CACHE_MISS
+    )
+    success = models.BooleanField(default=True)
+
+    created_at = models.DateTimeField(
+        db_index=True, help_text="When the call finished (not when it was written)"
+    )
+
+    class Meta:
+        ordering = ["-created_at"]
+        verbose_name = "LLM Call Log"
+        verbose_name_plural = "LLM Call Logs"
+
+    def __str__(self):
+        return f"{self.purpose} {self.provider}:{self.model} @ {self.created_at}"
+
+
+class LLMUsageDaily(models.Model):
+    """
+    Per-day LLM usage for one (user, purpose, model), maintained from the
+    call log batches. Admin usage reports read only these rows.
+    """
+
+    date = models.DateField()
+    # Kept as NULL when the user is deleted, so spend totals still add up
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name="llm_usage",
+    )
+    purpose = models.CharField(max_length=40)
+    model = models.CharField(max_length=60)
+
+    calls = models.PositiveIntegerField(default=0)
+    errors = models.PositiveIntegerField(default=0)
+    coalesced = models.PositiveIntegerField(default=0)
+    retries = models.PositiveIntegerField(default=0)
+    prompt_tokens = models.PositiveBigIntegerField(default=0)
+    output_tokens = models.PositiveBigIntegerField(default=0)
+    thinking_tokens = models.PositiveBigIntegerField(default=0)
+    cost_usd = models.DecimalField(max_digits=14, decimal_places=8, default=0)
+    latency_ms = models.PositiveBigIntegerField(
+        default=0, help_text="Total latency, for averages"
+    )
+
+    class Meta:
+        unique_together = ["date", "user", "purpose", "model"]
+        ordering = ["-date"]
+        verbose_name = "LLM Usage (daily)"
+        verbose_name_plural = "LLM Usage (daily)"
+
+    def __str__(self):
+        return f"{self.date} {self.user_id} {self.purpose} {self.model}"
+
 
-        super().save(*args, **kwargs)
+class ChatStatsDaily(models.Model):
+    """
+    Chat activity for one day plus running totals through that day, kept
+    by chat.stats.refresh. The admin stats endpoints read only these rows.
+    """
+
+    date = models.DateField(unique=True)
+
+    new_users = models.PositiveIntegerField(default=0)
+    sessions = models.PositiveIntegerField(default=0)
+    messages = models.PositiveIntegerField(default=0)
+    questions = models.PositiveIntegerField(
+        default=0, help_text="Questions counted against daily quotas"
+    )
+    active_users = models.PositiveIntegerField(
+        default=0, help_text="Users who asked at least one question"
+    )
+    user_days = models.PositiveIntegerField(
+        default=0, help_text="Daily quota rows, for questions per user"
+    )
+
+    classified_meta = models.PositiveIntegerField(default=0)
+    classified_answer_directly = models.PositiveIntegerField(default=0)
+    classified_needs_follow_up = models.PositiveIntegerField(default=0)
+    classified_out_of_context = models.PositiveIntegerField(default=0)
+
+    total_users = models.PositiveIntegerField(default=0)
+    total_sessions = models.PositiveBigIntegerField(default=0)
+    total_messages = models.PositiveBigIntegerField(default=0)
+    total_questions = models.PositiveBigIntegerField(default=0)
+    total_user_days = models.PositiveBigIntegerField(default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["-date"]
+        verbose_name = "Chat Stats (daily)"
+        verbose_name_plural = "Chat Stats (daily)"
+
+    def __str__(self):
+        return f"Chat stats {self.date}"
+
+
+class ChatSessionArchive(models.Model):
+    """
+    The messages of an archived session as one zlib-compressed JSON list,
+    written by chat.archive. The session row itself is kept.
+    """
+
+    session = models.OneToOneField(
+        ChatSession,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="archive",
+    )
+
+    month = models.DateField(
+        help_text="First day of the month of the session's last activity"
+    )
+    message_count = models.PositiveIntegerField(default=0)
+    payload = models.BinaryField()
+
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["-month"]
+        indexes = [models.Index(fields=["month"])]
+        verbose_name = "Chat Session Archive"
+        verbose_name_plural = "Chat Session Archives"
+
+    def __str__(self):
+        return f"Archive of ChatSession {self.session_id} ({self.month:%Y-%m})"
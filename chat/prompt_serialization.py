@@ -0,0 +1,114 @@
+import json
+import re
+import threading
+from collections import namedtuple
+
+from cachetools import LRUCache
+
+from advisory import metrics
+from chat.constants import INTAKE_SHORT_KEYS, PROMPT_INTAKE_CACHE_SIZE
+
+# Prompt-ready intake: compact JSON plus the precomputed calculations block
+RenderedIntake = namedtuple("RenderedIntake", ["intake", "metrics"])
+
+_EMPTY = (None, "", [], {})
+_BLANK_LINES = re.compile(r"\n{3,}")
+
+_session_cache = LRUCache(maxsize=PROMPT_INTAKE_CACHE_SIZE)
+_session_lock = threading.Lock()
+
+
+def _prune(value):
+    if isinstance(value, dict):
+        pruned = {}
+        for key, item in value.items():
+            item = _prune(item)
+            if item not in _EMPTY:
+                pruned.setdefault(INTAKE_SHORT_KEYS.get(key, key), item)
+        return pruned
+    if isinstance(value, list):
+        return [item for item in map(_prune, value) if item not in _EMPTY]
+    if isinstance(value, str):
+        return " ".join(value.split())
+    return value
+
+
+def compact_intake(intake_data) -> dict:
+    """
+    Canonical prompt form of an intake: the {"user_choice", "intake_data"}
+    wrapper flattened, empty fields dropped, known keys shortened.
+    """
+    if not isinstance(intake_data, dict):
+        return {}
+
+    if "intake_data" in intake_data:
+        fields = intake_data.get("intake_data")
+        flattened = {"user_choice": intake_data.get("user_choice")}
+        flattened.update(fields if isinstance(fields, dict) else {})
+        intake_data = flattened
+
+    return _prune(
+        {
+            key: value
+            for key, value in intake_data.items()
+            if key != "calculated_metrics"
+        }
+    )
+
+
+def render_intake(intake_data) -> RenderedIntake:
+    """Render an intake payload for prompts (RenderedIntake passes through)."""
+    from usecase_engine.calculations import format_metrics
+
+    if isinstance(intake_data, RenderedIntake):
+        return intake_data
+
+    metrics = {}
+    if isinstance(intake_data, dict):
+        metrics = intake_data.get("calculated_metrics") or {}
+
+    return RenderedIntake(
+        intake=json.dumps(
+            compact_intake(intake_data),
+            ensure_ascii=False,
+            separators=(",", ":"),
+            sort_keys=True,
+        ),
+        metrics=format_metrics(metrics),
+    )
+
+
+def get_session_intake(session, intake_data) -> RenderedIntake:
+    """
+    Rendered intake for a chat session, memoized on the session object and
+    per worker. The key carries the intake's snapshot version, so saving the
+    intake (e.g. recomputed calculated_metrics) starts a new entry.
+    """
+    from chat import intake_snapshot
+
+    user_input = session.intake_data
+    version = intake_snapshot.get_version(user_input) if user_input else None
+    key = (str(session.id), version)
+
+    cached = getattr(session, "_rendered_intake", None)
+    if cached and cached[0] == key:
+        return cached[1]
+
+    with _session_lock:
+        rendered = _session_cache.get(key)
+    metrics.cache_lookups.inc(
+        cache="rendered_intake", result="miss" if rendered is None else "hit"
+    )
+    if rendered is None:
+        rendered = render_intake(intake_data)
+        with _session_lock:
+            _session_cache[key] = rendered
+
+    session._rendered_intake = (key, rendered)
+    return rendered
+
+
+def strip_indentation(text: str) -> str:
+    """Drop template indentation and collapse runs of blank lines."""
+    lines = [line.strip() for line in text.strip().splitlines()]
+    return _BLANK_LINES.sub("\n\n", "\n".join(lines))
@@ -1,6 +1,6 @@
-import json
 import logging
 
+from advisory.log import log_prompt
 from chat.constants import (
     CHAT_ANSWER_GENERATOR_SYSTEM_PROMPT,
     CHAT_CLASSIFIER_SYSTEM_PROMPT,
@@ -8,6 +8,8 @@ from chat.constants import (
     CHAT_META_RESPONSE_SYSTEM_PROMPT,
     CHAT_OUT_OF_CONTEXT_RESPONSE_SYSTEM_PROMPT,
 )
+from chat.prompt_serialization import render_intake, strip_indentation
+from usecase_engine.knowledge_base import get_reference_notes
 
 logger = logging.getLogger("chat.prompts")
 
@@ -69,7 +71,7 @@ def _format_history(chat_history: list) -> str:
 
 def get_classifier_prompt(intake_data: dict, chat_history: list, user_question: str):
     system_prompt = CHAT_CLASSIFIER_SYSTEM_PROMPT
-    intake_text = json.dumps(intake_data, indent=2)
+    intake_text = render_intake(intake_data).intake
 
     user_prompt = f"""USER INTAKE DATA:
                     {intake_text}
@@ -78,7 +80,8 @@ def get_classifier_prompt(intake_data: dict, chat_history: list, user_question:
                     "{user_question}"
 
                     Classify this question now."""
-    logger.info(f"user prompt classifier: {user_prompt}")
+    user_prompt = strip_indentation(user_prompt)
+    log_prompt(logger, "classifier", user_prompt)
 
     return system_prompt, user_prompt
 
@@ -96,7 +99,8 @@ def get_meta_response_prompt(
                     QUESTION TYPE: {meta_subtype}
 
                     Generate a natural, friendly response in {preferred_language}."""
-    logger.info(f"user prompt meta: {user_prompt}")
+    user_prompt = strip_indentation(user_prompt)
+    log_prompt(logger, "meta", user_prompt)
 
     return system_prompt, user_prompt
 
@@ -114,7 +118,8 @@ def get_out_of_context_response_prompt(
                     OUT_OF_CONTEXT TYPE: {out_of_context_type}
 
                     Generate a brief acknowledgment and polite redirect in {preferred_language}."""
-    logger.info(f"user prompt out of context: {user_prompt}")
+    user_prompt = strip_indentation(user_prompt)
+    log_prompt(logger, "out of context", user_prompt)
 
     return system_prompt, user_prompt
 
@@ -125,7 +130,7 @@ def get_mcq_generator_prompt(
     system_prompt = CHAT_MCQ_GENERATOR_SYSTEM_PROMPT.replace(
         "{{LANGUAGE}}", preferred_language
     )
-    intake_text = json.dumps(intake_data, indent=2)
+    intake_text = render_intake(intake_data).intake
 
     user_prompt = f"""USER INTAKE DATA:
                     {intake_text}
@@ -139,7 +144,8 @@ def get_mcq_generator_prompt(
                     TARGET LANGUAGE: {preferred_language}
 
                     Generate an MCQ in {preferred_language} to collect this missing information."""
-    logger.info(f"user prompt mcq: {user_prompt}")
+    user_prompt = strip_indentation(user_prompt)
+    log_prompt(logger, "mcq", user_prompt)
 
     return system_prompt, user_prompt
 
@@ -161,15 +167,33 @@ def get_answer_generator_prompt(
     # Inject config instructions (tone, length, additional context, custom instructions)
     system_prompt = f"{system_prompt}\n\n{config_instructions}"
 
-    intake_text = json.dumps(intake_data, indent=2)
+    rendered = render_intake(intake_data)
+
+    metrics_text = ""
+    if rendered.metrics:
+        metrics_text = (
+            "\n\nPRECOMPUTED CALCULATIONS (deterministic; quote these numbers "
+            "instead of recalculating, and mention assumed inputs when you use "
+            f"them):\n{rendered.metrics}"
+        )
 
     mcq_text = ""
     if mcq_response:
         mcq_text = f"\n\nUSER'S MCQ RESPONSE:\n{mcq_response}"
 
+    reference_notes = get_reference_notes(user_question)
+    reference_text = ""
+    if reference_notes:
+        reference_text = (
+            "\n\nREFERENCE NOTES (use when relevant, prefer them over general "
+            f"knowledge):\n{reference_notes}"
+        )
+
     user_prompt = f"""USER INTAKE DATA:
-                    {intake_text}
+                    {rendered.intake}
                     {mcq_text}
+                    {metrics_text}
+                    {reference_text}
 
                     CURRENT USER QUESTION:
                     "{user_question}"
@@ -177,6 +201,7 @@ def get_answer_generator_prompt(
                     TARGET LANGUAGE: {preferred_language}
 
                     Provide your answer and suggested follow-up questions in {preferred_language} only."""
-    logger.info(f"user prompt answer: {user_prompt}")
+    user_prompt = strip_indentation(user_prompt)
+    log_prompt(logger, "answer", user_prompt)
 
     return system_prompt, user_prompt
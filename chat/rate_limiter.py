@@ -0,0 +1,179 @@
+import logging
+import time
+
+from chat.constants import (
+    LLM_ADMISSION_MAX_WAIT_SECONDS,
+    LLM_DEFAULT_RATE_LIMIT,
+    LLM_ESTIMATED_OUTPUT_TOKENS,
+    LLM_PROVIDER_STUB,
+    LLM_RATE_LIMIT_KEY_PREFIX,
+    LLM_RATE_LIMITS,
+    LLM_STUB_RATE_LIMIT,
+    LLM_TYPICAL_TURN_TOKENS,
+)
+
+logger = logging.getLogger("chat.rate_limiter")
+
+# Two token buckets per model (requests/min and tokens/min), refilled
+# continuously and updated atomically so every worker sees one budget.
+#
+# KEYS[1] = request bucket, KEYS[2] = token bucket
+# ARGV = rpm, tpm, request cost, token cost, mode
+# mode: "acquire" takes the cost only if both buckets can pay it,
+#       "peek" reports the wait without taking anything,
+#       "force" always takes the cost (used to reconcile actual usage).
+# Returns {allowed, wait_seconds, requests_left, tokens_left}.
+_TOKEN_BUCKET_SCRIPT = """
+local now_parts = redis.call('TIME')
+local now = tonumber(now_parts[1]) + tonumber(now_parts[2]) / 1000000
+local mode = ARGV[5]
+local caps = {tonumber(ARGV[1]), tonumber(ARGV[2])}
+local costs = {tonumber(ARGV[3]), tonumber(ARGV[4])}
+local levels = {}
+local wait = 0
+
+for i = 1, 2 do
+    local rate = caps[i] / 60
+    local data = redis.call('HMGET', KEYS[i], 'level', 'ts')
+    local level = tonumber(data[1]) or caps[i]
+    local ts = tonumber(data[2]) or now
+    level = math.min(caps[i], level + math.max(0, now - ts) * rate)
+    levels[i] = level
+    if level < costs[i] then
+        wait = math.max(wait, (costs[i] - level) / rate)
+    end
+end
+
+local allowed = 0
+if mode == 'force' or (mode == 'acquire' and wait == 0) then
+    allowed = 1
+    for i = 1, 2 do
+        levels[i] = levels[i] - costs[i]
+    end
+end
+
+if mode ~= 'peek' then
+    for i = 1, 2 do
+        redis.call('HSET', KEYS[i], 'level', tostring(levels[i]), 'ts', tostring(now))
+        redis.call('EXPIRE', KEYS[i], 120)
+    end
+end
+
+return {allowed, tostring(wait), tostring(levels[1]), tostring(levels[2])}
+"""
+
+
+class RateLimitExceeded(Exception):
+    """Raised when a Gemini call is shed before reaching the provider."""
+
+    def __init__(self, model: str, retry_after: float):
+        self.model = model
+        self.retry_after = max(1, int(retry_after + 0.999))
+        super().__init__(
+            f"Client-side rate limit for {model} reached, retry in {self.retry_after}s"
+        )
+
+
+def _get_limits(model: str) -> dict:
+    if model.startswith(f"{LLM_PROVIDER_STUB}-"):
+        return LLM_STUB_RATE_LIMIT
+    return LLM_RATE_LIMITS.get(model, LLM_DEFAULT_RATE_LIMIT)
+
+
+def _run_bucket(model: str, request_cost: int, token_cost: int, mode: str):
+    from django_redis import get_redis_connection
+
+    limits = _get_limits(model)
+    connection = get_redis_connection("default")
+    allowed, wait, requests_left, tokens_left = connection.eval(
+        _TOKEN_BUCKET_SCRIPT,
+        2,
+        f"{LLM_RATE_LIMIT_KEY_PREFIX}:{model}:rpm",
+        f"{LLM_RATE_LIMIT_KEY_PREFIX}:{model}:tpm",
+        limits["rpm"],
+        limits["tpm"],
+        request_cost,
+        token_cost,
+        mode,
+    )
+    return bool(allowed), float(wait), float(requests_left), float(tokens_left)
+
+
+def estimate_tokens(*texts: str) -> int:
+    """Rough input estimate (~4 chars per token) plus reserved output."""
+    chars = sum(len(text or "") for text in texts)
+    return chars // 4 + LLM_ESTIMATED_OUTPUT_TOKENS
+
+
+def acquire(model: str, estimated_tokens: int, purpose: str = "unknown"):
+    """
+    Admit one provider call for `model`.
+
+    Waits for the buckets to refill when that takes at most
+    LLM_ADMISSION_MAX_WAIT_SECONDS, otherwise sheds the call with
+    RateLimitExceeded. Fails open when Redis is unreachable.
+    """
+    deadline = time.monotonic() + LLM_ADMISSION_MAX_WAIT_SECONDS
+
+    while True:
+        try:
+            allowed, wait, _, _ = _run_bucket(model, 1, estimated_tokens, "acquire")
+        except Exception as e:
+            logger.warning(f"[{purpose}] Rate limiter unavailable, admitting: {e}")
+            return
+
+        if allowed:
+            return
+
+        remaining = deadline - time.monotonic()
+        if wait > remaining:
+            logger.warning(
+                f"[{purpose}] Shedding {model} call, budget refills in {wait:.1f}s"
+            )
+            raise RateLimitExceeded(model, wait)
+
+        time.sleep(wait)
+
+
+def reconcile(model: str, estimated_tokens: int, actual_tokens: int):
+    """Charge (or refund) the difference between reserved and actual tokens."""
+    delta = actual_tokens - estimated_tokens
+    if not actual_tokens or not delta:
+        return
+    try:
+        _run_bucket(model, 0, delta, "force")
+    except Exception as e:
+        logger.warning(f"Rate limiter reconcile failed for {model}: {e}")
+
+
+def get_budget(model: str, turn_tokens: int = LLM_TYPICAL_TURN_TOKENS) -> dict:
+    """
+    Current budget for `model` and how long until a typical question fits.
+
+    Used by the views to answer "busy, retry in N s" without queueing a task
+    that would be shed anyway.
+    """
+    limits = _get_limits(model)
+    try:
+        _, wait, requests_left, tokens_left = _run_bucket(
+            model, 1, turn_tokens, "peek"
+        )
+    except Exception as e:
+        logger.warning(f"Rate limiter unavailable for {model}: {e}")
+        return {
+            "model": model,
+            "rpm": limits["rpm"],
+            "tpm": limits["tpm"],
+            "requests_available": limits["rpm"],
+            "tokens_available": limits["tpm"],
+            "retry_after": 0,
+        }
+
+    return {
+        "model": model,
+        "rpm": limits["rpm"],
+        "tpm": limits["tpm"],
+        "requests_available": max(0, int(requests_left)),
+        "tokens_available": max(0, int(tokens_left)),
+        "retry_after": int(wait + 0.999),
+    }
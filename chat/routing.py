@@ -0,0 +1,233 @@
+import logging
+import time
+
+from django.conf import settings
+from django.utils import timezone
+
+from advisory import metrics
+from chat.constants import (
+    LLM_DEFAULT_ROUTES,
+    LLM_MODEL_NAME,
+    LLM_MODEL_PRICING,
+    LLM_PROVIDER_API_KEYS,
+    LLM_PROVIDER_GEMINI,
+    LLM_PROVIDER_STUB,
+    LLM_ROUTE_LATENCY_SAMPLES_KEY_PREFIX,
+    LLM_ROUTE_LATENCY_SAMPLES_MAX,
+    LLM_ROUTE_METRICS_KEY_PREFIX,
+    LLM_ROUTE_METRICS_TTL_DAYS,
+    LLM_ROUTES_CACHE_SECONDS,
+)
+from chat.llm_providers import get_api_key
+
+logger = logging.getLogger("chat.routing")
+
+_routes_cache = {"routes": None, "expires_at": 0}
+
+
+def parse_target(target: str):
+    """Split a "provider:model" route entry into (provider, model)."""
+    provider, _, model = target.partition(":")
+    if not model:
+        return LLM_PROVIDER_GEMINI, provider
+    return provider, model
+
+
+def validate_routes(routes) -> list:
+    """Return a list of problems with a routes override (empty when valid)."""
+    from chat.constants import LLM_PURPOSES
+
+    if not isinstance(routes, dict):
+        return ["Routes must be an object of purpose -> list of targets."]
+
+    errors = []
+    for purpose, targets in routes.items():
+        if purpose not in LLM_PURPOSES:
+            errors.append(f"Unknown purpose: {purpose}")
+            continue
+        if not isinstance(targets, list) or not targets:
+            errors.append(f"{purpose}: targets must be a non-empty list.")
+            continue
+        for target in targets:
+            if not isinstance(target, str):
+                errors.append(f"{purpose}: targets must be strings.")
+                continue
+            provider, model = parse_target(target)
+            if provider not in LLM_PROVIDER_API_KEYS or not model:
+                errors.append(f"{purpose}: invalid target '{target}'.")
+    return errors
+
+
+def _get_configured_routes() -> dict:
+    now = time.monotonic()
+    if _routes_cache["routes"] is not None and _routes_cache["expires_at"] > now:
+        return _routes_cache["routes"]
+
+    routes = dict(LLM_DEFAULT_ROUTES)
+    try:
+        from accounts.models import SystemConfiguration
+
+        system_config = SystemConfiguration.get_config()
+        overrides = system_config.llm_model_routes if system_config else None
+        if overrides and not validate_routes(overrides):
+            routes.update(overrides)
+    except Exception as e:
+        logger.warning(f"Failed to load LLM routes from configuration: {e}")
+
+    _routes_cache["routes"] = routes
+    _routes_cache["expires_at"] = now + LLM_ROUTES_CACHE_SECONDS
+    return routes
+
+
+def get_route(purpose: str) -> list:
+    """
+    Ordered (provider, model) targets for `purpose`.
+
+    Targets whose provider has no API key configured are skipped, so an
+    unconfigured fallback never costs a failed call. With LLM_STUB_ENABLED
+    every purpose goes to the offline stub provider.
+    """
+    if getattr(settings, "LLM_STUB_ENABLED", False):
+        return [(LLM_PROVIDER_STUB, f"stub-{purpose.lower()}")]
+
+    targets = _get_configured_routes().get(purpose) or [
+        f"{LLM_PROVIDER_GEMINI}:{LLM_MODEL_NAME}"
+    ]
+
+    route = []
+    for target in targets:
+        provider, model = parse_target(target)
+        if get_api_key(provider):
+            route.append((provider, model))
+
+    return route or [parse_target(targets[0])]
+
+
+def estimate_cost(model: str, input_tokens: int, output_tokens: int) -> float:
+    pricing = LLM_MODEL_PRICING.get(model)
+    if not pricing:
+        return 0.0
+    return (
+        input_tokens * pricing["input"] + output_tokens * pricing["output"]
+    ) / 1_000_000
+
+
+def record_call(
+    purpose: str,
+    provider: str,
+    model: str,
+    latency: float,
+    success: bool,
+    response=None,
+    fallback: bool = False,
+):
+    """Accumulate per-route call counts, latency, tokens and cost for today."""
+    from django_redis import get_redis_connection
+
+    key = f"{LLM_ROUTE_METRICS_KEY_PREFIX}:{timezone.now().date().isoformat()}"
+    route = f"{purpose}|{provider}:{model}"
+
+    labels = {"purpose": purpose, "provider": provider, "model": model}
+    metrics.llm_calls.inc(outcome="success" if success else "error", **labels)
+    metrics.llm_call_duration.observe(latency, **labels)
+    if response is not None:
+        for kind, tokens in (
+            ("prompt", response.prompt_tokens),
+            ("output", response.output_tokens),
+            ("thinking", response.thinking_tokens),
+        ):
+            if tokens:
+                metrics.llm_tokens.inc(tokens, purpose=purpose, model=model, kind=kind)
+
+    try:
+        pipe = get_redis_connection("default").pipeline()
+        pipe.hincrby(key, f"{route}|calls", 1)
+        pipe.hincrbyfloat(key, f"{route}|latency_ms", latency * 1000)
+        samples_key = f"{LLM_ROUTE_LATENCY_SAMPLES_KEY_PREFIX}:{purpose}"
+        pipe.lpush(samples_key, round(latency * 1000, 1))
+        pipe.ltrim(samples_key, 0, LLM_ROUTE_LATENCY_SAMPLES_MAX - 1)
+        if not success:
+            pipe.hincrby(key, f"{route}|errors", 1)
+        if fallback:
+            pipe.hincrby(key, f"{route}|fallbacks", 1)
+        if response is not None:
+            output_tokens = response.output_tokens + response.thinking_tokens
+            pipe.hincrby(key, f"{route}|input_tokens", response.prompt_tokens)
+            pipe.hincrby(key, f"{route}|output_tokens", output_tokens)
+            pipe.hincrbyfloat(
+                key,
+                f"{route}|cost_usd",
+                estimate_cost(model, response.prompt_tokens, output_tokens),
+            )
+        pipe.expire(key, LLM_ROUTE_METRICS_TTL_DAYS * 24 * 3600)
+        pipe.execute()
+    except Exception as e:
+        logger.warning(f"[{purpose}] Failed to record route metrics: {e}")
+
+
+def record_parse_outcome(purpose: str, provider: str, model: str, outcome: str):
+    """Count structured-output repairs and parse-failure retries per route."""
+    from django_redis import get_redis_connection
+
+    metrics.llm_structured_output.inc(purpose=purpose, model=model, outcome=outcome)
+
+    key = f"{LLM_ROUTE_METRICS_KEY_PREFIX}:{timezone.now().date().isoformat()}"
+    try:
+        get_redis_connection("default").hincrby(
+            key, f"{purpose}|{provider}:{model}|{outcome}", 1
+        )
+    except Exception as e:
+        logger.warning(f"[{purpose}] Failed to record parse outcome: {e}")
+
+
+def get_latency_samples(purpose: str, count: int = None) -> list:
+    """Most recent call latencies (ms) for `purpose`, newest first."""
+    from django_redis import get_redis_connection
+
+    stop = -1 if count is None else count - 1
+    raw = get_redis_connection("default").lrange(
+        f"{LLM_ROUTE_LATENCY_SAMPLES_KEY_PREFIX}:{purpose}", 0, stop
+    )
+    return [float(value) for value in raw]
+
+
+def get_route_metrics(date=None) -> list:
+    """Per-route metrics for `date` (default today), one dict per route."""
+    from django_redis import get_redis_connection
+
+    date = date or timezone.now().date()
+    key = f"{LLM_ROUTE_METRICS_KEY_PREFIX}:{date.isoformat()}"
+
+    raw = get_redis_connection("default").hgetall(key)
+
+    routes = {}
+    for field, value in raw.items():
+        purpose, target, metric = field.decode().split("|")
+        route = routes.setdefault(
+            (purpose, target),
+            {
+                "purpose": purpose,
+                "target": target,
+                "calls": 0,
+                "errors": 0,
+                "fallbacks": 0,
+                "parse_retries": 0,
+                "repaired": 0,
+                "latency_ms": 0.0,
+                "input_tokens": 0,
+                "output_tokens": 0,
+                "cost_usd": 0.0,
+            },
+        )
+        route[metric] = float(value) if "." in value.decode() else int(value)
+
+    metrics = []
+    for route in routes.values():
+        calls = route["calls"] or 1
+        route["avg_latency_ms"] = round(route.pop("latency_ms") / calls, 1)
+        route["cost_usd"] = round(route["cost_usd"], 6)
+        route["error_rate"] = round(route["errors"] / calls, 4)
+        route["parse_retry_rate"] = round(route["parse_retries"] / calls, 4)
+        metrics.append(route)
+
+    return sorted(metrics, key=lambda route: (route["purpose"], route["target"]))
@@ -0,0 +1,167 @@
+import json
+import re
+from typing import List, Literal, Optional
+
+from pydantic import BaseModel, ValidationError, field_validator
+
+
+class StructuredOutputError(ValueError):
+    """LLM output that could not be parsed or repaired into its schema."""
+
+
+class ClassifierResponse(BaseModel):
+    classification: Literal[
+        "META", "ANSWER_DIRECTLY", "NEEDS_FOLLOW_UP", "OUT_OF_CONTEXT"
+    ] = "ANSWER_DIRECTLY"
+    meta_subtype: Optional[str] = None
+    out_of_context_type: Optional[str] = None
+    missing_field: Optional[str] = None
+    language: Optional[str] = None
+    reasoning: Optional[str] = None
+
+    @field_validator("classification", mode="before")
+    @classmethod
+    def normalize_classification(cls, value):
+        # Unknown labels were always treated as a direct answer
+        value = str(value or "").strip().upper()
+        if value not in ("META", "NEEDS_FOLLOW_UP", "OUT_OF_CONTEXT"):
+            return "ANSWER_DIRECTLY"
+        return value
+
+
+class MCQResponse(BaseModel):
+    question: str
+    options: List[str]
+
+    @field_validator("options")
+    @classmethod
+    def check_options(cls, value):
+        options = [option.strip() for option in value if option and option.strip()]
+        if len(options) < 2:
+            raise ValueError("MCQ needs at least 2 options")
+        return options[:4]
+
+
+class AnswerResponse(BaseModel):
+    answer: str
+    suggested_questions: List[str] = []
+
+    @field_validator("suggested_questions")
+    @classmethod
+    def keep_three(cls, value):
+        return [question for question in value if question][:3]
+
+
+class ShortAnswerResponse(BaseModel):
+    answer: str
+
+
+class OnboardingResponse(BaseModel):
+    welcome_message: str
+    suggested_questions: List[str] = []
+
+    @field_validator("suggested_questions")
+    @classmethod
+    def keep_three(cls, value):
+        return [question for question in value if question][:3]
+
+
+PURPOSE_SCHEMAS = {
+    "CLASSIFIER": ClassifierResponse,
+    "MCQ_GENERATOR": MCQResponse,
+    "ANSWER_GENERATOR": AnswerResponse,
+    "META_RESPONSE": ShortAnswerResponse,
+    "OUT_OF_CONTEXT_RESPONSE": ShortAnswerResponse,
+    "ONBOARDING": OnboardingResponse,
+}
+
+# JSON schemas handed to the provider, built once per process
+_JSON_SCHEMAS = {
+    purpose: schema.model_json_schema() for purpose, schema in PURPOSE_SCHEMAS.items()
+}
+
+_CODE_FENCE = re.compile(r"^\s*```(?:json)?\s*|\s*```\s*$", re.IGNORECASE)
+_TRAILING_COMMA = re.compile(r",\s*([}\]])")
+# An object key, possibly with its colon, that the response ended after
+_DANGLING_KEY = re.compile(r'(?<=[{,])\s*"(?:[^"\\]|\\.)*"\s*:?\s*$')
+
+
+def get_json_schema(purpose: str):
+    """JSON schema for `purpose`, or None when the purpose is unconstrained."""
+    return _JSON_SCHEMAS.get(purpose)
+
+
+def repair_json(text: str) -> str:
+    """
+    Fix the small defects models produce without another round trip:
+    code fences, prose around the object, trailing commas and a truncated
+    tail with unclosed strings/brackets or a cut-off key.
+    """
+    text = _CODE_FENCE.sub("", text or "").strip()
+
+    start = text.find("{")
+    if start > 0:
+        text = text[start:]
+    end = text.rfind("}")
+    if end != -1:
+        candidate = text[: end + 1]
+        try:
+            json.loads(candidate)
+            return candidate
+        except ValueError:
+            pass
+
+    text = _TRAILING_COMMA.sub(r"\1", text)
+
+    # Close whatever a truncated response left open
+    closers = []
+    in_string = False
+    escaped = False
+    for char in text:
+        if escaped:
+            escaped = False
+        elif char == "\\":
+            escaped = True
+        elif char == '"':
+            in_string = not in_string
+        elif not in_string and char in "{[":
+            closers.append("}" if char == "{" else "]")
+        elif not in_string and char in "}]" and closers:
+            closers.pop()
+
+    if in_string:
+        text += '"'
+    if closers and closers[-1] == "}":
+        text = _DANGLING_KEY.sub("", text)
+    text = _TRAILING_COMMA.sub(r"\1", text + "".join(reversed(closers)))
+    return text
+
+
+def parse_response(purpose: str, text: str):
+    """
+    Parse and validate an LLM response for `purpose`.
+
+    Returns (data, repaired) where `repaired` tells whether local repair was
+    needed. Raises StructuredOutputError when the output is unusable.
+    """
+    schema = PURPOSE_SCHEMAS.get(purpose)
+    repaired = False
+
+    try:
+        data = json.loads(text)
+    except (TypeError, ValueError):
+        try:
+            data = json.loads(repair_json(text))
+            repaired = True
+        except ValueError as e:
+            raise StructuredOutputError(f"Unparseable JSON: {e}") from e
+
+    if schema is None:
+        return data, repaired
+
+    try:
+        return schema.model_validate(data).model_dump(), repaired
+    except ValidationError as e:
+        raise StructuredOutputError(
+            f"Response does not match {schema.__name__}: {e.errors()[:3]}"
+        ) from e
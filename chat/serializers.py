@@ -3,7 +3,7 @@ from django.contrib.auth import get_user_model
 User = get_user_model()
 from rest_framework import serializers
 
-from chat.constants import SESSION_ACTIVE
+from chat.constants import SESSION_COMPLETED
 from chat.models import ChatMessage, ChatSession, DailyQuestionQuota
 
 
@@ -44,7 +44,10 @@ class ChatSessionSerializer(serializers.ModelSerializer):
 
     def get_can_ask_question(self, obj):
         """Can user ask more questions today?"""
-        return self._get_quota(obj).can_ask_question() and obj.is_active()
+        return (
+            self._get_quota(obj).can_ask_question()
+            and obj.status != SESSION_COMPLETED
+        )
 
 
 class ChatMessageSerializer(serializers.ModelSerializer):
@@ -78,9 +81,12 @@ class UserQuestionInputSerializer(serializers.Serializer):
         super().__init__(*args, **kwargs)
         request = self.context.get("request")
         if request and request.user:
-            self.fields["session_id"].queryset = ChatSession.objects.select_related(
-                "user", "intake_data"
-            ).filter(user=request.user, status=SESSION_ACTIVE)
+            # Abandoned sessions are reopened by the turn (chat.archive.reopen)
+            self.fields["session_id"].queryset = (
+                ChatSession.objects.select_related("user", "intake_data")
+                .filter(user=request.user)
+                .exclude(status=SESSION_COMPLETED)
+            )
 
     def validate_question(self, value):
         """Validate question is not empty"""
@@ -112,7 +118,7 @@ class UserMCQResponseSerializer(serializers.Serializer):
         if mcq_message.session.user != request.user:
             raise serializers.ValidationError("Unauthorized access to this session")
 
-        if mcq_message.session.status != SESSION_ACTIVE:
+        if mcq_message.session.status == SESSION_COMPLETED:
             raise serializers.ValidationError(
                 "This session is no longer active. Please start a new chat to continue."
             )
@@ -158,6 +164,8 @@ class SessionListSerializer(serializers.ModelSerializer):
             "title",
             "started_at",
             "status",
+            "message_count",
+            "last_message_at",
         ]
 
     def get_title(self, obj):
@@ -1,14 +1,11 @@
-import json
 import logging
-import time
 
-from decouple import config
 from django.db import transaction
-from google import genai
-from google.genai import types
 
+from advisory import metrics
+from advisory.log import redact
+from chat import llm_calls, tracing
 from chat.constants import (
-    LLM_MODEL_NAME,
     MESSAGE_TYPE_BOT_ANSWER,
     MESSAGE_TYPE_BOT_MCQ,
     MESSAGE_TYPE_BOT_REJECTION,
@@ -18,6 +15,7 @@ from chat.constants import (
     SENDER_USER,
 )
 from chat.models import ChatMessage, ChatSession, DailyQuestionQuota
+from chat.prompt_serialization import get_session_intake
 from chat.prompts import (
     get_answer_generator_prompt,
     get_classifier_prompt,
@@ -36,6 +34,8 @@ class ChatService:
         from accounts.constants import LANGUAGE_MAP
 
         self.session = session
+        # Messages of the current turn, saved once its LLM calls are done
+        self._pending = []
         self.user_language_code = session.user.preferred_language
         self.user_language_full = LANGUAGE_MAP.get(self.user_language_code, "English")
 
@@ -46,111 +46,48 @@ class ChatService:
         temperature: float = 0.3,
         purpose: str = "unknown",
     ) -> dict:
-        api_key = config("GEMINI_API_KEY", default=None)
-
-        if not api_key:
-            raise Exception("GEMINI_API_KEY not configured in environment")
-
-        max_retries = 3
-        last_error = None
-
-        for attempt in range(1, max_retries + 1):
-            try:
-                client = genai.Client(api_key=api_key)
-
-                response = client.models.generate_content(
-                    model=LLM_MODEL_NAME,
-                    config=types.GenerateContentConfig(
-                        system_instruction=system_prompt,
-                        temperature=temperature,
-                        response_mime_type="application/json",
-                    ),
-                    contents=user_prompt,
-                )
+        with tracing.span(f"llm.{purpose}"):
+            return llm_calls.call_route(
+                purpose,
+                system_prompt,
+                user_prompt,
+                temperature,
+                user_id=self.session.user_id,
+                session_id=self.session.id,
+            )
 
-                if hasattr(response, "usage_metadata") and response.usage_metadata:
-                    usage = response.usage_metadata
-                    prompt_tokens = getattr(usage, "prompt_token_count", 0) or 0
-                    candidates_tokens = getattr(usage, "candidates_token_count", 0) or 0
-                    thoughts_tokens = getattr(usage, "thoughts_token_count", 0) or 0
-                    total_tokens = getattr(usage, "total_token_count", 0) or 0
-
-                    logger.info(
-                        f"[{purpose}] Token Usage:\n"
-                        f"   ├─ Prompt (input):    {prompt_tokens:,} tokens\n"
-                        f"   ├─ Response (output): {candidates_tokens:,} tokens\n"
-                        f"   ├─ Thinking:          {thoughts_tokens:,} tokens\n"
-                        f"   └─ Total:             {total_tokens:,} tokens"
-                    )
-
-                result = json.loads(response.text)
-                return result
-
-            except json.JSONDecodeError as e:
-                last_error = e
-                logger.error(
-                    f"[{purpose}] JSON Parse Error (attempt {attempt}/{max_retries}):\n"
-                    f"   ├─ Error: {str(e)}\n"
-                    f"   └─ Raw Response: {response.text[:500] if hasattr(response, 'text') else 'N/A'}..."
+    def _save_turn(self, message, context=()):
+        """
+        Write the turn's messages, `message` last, and its LLM context
+        entries. This runs after the turn's LLM calls, so the session row
+        lock taken by ChatMessage.save() lasts milliseconds, and a failed or
+        retried turn leaves nothing behind.
+        """
+        pending, self._pending = self._pending + [message], []
+        with transaction.atomic():
+            for chat_message in pending:
+                span = (
+                    "persist.user_message"
+                    if chat_message.sender == SENDER_USER
+                    else "persist.bot_message"
                 )
-                if attempt < max_retries:
-                    time.sleep(1 * attempt)
-                    continue
-
-            except Exception as e:
-                last_error = e
-                error_str = str(e).lower()
-
-                # Check if it's a quota/rate limit error - DON'T retry these
-                if (
-                    "429" in error_str
-                    or "quota" in error_str
-                    or "resource_exhausted" in error_str
-                ):
-                    logger.error(
-                        f"[{purpose}] Quota Exceeded - NOT retrying:\n"
-                        f"   ├─ Type: {type(e).__name__}\n"
-                        f"   └─ Message: {str(e)[:200]}..."
-                    )
-                    raise e  # Fail immediately, no retry
-
-                logger.error(
-                    f"[{purpose}] API Error (attempt {attempt}/{max_retries}):\n"
-                    f"   ├─ Type: {type(e).__name__}\n"
-                    f"   └─ Message: {str(e)}"
-                )
-
-                # Retry on timeout or 500 errors
-                if any(x in error_str for x in ["timeout", "500"]):
-                    if attempt < max_retries:
-                        time.sleep(2**attempt)
-                        continue
+                with tracing.span(span):
+                    chat_message.save()
+            if context:
+                with tracing.span("persist.llm_context"):
+                    for sender, text in context:
+                        self.session.append_to_llm_context(sender, text)
 
-                # For other errors, don't retry
-                break
-
-        logger.error(
-            f"[{purpose}] All retries exhausted. Final error: {type(last_error).__name__}: {str(last_error)}"
-        )
-        raise last_error
-
-    @transaction.atomic
     def process_user_question(self, question_text: str, intake_data: dict) -> dict:
-        logger.info(
-            f"📝 User prompt: {question_text[:100]}{'...' if len(question_text) > 100 else ''}"
-        )
-
-        ChatMessage.objects.create(
-            session=self.session,
-            sender=SENDER_USER,
-            message_text=question_text,
-            message_type=MESSAGE_TYPE_USER_QUESTION,
-        )
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("📝 User question: %s", redact(question_text, 100))
 
         # Note: Daily quota is already checked and incremented in views/tasks
         # No need to increment here
 
         llm_context = self.session.get_llm_context()
+        # Rendered once per session and shared by every prompt of this turn
+        intake_data = get_session_intake(self.session, intake_data)
 
         system_prompt, user_prompt = get_classifier_prompt(
             intake_data, llm_context, question_text
@@ -165,20 +102,33 @@ class ChatService:
 
         classification_result = classification.get("classification", "ANSWER_DIRECTLY")
 
-        logger.info(f"🔍 Classifier result: {classification_result}")
+        logger.debug("🔍 Classifier result: %s", classification_result)
+        metrics.chat_classifications.inc(classification=classification_result)
+
+        # Saved with the reply by _save_turn
+        self._pending = [
+            ChatMessage(
+                session=self.session,
+                sender=SENDER_USER,
+                message_text=question_text,
+                message_type=MESSAGE_TYPE_USER_QUESTION,
+                classification=classification_result,
+            )
+        ]
 
         if classification_result == "META":
             result = self._handle_meta_question(
-                question_text, classification.get("meta_subtype", "identity")
+                question_text, classification.get("meta_subtype") or "identity"
             )
 
         elif classification_result == "OUT_OF_CONTEXT":
             result = self._handle_out_of_context(
-                question_text, classification.get("out_of_context_type", "unrelated")
+                question_text,
+                classification.get("out_of_context_type") or "unrelated",
             )
 
         elif classification_result == "NEEDS_FOLLOW_UP":
-            missing_field = classification.get("missing_field", "unknown")
+            missing_field = classification.get("missing_field") or "unknown"
             result = self._handle_needs_followup(
                 question_text, missing_field, intake_data, llm_context
             )
@@ -200,12 +150,14 @@ class ChatService:
             purpose="META_RESPONSE",
         )
 
-        ChatMessage.objects.create(
-            session=self.session,
-            sender=SENDER_BOT,
-            message_text=meta_response["answer"],
-            message_type=MESSAGE_TYPE_BOT_ANSWER,
-            suggested_questions=None,
+        self._save_turn(
+            ChatMessage(
+                session=self.session,
+                sender=SENDER_BOT,
+                message_text=meta_response["answer"],
+                message_type=MESSAGE_TYPE_BOT_ANSWER,
+                suggested_questions=None,
+            )
         )
 
         # Get daily quota for remaining questions
@@ -232,12 +184,14 @@ class ChatService:
             purpose="OUT_OF_CONTEXT_RESPONSE",
         )
 
-        ChatMessage.objects.create(
-            session=self.session,
-            sender=SENDER_BOT,
-            message_text=redirect_response["answer"],
-            message_type=MESSAGE_TYPE_BOT_REJECTION,
-            suggested_questions=None,
+        self._save_turn(
+            ChatMessage(
+                session=self.session,
+                sender=SENDER_BOT,
+                message_text=redirect_response["answer"],
+                message_type=MESSAGE_TYPE_BOT_REJECTION,
+                suggested_questions=None,
+            )
         )
 
         # Get daily quota for remaining questions
@@ -268,15 +222,14 @@ class ChatService:
             purpose="MCQ_GENERATOR",
         )
 
-        mcq_message = ChatMessage.objects.create(
+        mcq_message = ChatMessage(
             session=self.session,
             sender=SENDER_BOT,
             message_text=f"To answer your question, I need: {mcq_data['question']}",
             message_type=MESSAGE_TYPE_BOT_MCQ,
             mcq_options=mcq_data,
         )
-
-        self.session.append_to_llm_context(SENDER_USER, original_question)
+        self._save_turn(mcq_message, context=[(SENDER_USER, original_question)])
 
         # Get daily quota for remaining questions
         daily_quota = DailyQuestionQuota.get_or_create_today(self.session.user)
@@ -311,17 +264,21 @@ class ChatService:
             purpose="ANSWER_GENERATOR",
         )
 
-        ChatMessage.objects.create(
-            session=self.session,
-            sender=SENDER_BOT,
-            message_text=answer_data["answer"],
-            message_type=MESSAGE_TYPE_BOT_ANSWER,
-            suggested_questions={"questions": answer_data["suggested_questions"]},
-        )
-
+        context = [(SENDER_BOT, answer_data["answer"])]
         if not mcq_response:
-            self.session.append_to_llm_context(SENDER_USER, question_text)
-        self.session.append_to_llm_context(SENDER_BOT, answer_data["answer"])
+            context.insert(0, (SENDER_USER, question_text))
+        self._save_turn(
+            ChatMessage(
+                session=self.session,
+                sender=SENDER_BOT,
+                message_text=answer_data["answer"],
+                message_type=MESSAGE_TYPE_BOT_ANSWER,
+                suggested_questions={
+                    "questions": answer_data["suggested_questions"]
+                },
+            ),
+            context=context,
+        )
 
         # Get daily quota for remaining questions
         daily_quota = DailyQuestionQuota.get_or_create_today(self.session.user)
@@ -333,21 +290,22 @@ class ChatService:
             "remaining_daily_questions": daily_quota.remaining_questions(),
         }
 
-    @transaction.atomic
     def process_mcq_response(
         self, mcq_message_id: str, selected_value: str, intake_data: dict
     ) -> dict:
-        logger.info(f"📝 User MCQ selection: {selected_value}")
+        logger.debug("📝 User MCQ selection: %s", selected_value)
 
         mcq_message = ChatMessage.objects.get(id=mcq_message_id)
 
-        ChatMessage.objects.create(
-            session=self.session,
-            sender=SENDER_USER,
-            message_text=selected_value,
-            message_type=MESSAGE_TYPE_USER_MCQ,
-            parent_message=mcq_message,
-        )
+        self._pending = [
+            ChatMessage(
+                session=self.session,
+                sender=SENDER_USER,
+                message_text=selected_value,
+                message_type=MESSAGE_TYPE_USER_MCQ,
+                parent_message=mcq_message,
+            )
+        ]
 
         original_question_msg = ChatMessage.objects.filter(
             session=self.session,
@@ -366,7 +324,7 @@ class ChatService:
 
         result = self._handle_direct_answer(
             original_question,
-            intake_data,
+            get_session_intake(self.session, intake_data),
             llm_context,
             mcq_response=f"User selected: {selected_value}",
         )
@@ -0,0 +1,147 @@
+"""
+Daily rollups behind the admin stats endpoints.
+
+Each ChatStatsDaily row is recomputed from the source tables with queries
+bounded to its day, on indexed columns, and carries running totals through
+that day. The headline stats are then one row however long the history is,
+and the time series is one row per day.
+"""
+
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+
+from django.db import transaction
+from django.db.models import Count, Min, Q, Sum
+from django.utils import timezone
+
+from chat.constants import (
+    CHAT_STATS_REFRESH_DAYS,
+    CLASSIFICATION_ANSWER_DIRECTLY,
+    CLASSIFICATION_META,
+    CLASSIFICATION_NEEDS_FOLLOW_UP,
+    CLASSIFICATION_OUT_OF_CONTEXT,
+    MESSAGE_TYPE_USER_QUESTION,
+)
+
+# Per-day counter -> the running total it feeds
+RUNNING_TOTALS = {
+    "new_users": "total_users",
+    "sessions": "total_sessions",
+    "messages": "total_messages",
+    "questions": "total_questions",
+    "user_days": "total_user_days",
+}
+
+CLASSIFICATION_FIELDS = {
+    CLASSIFICATION_META: "classified_meta",
+    CLASSIFICATION_ANSWER_DIRECTLY: "classified_answer_directly",
+    CLASSIFICATION_NEEDS_FOLLOW_UP: "classified_needs_follow_up",
+    CLASSIFICATION_OUT_OF_CONTEXT: "classified_out_of_context",
+}
+
+
+def _day_bounds(day):
+    # Quota dates are UTC dates (timezone.now().date()), so days are too
+    start = datetime.combine(day, time.min, tzinfo=dt_timezone.utc)
+    return start, start + timedelta(days=1)
+
+
+def compute_day(day) -> dict:
+    """The per-day counters for `day`, from the source tables."""
+    from accounts.models import User
+    from chat.models import ChatMessage, ChatSession, DailyQuestionQuota
+
+    start, end = _day_bounds(day)
+
+    counts = DailyQuestionQuota.objects.filter(date=day).aggregate(
+        questions=Sum("question_count"),
+        user_days=Count("id"),
+        active_users=Count("id", filter=Q(question_count__gt=0)),
+    )
+    counts["questions"] = counts["questions"] or 0
+
+    classified = Q(message_type=MESSAGE_TYPE_USER_QUESTION)
+    counts.update(
+        ChatMessage.objects.filter(
+            created_at__gte=start, created_at__lt=end
+        ).aggregate(
+            messages=Count("id"),
+            **{
+                field: Count("id", filter=classified & Q(classification=value))
+                for value, field in CLASSIFICATION_FIELDS.items()
+            },
+        )
+    )
+
+    counts["new_users"] = User.objects.filter(
+        date_joined__gte=start, date_joined__lt=end
+    ).count()
+    counts["sessions"] = ChatSession.objects.filter(
+        started_at__gte=start, started_at__lt=end
+    ).count()
+    return counts
+
+
+def _first_day():
+    from accounts.models import User
+
+    first_joined = User.objects.aggregate(first=Min("date_joined"))["first"]
+    return first_joined.date() if first_joined else None
+
+
+@transaction.atomic
+def refresh(start=None, end=None) -> int:
+    """
+    Recompute the rows from `start` through `end` (default today) and
+    return how many were written.
+
+    By default the last CHAT_STATS_REFRESH_DAYS days are recomputed, reaching
+    back to any day missed since the latest row; with no rows yet, the whole
+    history is backfilled. Running totals continue from the row before
+    `start`.
+    """
+    from chat.models import ChatStatsDaily
+
+    end = end or timezone.now().date()
+    previous = None
+    if start is None:
+        start = end - timedelta(days=CHAT_STATS_REFRESH_DAYS - 1)
+        previous = ChatStatsDaily.objects.filter(date__lt=start).first()
+        if previous is not None:
+            start = min(start, previous.date + timedelta(days=1))
+        elif not ChatStatsDaily.objects.exists():
+            start = min(start, _first_day() or start)
+    else:
+        previous = ChatStatsDaily.objects.filter(date__lt=start).first()
+
+    totals = {
+        total: getattr(previous, total) if previous else 0
+        for total in RUNNING_TOTALS.values()
+    }
+
+    written = 0
+    day = start
+    while day <= end:
+        counts = compute_day(day)
+        for counter, total in RUNNING_TOTALS.items():
+            totals[total] += counts[counter]
+        ChatStatsDaily.objects.update_or_create(
+            date=day, defaults={**counts, **totals}
+        )
+        written += 1
+        day += timedelta(days=1)
+
+    return written
+
+
+def rebuild() -> int:
+    """
+    Recompute every day from the first sign-up, e.g. after deletions.
+    Messages of archived sessions (chat.archive) are no longer counted.
+    """
+    from chat.models import ChatStatsDaily
+
+    first_day = _first_day()
+    if first_day is None:
+        return 0
+    ChatStatsDaily.objects.filter(date__lt=first_day).delete()
+    return refresh(start=first_day)
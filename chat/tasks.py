@@ -2,26 +2,41 @@ import logging
 
 from celery import shared_task
 
+from advisory import metrics
+from chat import archive, intake_snapshot, tracing
 from chat.constants import MESSAGE_TYPE_USER_QUESTION, SENDER_USER, SESSION_ACTIVE
+from chat.circuit_breaker import CircuitOpenError
+from chat.rate_limiter import RateLimitExceeded
 
 logger = logging.getLogger("chat.tasks")
 
 
 @shared_task(bind=True, max_retries=2, default_retry_delay=5)
+@tracing.traced_task
 def process_question_task(
     self,
     session_id: str,
     question: str,
-    intake_data: dict,
     user_id: int,
+    intake_version: str = None,
+    intake_data: dict = None,
+    correlation_id: str = None,
+    enqueued_at: float = None,
 ) -> dict:
+    # intake_data is only sent by messages queued before intake snapshots
     from chat.models import ChatMessage, ChatSession, DailyQuestionQuota
     from chat.services import ChatService
 
     try:
-        logger.info(f"[TASK] Processing question for session {session_id}")
+        logger.info(
+            f"[TASK] Processing question for session {session_id} "
+            f"[{correlation_id}]"
+        )
 
-        session = ChatSession.objects.select_related("user").get(id=session_id)
+        with tracing.span("session_load"):
+            session = ChatSession.objects.select_related("user", "intake_data").get(
+                id=session_id
+            )
 
         if session.user_id != user_id:
             return {
@@ -29,6 +44,10 @@ def process_question_task(
                 "error": "Unauthorized access to session",
             }
 
+        # An idle (abandoned, maybe archived) session picks up where it left
+        with tracing.span("session_reopen"):
+            archive.reopen(session)
+
         # Check if session is active
         if not session.is_active():
             return {
@@ -37,10 +56,12 @@ def process_question_task(
             }
 
         # Check daily quota
-        daily_quota = DailyQuestionQuota.get_or_create_today(session.user)
+        with tracing.span("quota_check"):
+            daily_quota = DailyQuestionQuota.get_or_create_today(session.user)
         if not daily_quota.can_ask_question():
             from chat.models import get_max_daily_questions
 
+            metrics.chat_quota_rejections.inc(stage="task")
             max_questions = get_max_daily_questions()
             return {
                 "success": False,
@@ -53,6 +74,10 @@ def process_question_task(
 
         chat_service = ChatService(session)
 
+        if intake_version:
+            with tracing.span("intake_load"):
+                intake_data = intake_snapshot.load(session, intake_version)
+
         response_data = chat_service.process_user_question(question, intake_data)
 
         logger.info(f"[TASK] Successfully processed question for session {session_id}")
@@ -75,6 +100,18 @@ def process_question_task(
             "error": "Session not found",
         }
 
+    except RateLimitExceeded as e:
+        logger.warning(f"[TASK] Gemini busy, retrying in {e.retry_after}s")
+        raise self.retry(exc=e, countdown=e.retry_after)
+
+    except CircuitOpenError as e:
+        # Don't hold the worker on retries while the provider is down
+        logger.warning(f"[TASK] {str(e)}")
+        return {
+            "success": False,
+            "error": "The advisor is temporarily unavailable. Please try again shortly.",
+        }
+
     except Exception as e:
         logger.error(f"[TASK] Error processing question: {str(e)}", exc_info=True)
 
@@ -89,21 +126,32 @@ def process_question_task(
 
 
 @shared_task(bind=True, max_retries=2, default_retry_delay=5)
+@tracing.traced_task
 def process_mcq_response_task(
     self,
     session_id: str,
     mcq_message_id: str,
     selected_value: str,
-    intake_data: dict,
     user_id: int,
+    intake_version: str = None,
+    intake_data: dict = None,
+    correlation_id: str = None,
+    enqueued_at: float = None,
 ) -> dict:
+    # intake_data is only sent by messages queued before intake snapshots
     from chat.models import ChatMessage, ChatSession, DailyQuestionQuota
     from chat.services import ChatService
 
     try:
-        logger.info(f"[TASK] Processing MCQ response for session {session_id}")
+        logger.info(
+            f"[TASK] Processing MCQ response for session {session_id} "
+            f"[{correlation_id}]"
+        )
 
-        session = ChatSession.objects.select_related("user").get(id=session_id)
+        with tracing.span("session_load"):
+            session = ChatSession.objects.select_related("user", "intake_data").get(
+                id=session_id
+            )
 
         if session.user_id != user_id:
             return {
@@ -111,8 +159,14 @@ def process_mcq_response_task(
                 "error": "Unauthorized access to session",
             }
 
+        with tracing.span("session_reopen"):
+            archive.reopen(session)
+
         try:
-            mcq_message = ChatMessage.objects.get(id=mcq_message_id, session=session)
+            with tracing.span("mcq_load"):
+                mcq_message = ChatMessage.objects.get(
+                    id=mcq_message_id, session=session
+                )
         except ChatMessage.DoesNotExist:
             return {
                 "success": False,
@@ -121,6 +175,10 @@ def process_mcq_response_task(
 
         chat_service = ChatService(session)
 
+        if intake_version:
+            with tracing.span("intake_load"):
+                intake_data = intake_snapshot.load(session, intake_version)
+
         response_data = chat_service.process_mcq_response(
             mcq_message_id,
             selected_value,
@@ -128,7 +186,8 @@ def process_mcq_response_task(
         )
 
         # Get daily quota for response
-        daily_quota = DailyQuestionQuota.get_or_create_today(session.user)
+        with tracing.span("quota_check"):
+            daily_quota = DailyQuestionQuota.get_or_create_today(session.user)
 
         logger.info(
             f"[TASK] Successfully processed MCQ response for session {session_id}"
@@ -152,6 +211,18 @@ def process_mcq_response_task(
             "error": "Session not found",
         }
 
+    except RateLimitExceeded as e:
+        logger.warning(f"[TASK] Gemini busy, retrying in {e.retry_after}s")
+        raise self.retry(exc=e, countdown=e.retry_after)
+
+    except CircuitOpenError as e:
+        # Don't hold the worker on retries while the provider is down
+        logger.warning(f"[TASK] {str(e)}")
+        return {
+            "success": False,
+            "error": "The advisor is temporarily unavailable. Please try again shortly.",
+        }
+
     except Exception as e:
         logger.error(f"[TASK] Error processing MCQ response: {str(e)}", exc_info=True)
 
@@ -163,3 +234,38 @@ def process_mcq_response_task(
             "success": False,
             "error": f"Failed to process MCQ response: {str(e)}",
         }
+
+
+@shared_task
+def flush_llm_call_log_task() -> int:
+    """Write queued LLM call log entries and their daily rollups (beat)."""
+    from chat import ledger
+
+    written = ledger.flush()
+    if written:
+        logger.info(f"[TASK] Wrote {written} LLM call log entries")
+    return written
+
+
+@shared_task
+def refresh_chat_stats_task() -> int:
+    """Recompute the recent ChatStatsDaily rollups (beat)."""
+    from chat import stats
+
+    return stats.refresh()
+
+
+@shared_task
+def expire_chat_sessions_task() -> dict:
+    """Abandon idle sessions and archive the messages of old ones (beat)."""
+
+    expired = {
+        "abandoned": archive.abandon_idle(),
+        "archived": archive.archive_inactive(),
+    }
+    if any(expired.values()):
+        logger.info(
+            "[TASK] Abandoned %(abandoned)d and archived %(archived)d sessions",
+            expired,
+        )
+    return expired
@@ -1,3 +1,676 @@
-from django.test import TestCase
+import json
+import threading
+import time
+import unittest
+import uuid
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.test import SimpleTestCase
+from django.urls import URLPattern, get_resolver
+from django.utils import timezone
+
+from advisory import metrics
+from advisory.testing import QueryBudgetTestCase, QueryRecorder, load_budgets
+from chat import (
+    archive,
+    hedging,
+    idempotency,
+    ledger,
+    rate_limiter,
+    stats,
+    tracing,
+)
+from chat.circuit_breaker import STATE_CLOSED, STATE_OPEN, CircuitBreaker
+from chat.constants import (
+    CHAT_HISTORY_PAGE_SIZE,
+    CLASSIFICATION_ANSWER_DIRECTLY,
+    LLM_CACHE_COALESCED,
+    LLM_LEDGER_DEAD_LETTER_KEY,
+    LLM_LEDGER_KEY,
+    LLM_LEDGER_MAX_ATTEMPTS,
+    MESSAGE_TYPE_BOT_MCQ,
+    MESSAGE_TYPE_USER_QUESTION,
+    SENDER_BOT,
+    SESSION_ABANDONED,
+    SESSION_ACTIVE,
+)
+from chat.models import (
+    ChatMessage,
+    ChatSession,
+    ChatSessionArchive,
+    ChatStatsDaily,
+    LLMCallLog,
+    LLMUsageDaily,
+)
+from chat.schemas import StructuredOutputError, parse_response, repair_json
+
+try:
+    import fakeredis  # Runs the token bucket script without a Redis server
+except ImportError:
+    fakeredis = None
+
+BUDGETED_URLCONFS = ("chat.urls", "accounts.urls", "usecase_engine.urls")
+
+
+class ChatQueryBudgetTests(QueryBudgetTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = cls.make_user("farmer@example.com")
+        cls.session = cls.make_session(cls.user, messages=20)
+
+    def setUp(self):
+        self.client = self.client_for(self.user)
+
+    def test_ask_question(self):
+        response = self.assertWithinBudget(
+            self.client,
+            "ask-question",
+            "POST",
+            "/ask/",
+            {"question": "How much insulation?", "session_id": str(self.session.id)},
+            expected_status=202,
+        )
+        self.assertEqual(response.json()["data"]["status"], "PENDING")
+
+    def test_mcq_response(self):
+        mcq = ChatMessage.objects.create(
+            session=self.session,
+            sender=SENDER_BOT,
+            message_type=MESSAGE_TYPE_BOT_MCQ,
+            message_text="To answer your question, I need: capacity?",
+            mcq_options={"question": "Capacity?", "options": ["Small", "Large"]},
+        )
+        self.assertWithinBudget(
+            self.client,
+            "mcq-response",
+            "POST",
+            "/mcq-response/",
+            {"mcq_message_id": str(mcq.id), "selected_value": "Large"},
+            expected_status=202,
+        )
+
+    def test_task_status(self):
+        task_id = self.client.post(
+            "/ask/",
+            {"question": "Which variety?", "session_id": str(self.session.id)},
+            format="json",
+        ).json()["data"]["task_id"]
+        response = self.assertWithinBudget(
+            self.client, "task-status", "GET", f"/task/{task_id}/status/"
+        )
+        self.assertEqual(response.json()["data"]["task_status"], "SUCCESS")
+
+    def test_task_result_without_an_owner_is_denied(self):
+        result = mock.Mock(result={"success": True, "type": "onboarding"})
+        result.successful.return_value = True
+        with mock.patch("chat.views.AsyncResult", return_value=result):
+            response = self.client.get(f"/task/{uuid.uuid4()}/status/")
+        self.assertEqual(response.status_code, 403)
+
+    def test_turn_timings_carry_correlation_id(self):
+        response = self.client.post(
+            "/ask/",
+            {"question": "What humidity?", "session_id": str(self.session.id)},
+            format="json",
+            HTTP_X_REQUEST_ID="trace-0123456789",
+        )
+        self.assertEqual(response["X-Request-ID"], "trace-0123456789")
+
+        task_id = response.json()["data"]["task_id"]
+        status = self.client.get(f"/task/{task_id}/status/").json()
+        timings = status["data"]["timings"]
+        self.assertEqual(timings["correlation_id"], "trace-0123456789")
+        stages = {span["stage"] for span in timings["spans"]}
+        for stage in (
+            "queue_wait",
+            "session_load",
+            "quota_check",
+            "intake_load",
+            "persist.user_message",
+            "llm.CLASSIFIER",
+            "llm.ANSWER_GENERATOR",
+            "persist.bot_message",
+            "task_run",
+        ):
+            self.assertIn(stage, stages)
+
+    def test_enqueue_span_waits_for_the_metrics_flush(self):
+        tracing.flush_stages()
+        with mock.patch.object(tracing, "_write_stages") as write:
+            self.client.post(
+                "/ask/",
+                {
+                    "question": "How long can I store seed potatoes?",
+                    "session_id": str(self.session.id),
+                },
+                format="json",
+            )
+            written = [
+                stage for call in write.call_args_list for _, stage, _ in call.args[0]
+            ]
+            self.assertNotIn("enqueue", written)
+
+            metrics.flush()
+        flushed = [stage for _, stage, _ in write.call_args_list[-1].args[0]]
+        self.assertEqual(flushed, ["enqueue"])
+
+    def test_chat_history(self):
+        path = f"/history/{self.session.id}/"
+        response = self.assertWithinBudget(self.client, "chat-history", "GET", path)
+        self.assertEqual(len(response.json()["data"]["messages"]), 20)
+
+        self.assertWithinBudget(
+            self.client,
+            "chat-history-not-modified",
+            "GET",
+            path,
+            expected_status=304,
+            HTTP_IF_NONE_MATCH=response["ETag"],
+        )
+
+    def test_turn_writes_nothing_until_its_llm_calls_succeed(self):
+        from chat.services import ChatService
+
+        service = ChatService(self.session)
+        real_call = service.call_gemini
+
+        def call_gemini(*args, purpose, **kwargs):
+            if purpose == "ANSWER_GENERATOR":
+                # No message row written yet, so no session row lock held
+                self.assertEqual(self.session.messages.count(), 20)
+                raise TimeoutError("answer timed out")
+            return real_call(*args, purpose=purpose, **kwargs)
+
+        with mock.patch.object(service, "call_gemini", side_effect=call_gemini):
+            with self.assertRaises(TimeoutError):
+                service.process_user_question("How much insulation?", {})
+
+        self.session.refresh_from_db()
+        self.assertEqual(self.session.message_count, 20)
+        self.assertEqual(self.session.messages.count(), 20)
+
+        service.process_user_question("How much insulation?", {})
+        self.assertEqual(
+            list(self.session.messages.values_list("sequence_number", flat=True))[-2:],
+            [21, 22],
+        )
+
+    def test_session_intake_memo_follows_recomputed_metrics(self):
+        from chat.prompt_serialization import get_session_intake
+
+        session = ChatSession.objects.select_related("intake_data").get(
+            id=self.session.id
+        )
+        user_input = session.intake_data
+        before = get_session_intake(session, user_input.intake_data)
+
+        user_input.intake_data = {**user_input.intake_data, "storage_capacity": 900}
+        user_input.save()
+        after = get_session_intake(session, user_input.intake_data)
+        self.assertNotEqual(after, before)
+        self.assertIn("900", after.intake)
+
+    def test_chat_history_pages_only_when_asked(self):
+        session = self.make_session(self.user, messages=60)
+        path = f"/history/{session.id}/"
+
+        data = self.client.get(path).json()["data"]
+        self.assertEqual(len(data["messages"]), 60)
+        self.assertFalse(data["pagination"]["has_more"])
+
+        for params in ({"limit": 10}, {"before_seq": 61}, {"after_seq": 0}):
+            with self.subTest(params=params):
+                data = self.client.get(path, params).json()["data"]
+                expected = params.get("limit", CHAT_HISTORY_PAGE_SIZE)
+                self.assertEqual(len(data["messages"]), expected)
+                self.assertTrue(data["pagination"]["has_more"])
+
+    def test_list_sessions(self):
+        for _ in range(5):
+            self.make_session(self.user, messages=2)
+        response = self.assertWithinBudget(
+            self.client, "list-sessions", "GET", "/sessions/"
+        )
+        self.assertEqual(len(response.json()["data"]["sessions"]), 6)
+
+    def test_query_time_over_budget_only_warns(self):
+        if self.update:
+            self.skipTest("Budgets are being re-recorded")
+        with mock.patch.object(QueryRecorder, "time_ms", 10**6):
+            with self.assertWarnsRegex(UserWarning, "list-sessions GET spent"):
+                self.assertWithinBudget(
+                    self.client, "list-sessions", "GET", "/sessions/"
+                )
+
+    def test_create_session(self):
+        self.assertWithinBudget(
+            self.client,
+            "create-session",
+            "POST",
+            "/sessions/create/",
+            expected_status=201,
+        )
+
+    def test_update_session_title(self):
+        self.assertWithinBudget(
+            self.client,
+            "update-session-title",
+            "PATCH",
+            f"/sessions/{self.session.id}/title/",
+            {"title": "Insulation planning"},
+        )
+
+    def test_session_intake(self):
+        self.assertWithinBudget(
+            self.client,
+            "get-session-intake",
+            "GET",
+            f"/sessions/{self.session.id}/intake/",
+        )
+
+
+class LLMLedgerTests(QueryBudgetTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = cls.make_user("farmer@example.com")
+        cls.session = cls.make_session(cls.user, messages=0)
+
+    def entry(self, **overrides):
+        return {
+            "user_id": self.user.id,
+            "session_id": str(self.session.id),
+            "purpose": "CLASSIFIER",
+            "provider": "gemini",
+            "model": "gemini-2.5-flash-lite",
+            "prompt_tokens": 1000,
+            "output_tokens": 100,
+            "thinking_tokens": 0,
+            "cost_usd": 0.00014,
+            "latency_ms": 400,
+            "retries": 0,
+            "fallback": False,
+            "cache_status": "miss",
+            "success": True,
+            "created_at": timezone.now().isoformat(),
+            **overrides,
+        }
+
+    def test_batches_fold_into_daily_rollups(self):
+        written = ledger.write_batch(
+            [
+                self.entry(),
+                self.entry(retries=1, latency_ms=800),
+                self.entry(cache_status=LLM_CACHE_COALESCED, prompt_tokens=0),
+                self.entry(purpose="ANSWER_GENERATOR", success=False),
+                # Deleted user and session are kept as NULL
+                self.entry(user_id=987654, session_id=str(uuid.uuid4())),
+            ]
+        )
+        self.assertEqual(written, 5)
+        self.assertEqual(LLMCallLog.objects.filter(session=None).count(), 1)
+
+        classifier = LLMUsageDaily.objects.get(user=self.user, purpose="CLASSIFIER")
+        self.assertEqual(classifier.calls, 3)
+        self.assertEqual(classifier.retries, 1)
+        self.assertEqual(classifier.coalesced, 1)
+        self.assertEqual(classifier.prompt_tokens, 2000)
+        self.assertEqual(classifier.latency_ms, 1600)
+        self.assertEqual(
+            LLMUsageDaily.objects.get(purpose="ANSWER_GENERATOR").errors, 1
+        )
+        self.assertEqual(LLMUsageDaily.objects.get(user=None).calls, 1)
+
+        ledger.write_batch([self.entry()])
+        classifier.refresh_from_db()
+        self.assertEqual(classifier.calls, 4)
+        self.assertEqual(str(classifier.cost_usd), "0.00056000")
+
+    @unittest.skipUnless(fakeredis, "fakeredis is not installed")
+    def test_flush_dead_letters_entries_it_cannot_write(self):
+        redis = fakeredis.FakeRedis()
+        bad = self.entry()
+        del bad["model"]
+        redis.rpush(
+            LLM_LEDGER_KEY,
+            json.dumps(self.entry()),
+            "not json",
+            json.dumps(bad),
+        )
+
+        with mock.patch("django_redis.get_redis_connection", return_value=redis):
+            written = [ledger.flush() for _ in range(LLM_LEDGER_MAX_ATTEMPTS)]
+
+        self.assertEqual(written, [1] + [0] * (LLM_LEDGER_MAX_ATTEMPTS - 1))
+        self.assertEqual(redis.llen(LLM_LEDGER_KEY), 0)
+        dead = redis.lrange(LLM_LEDGER_DEAD_LETTER_KEY, 0, -1)
+        self.assertEqual(dead[0], b"not json")
+        self.assertEqual(json.loads(dead[1])["attempts"], LLM_LEDGER_MAX_ATTEMPTS)
+
+    def test_deleting_a_user_keeps_their_usage(self):
+        user = self.make_user("gone@example.com")
+        ledger.write_batch([self.entry(user_id=user.id)])
+        user.delete()
+        self.assertEqual(LLMUsageDaily.objects.get(user=None).calls, 1)
+
+
+class ChatStatsTests(QueryBudgetTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = cls.make_user("farmer@example.com")
+        cls.session = cls.make_session(cls.user, messages=0)
+
+    def test_refresh_backfills_and_counts_classifier_mix(self):
+        client = self.client_for(self.user)
+        client.post(
+            "/ask/",
+            {"question": "Which fans for 5,000 MT?", "session_id": str(self.session.id)},
+            format="json",
+        )
+        question = ChatMessage.objects.get(message_type=MESSAGE_TYPE_USER_QUESTION)
+        self.assertEqual(question.classification, CLASSIFICATION_ANSWER_DIRECTLY)
+
+        # The first run also covers yesterday, the refresh window
+        self.assertEqual(stats.refresh(), 2)
+        today = ChatStatsDaily.objects.get(date=timezone.now().date())
+        self.assertEqual(
+            (today.new_users, today.sessions, today.questions, today.messages),
+            (1, 1, 1, 2),
+        )
+        self.assertEqual(today.classified_answer_directly, 1)
+        self.assertEqual(today.total_users, 1)
+
+        # Running totals continue from the day before the window
+        ChatStatsDaily.objects.filter(date=today.date - timedelta(days=1)).update(
+            date=today.date - timedelta(days=2), total_users=10, total_messages=40
+        )
+        self.assertEqual(stats.refresh(), 2)
+        today.refresh_from_db()
+        self.assertEqual((today.total_users, today.total_messages), (11, 42))
+
+
+class ChatArchiveTests(QueryBudgetTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = cls.make_user("farmer@example.com")
+        cls.session = cls.make_session(cls.user, messages=20)
+        cls.recent = cls.make_session(cls.user, messages=2)
+
+    def test_idle_sessions_are_abandoned_then_archived(self):
+        now = timezone.now()
+        ChatSession.objects.filter(id=self.session.id).update(
+            last_message_at=now - timedelta(days=100)
+        )
+        client = self.client_for(self.user)
+        path = f"/history/{self.session.id}/"
+        before = client.get(path, {"limit": 5}).json()["data"]
+
+        # Still active: only abandoned sessions are archived
+        self.assertEqual(archive.archive_inactive(), 0)
+        self.assertEqual(archive.abandon_idle(), 1)
+        self.assertEqual(archive.archive_inactive(), 1)
+
+        self.session.refresh_from_db()
+        self.assertEqual(self.session.status, SESSION_ABANDONED)
+        self.assertEqual(self.session.message_count, 20)
+        self.assertFalse(ChatMessage.objects.filter(session=self.session).exists())
+        self.assertEqual(ChatSessionArchive.objects.get().message_count, 20)
+        self.assertEqual(self.recent.messages.count(), 2)
+
+        # History pages the archive the same way as the live table
+        response = self.assertWithinBudget(
+            client, "chat-history-archived", "GET", path, {"limit": 5}
+        )
+        data = response.json()["data"]
+        self.assertEqual(data["messages"], before["messages"])
+        self.assertEqual(data["pagination"], before["pagination"])
+        older = client.get(
+            path, {"limit": 5, "before_seq": data["pagination"]["before_seq"]}
+        ).json()["data"]
+        self.assertEqual(
+            [m["sequence_number"] for m in older["messages"]], [11, 12, 13, 14, 15]
+        )
+
+        self.assertEqual(archive.restore(self.session.id), 20)
+        self.assertEqual(client.get(path, {"limit": 5}).json()["data"], data)
+
+    def test_a_new_turn_reopens_an_archived_session(self):
+        ChatSession.objects.filter(id=self.session.id).update(
+            status=SESSION_ABANDONED,
+            last_message_at=timezone.now() - timedelta(days=100),
+        )
+        self.assertEqual(archive.archive_inactive(), 1)
+
+        client = self.client_for(self.user)
+        response = client.post(
+            "/ask/",
+            {"question": "Is 4°C right?", "session_id": str(self.session.id)},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 202)
+
+        self.session.refresh_from_db()
+        self.assertEqual(self.session.status, SESSION_ACTIVE)
+        self.assertIsNone(self.session.ended_at)
+        self.assertFalse(ChatSessionArchive.objects.exists())
+        history = client.get(f"/history/{self.session.id}/").json()["data"]
+        self.assertEqual(
+            [m["sequence_number"] for m in history["messages"]], list(range(1, 23))
+        )
+        self.assertEqual(self.session.message_count, 22)
+
+    def test_sessions_without_message_rows_do_not_stall_archiving(self):
+        old = timezone.now() - timedelta(days=100)
+        empty_ids = [self.make_session(self.user, messages=2).id for _ in range(3)]
+        ChatMessage.objects.filter(session_id__in=empty_ids).delete()
+        empty = ChatSession.objects.filter(id__in=empty_ids)
+        empty.update(message_count=2)
+        ChatSession.objects.exclude(id=self.recent.id).update(
+            status=SESSION_ABANDONED, last_message_at=old
+        )
+
+        self.assertEqual(archive.archive_inactive(batch_size=2), 1)
+        self.assertEqual(set(empty.values_list("message_count", flat=True)), {0})
+        self.assertEqual(archive.archive_inactive(batch_size=2), 0)
+
+
+class CircuitBreakerTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_per_model_circuit_uses_the_purpose_settings(self):
+        answers = CircuitBreaker("ANSWER_GENERATOR", key="ANSWER_GENERATOR:m")
+        classifier = CircuitBreaker("CLASSIFIER", key="CLASSIFIER:m")
+        self.assertEqual(answers.settings["slow_call_seconds"], 30)
+        self.assertEqual(answers.name, "ANSWER_GENERATOR:m")
+
+        # 25s is slow for the default threshold (20s) but not for answers
+        for _ in range(10):
+            answers.record_success(25)
+            classifier.record_success(25)
+        self.assertEqual(answers.get_state(), STATE_CLOSED)
+        self.assertEqual(classifier.get_state(), STATE_OPEN)
+        self.assertEqual(CircuitBreaker("ANSWER_GENERATOR").get_state(), STATE_CLOSED)
+
+
+class IdempotencyTests(QueryBudgetTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = cls.make_user("retry@example.com")
+        cls.session = cls.make_session(cls.user)
+
+    def setUp(self):
+        cache.clear()
+        self.client = self.client_for(self.user)
+
+    def ask(self, question, **extra):
+        return self.client.post(
+            "/ask/",
+            {"question": question, "session_id": str(self.session.id)},
+            format="json",
+            **extra,
+        )
+
+    def test_retried_question_reuses_the_task(self):
+        questions = ChatMessage.objects.filter(
+            session=self.session, message_type=MESSAGE_TYPE_USER_QUESTION
+        )
+        asked = questions.count()
+
+        first = self.ask("Which variety keeps longest?").json()["data"]
+        retry = self.ask("  which VARIETY keeps   longest? ")
+        self.assertEqual(retry.status_code, 202)
+        self.assertTrue(retry.json()["data"]["duplicate"])
+        self.assertEqual(retry.json()["data"]["task_id"], first["task_id"])
+
+        other = self.ask("Which variety keeps longest in Punjab?").json()["data"]
+        self.assertNotEqual(other["task_id"], first["task_id"])
+        self.assertEqual(questions.count(), asked + 2)
+
+    def test_client_key_overrides_the_question(self):
+        first = self.ask("What humidity?", HTTP_IDEMPOTENCY_KEY="submit-1")
+        retry = self.ask("What humidity now?", HTTP_IDEMPOTENCY_KEY="submit-1")
+        self.assertEqual(
+            retry.json()["data"]["task_id"], first.json()["data"]["task_id"]
+        )
+
+    def test_in_flight_duplicate_conflicts(self):
+        request = mock.Mock(user=self.user, headers={})
+        key = idempotency.build_question_key(request, self.session.id, "What humidity?")
+        self.assertEqual(idempotency.claim(key), (True, None))
+        self.assertEqual(self.ask("What humidity?").status_code, 409)
+
+        idempotency.release(key)
+        self.assertEqual(self.ask("What humidity?").status_code, 202)
+
+    def test_store_failure_admits_the_submission(self):
+        with mock.patch.object(idempotency.cache, "add", side_effect=ConnectionError):
+            self.assertEqual(idempotency.claim("chat:idempotency:x"), (True, None))
+
+
+@unittest.skipUnless(fakeredis, "fakeredis is not installed")
+class RateLimiterTests(SimpleTestCase):
+    def setUp(self):
+        redis = fakeredis.FakeRedis()
+        for target, value in (
+            ("django_redis.get_redis_connection", mock.Mock(return_value=redis)),
+            (
+                "chat.rate_limiter._get_limits",
+                mock.Mock(return_value={"rpm": 2, "tpm": 1000}),
+            ),
+            ("chat.rate_limiter.LLM_ADMISSION_MAX_WAIT_SECONDS", 0),
+        ):
+            patcher = mock.patch(target, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_requests_per_minute(self):
+        rate_limiter.acquire("m", 100)
+        rate_limiter.acquire("m", 100)
+        budget = rate_limiter.get_budget("m", 100)
+        self.assertEqual(budget["requests_available"], 0)
+        self.assertEqual(budget["tokens_available"], 800)
+        self.assertEqual(budget["retry_after"], 30)  # 2 rpm refill one per 30s
+
+        with self.assertRaises(rate_limiter.RateLimitExceeded) as raised:
+            rate_limiter.acquire("m", 100)
+        self.assertEqual(raised.exception.retry_after, 30)
+
+    def test_tokens_per_minute_and_reconcile(self):
+        rate_limiter.acquire("m", 600)
+        with self.assertRaises(rate_limiter.RateLimitExceeded):
+            rate_limiter.acquire("m", 600)  # Shed without taking a request
+
+        rate_limiter.reconcile("m", 600, 200)  # Refund the unused reservation
+        rate_limiter.acquire("m", 600)
+        self.assertEqual(rate_limiter.get_budget("m", 0)["requests_available"], 0)
+
+    def test_fails_open_without_redis(self):
+        with mock.patch(
+            "django_redis.get_redis_connection", side_effect=ConnectionError
+        ):
+            for _ in range(5):
+                rate_limiter.acquire("m", 100)
+            self.assertEqual(rate_limiter.get_budget("m")["retry_after"], 0)
+
+
+class HedgingTests(SimpleTestCase):
+    @mock.patch("chat.hedging.get_hedge_delay", return_value=0.01)
+    def test_the_losing_call_is_passed_to_on_discard(self, _):
+        calls = []
+        discarded = threading.Event()
+
+        def fn():
+            calls.append(None)
+            if len(calls) == 1:
+                time.sleep(0.2)
+                return "primary"
+            return "hedge"
+
+        def on_discard(response, latency):
+            self.assertEqual(response, "primary")
+            self.assertGreaterEqual(latency, 0.2)
+            discarded.set()
+
+        before_hedge = mock.Mock()
+        result = hedging.hedged_call(
+            "CLASSIFIER", fn, before_hedge=before_hedge, on_discard=on_discard
+        )
+        self.assertEqual(result, "hedge")
+        before_hedge.assert_called_once_with()
+        self.assertTrue(discarded.wait(2))
+
+
+class StructuredOutputTests(SimpleTestCase):
+    def test_repair_json(self):
+        cases = {
+            '```json\n{"answer": "Hi"}\n```': '{"answer": "Hi"}',
+            'Sure, here it is: {"answer": "Hi"} Hope this helps!': '{"answer": "Hi"}',
+            '{"answer": "Hi", "suggested_questions": ["a", "b",],}': (
+                '{"answer": "Hi", "suggested_questions": ["a", "b"]}'
+            ),
+            '{"answer": "Keep at 4': '{"answer": "Keep at 4"}',
+            '{"answer": "Hi", "suggested_questions": ["Why': (
+                '{"answer": "Hi", "suggested_questions": ["Why"]}'
+            ),
+            '{"answer": "Hi", "suggested_questions":': '{"answer": "Hi"}',
+            '{"answer": "Hi", "sugg': '{"answer": "Hi"}',
+        }
+        for text, expected in cases.items():
+            with self.subTest(text=text):
+                self.assertEqual(repair_json(text), expected)
+
+    def test_parse_response(self):
+        data, repaired = parse_response(
+            "CLASSIFIER", '{"classification": "needs_follow_up"}'
+        )
+        self.assertEqual(data["classification"], "NEEDS_FOLLOW_UP")
+        self.assertFalse(repaired)
+
+        data, repaired = parse_response(
+            "ANSWER_GENERATOR",
+            '```json\n{"answer": "Hi", "suggested_questions": ["a", "", "b", "c", "d"',
+        )
+        self.assertTrue(repaired)
+        self.assertEqual(data["suggested_questions"], ["a", "b", "c"])
+
+        with self.assertRaises(StructuredOutputError):
+            parse_response(
+                "MCQ_GENERATOR", '{"question": "Capacity?", "options": ["1"]}'
+            )
+        with self.assertRaises(StructuredOutputError):
+            parse_response("ANSWER_GENERATOR", "I cannot help with that.")
+
+
+class QueryBudgetCoverageTests(QueryBudgetTestCase):
+    def test_every_endpoint_has_a_budget(self):
+        if self.update:
+            self.skipTest("Budgets are being re-recorded")
+        budgeted = {key.rsplit(" ", 1)[0] for key in load_budgets()}
+        missing = []
+        for urlconf in BUDGETED_URLCONFS:
+            for pattern in get_resolver(urlconf).url_patterns:
+                if isinstance(pattern, URLPattern) and pattern.name not in budgeted:
+                    missing.append(f"{urlconf}:{pattern.name}")
+        self.assertEqual(missing, [], "Endpoints without a query budget")
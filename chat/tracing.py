@@ -0,0 +1,248 @@
+import functools
+import logging
+import re
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from celery.signals import task_postrun
+from django.utils import timezone
+
+from advisory import metrics
+from chat.constants import (
+    CORRELATION_ID_HEADER,
+    TRACE_STAGE_BUCKETS_MS,
+    TRACE_STAGE_KEY_PREFIX,
+    TRACE_STAGE_TTL_DAYS,
+)
+
+logger = logging.getLogger("chat.tracing")
+
+_CORRELATION_ID_RE = re.compile(r"^[A-Za-z0-9._-]{8,64}$")
+
+_current = ContextVar("chat_trace", default=None)
+# Traces whose task returned but whose result is not stored yet
+_awaiting_store = threading.local()
+# (histogram key, stage, ms) from timed() blocks, written with the metrics
+_pending_stages = []
+_pending_lock = threading.Lock()
+
+
+class Trace:
+    """Timed stages of one chat turn, tied together by a correlation ID."""
+
+    def __init__(self, correlation_id: str = None, name: str = "turn"):
+        self.correlation_id = correlation_id or uuid.uuid4().hex
+        self.name = name
+        self.spans = []
+        self._started = time.perf_counter()
+        self._finished = None
+
+    def add(self, stage: str, elapsed_ms: float):
+        self.spans.append((stage, round(elapsed_ms, 1)))
+
+    def finish(self) -> dict:
+        """Close the trace and return it in a JSON-serializable form."""
+        self._finished = time.perf_counter()
+        return {
+            "correlation_id": self.correlation_id,
+            "total_ms": round((self._finished - self._started) * 1000, 1),
+            "spans": [{"stage": stage, "ms": ms} for stage, ms in self.spans],
+        }
+
+    def flush(self):
+        record_stages(self.spans)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(
+                "[TRACE %s] %s %s",
+                self.correlation_id,
+                self.name,
+                " ".join(f"{stage}={ms:.0f}ms" for stage, ms in self.spans),
+            )
+
+
+class CorrelationIdFilter(logging.Filter):
+    """Stamp records with the current trace's correlation ID, if any."""
+
+    def filter(self, record):
+        trace = _current.get()
+        record.correlation_id = trace.correlation_id if trace else None
+        return True
+
+
+def get_correlation_id(request) -> str:
+    """The client's X-Request-ID when it looks sane, else a fresh one."""
+    correlation_id = request.headers.get(CORRELATION_ID_HEADER, "")
+    if _CORRELATION_ID_RE.match(correlation_id):
+        return correlation_id
+    return uuid.uuid4().hex
+
+
+@contextmanager
+def span(stage: str):
+    """Time the enclosed block as `stage` of the current trace, if any."""
+    trace = _current.get()
+    if trace is None:
+        yield
+        return
+
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.add(stage, (time.perf_counter() - started) * 1000)
+
+
+@contextmanager
+def timed(stage: str):
+    """
+    Time the enclosed block into the `stage` histogram. The observation is
+    buffered and written on the next metrics flush, so request paths do not
+    wait on Redis for it.
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        with _pending_lock:
+            _pending_stages.append((_histogram_key(), stage, elapsed_ms))
+
+
+def traced_task(fn):
+    """
+    Trace a chat task from the correlation_id/enqueued_at kwargs it was sent.
+
+    Records queue wait and the task run, attaches the timings to a dict
+    result under "timings", and records the result store once Celery has
+    saved the result (task_postrun).
+    """
+
+    @functools.wraps(fn)
+    def wrapper(task, *args, **kwargs):
+        trace = Trace(
+            kwargs.get("correlation_id"), name=task.name.rsplit(".", 1)[-1]
+        )
+        enqueued_at = kwargs.get("enqueued_at")
+        if enqueued_at:
+            trace.add("queue_wait", max(time.time() - enqueued_at, 0) * 1000)
+
+        token = _current.set(trace)
+        try:
+            with span("task_run"):
+                result = fn(task, *args, **kwargs)
+        finally:
+            _current.reset(token)
+            _awaiting_store.trace = trace
+
+        if isinstance(result, dict):
+            result["timings"] = trace.finish()
+        else:
+            trace.finish()
+        return result
+
+    return wrapper
+
+
+@task_postrun.connect
+def _record_result_store(**kwargs):
+    trace = getattr(_awaiting_store, "trace", None)
+    if trace is None:
+        return
+    _awaiting_store.trace = None
+
+    if trace._finished is not None:
+        trace.add("result_store", (time.perf_counter() - trace._finished) * 1000)
+    trace.flush()
+
+
+def _histogram_key(date=None) -> str:
+    date = date or timezone.now().date()
+    return f"{TRACE_STAGE_KEY_PREFIX}:{date.isoformat()}"
+
+
+def _write_stages(observations):
+    from django_redis import get_redis_connection
+
+    if not observations:
+        return
+
+    try:
+        pipe = get_redis_connection("default").pipeline()
+        for key, stage, elapsed_ms in observations:
+            pipe.hincrby(key, f"{stage}|count", 1)
+            pipe.hincrbyfloat(key, f"{stage}|sum_ms", elapsed_ms)
+            bucket = next(
+                (le for le in TRACE_STAGE_BUCKETS_MS if elapsed_ms <= le), "inf"
+            )
+            pipe.hincrby(key, f"{stage}|le:{bucket}", 1)
+        for key in {key for key, _, _ in observations}:
+            pipe.expire(key, TRACE_STAGE_TTL_DAYS * 24 * 3600)
+        pipe.execute()
+    except Exception as e:
+        logger.warning(f"Failed to record stage timings: {e}")
+
+
+def record_stages(spans):
+    """Add (stage, ms) observations to today's per-stage histograms."""
+    key = _histogram_key()
+    _write_stages([(key, stage, elapsed_ms) for stage, elapsed_ms in spans])
+
+
+@metrics.on_flush
+def flush_stages():
+    """Write the observations buffered by timed()."""
+    global _pending_stages
+    with _pending_lock:
+        observations, _pending_stages = _pending_stages, []
+    _write_stages(observations)
+
+
+def _bucket_percentile(buckets: dict, count: int, pct: float):
+    """Upper bound of the bucket holding the pct-th observation (None: +Inf)."""
+    rank = pct / 100 * count
+    for le in TRACE_STAGE_BUCKETS_MS:
+        if buckets[le] >= rank:
+            return le
+    return None
+
+
+def get_stage_histograms(date=None) -> list:
+    """Per-stage histograms for `date` (default today), one dict per stage."""
+    from django_redis import get_redis_connection
+
+    raw = get_redis_connection("default").hgetall(_histogram_key(date))
+
+    stages = {}
+    for field, value in raw.items():
+        stage, metric = field.decode().split("|")
+        stages.setdefault(stage, {})[metric] = float(value)
+
+    histograms = []
+    for stage, values in stages.items():
+        count = int(values.get("count", 0))
+        if not count:
+            continue
+
+        # Cumulative counts, as in a Prometheus histogram
+        buckets, cumulative = {}, 0
+        for le in TRACE_STAGE_BUCKETS_MS:
+            cumulative += int(values.get(f"le:{le}", 0))
+            buckets[le] = cumulative
+        buckets["+Inf"] = count
+
+        histograms.append(
+            {
+                "stage": stage,
+                "count": count,
+                "avg_ms": round(values.get("sum_ms", 0) / count, 1),
+                "p50_ms": _bucket_percentile(buckets, count, 50),
+                "p95_ms": _bucket_percentile(buckets, count, 95),
+                "p99_ms": _bucket_percentile(buckets, count, 99),
+                "buckets": {str(le): total for le, total in buckets.items()},
+            }
+        )
+
+    return sorted(histograms, key=lambda histogram: histogram["stage"])
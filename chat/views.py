@@ -1,15 +1,43 @@
+import base64
+import binascii
+import hashlib
 import logging
+import time
+import uuid
+from datetime import datetime
 
 from celery.result import AsyncResult
+from django.db.models import OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.http import HttpResponseNotModified
+from django.utils import timezone
+from django.utils.http import parse_etags
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
 from accounts.renders import UserRenderer
+from advisory import metrics
 from advisory.celery import app as celery_app
-from chat.constants import SESSION_ACTIVE
-from chat.models import ChatMessage, ChatSession
+from chat import (
+    archive,
+    idempotency,
+    intake_snapshot,
+    rate_limiter,
+    routing,
+    tracing,
+)
+from chat.constants import (
+    CHAT_HISTORY_MAX_PAGE_SIZE,
+    CHAT_HISTORY_PAGE_SIZE,
+    CORRELATION_ID_HEADER,
+    LLM_ADMISSION_MAX_WAIT_SECONDS,
+    SESSION_ACTIVE,
+    SESSION_LIST_MAX_PAGE_SIZE,
+    SESSION_LIST_PAGE_SIZE,
+)
+from chat.models import ChatMessage, ChatSession, DailyQuestionQuota
 from chat.serializers import (
     ChatHistorySerializer,
     ChatSessionSerializer,
@@ -24,6 +52,28 @@ from chat.tasks import process_mcq_response_task, process_question_task
 logger = logging.getLogger("chat.views")
 
 
+def _llm_busy_response():
+    """Fast 429 when the shared Gemini budget cannot fit another question."""
+    models = {
+        routing.get_route(purpose)[0][1]
+        for purpose in ("CLASSIFIER", "ANSWER_GENERATOR")
+    }
+    retry_after = max(rate_limiter.get_budget(model)["retry_after"] for model in models)
+
+    if retry_after <= LLM_ADMISSION_MAX_WAIT_SECONDS:
+        return None
+
+    response = Response(
+        {
+            "message": f"The advisor is busy right now. Please retry in {retry_after} seconds.",
+            "data": {"error_code": "LLM_BUSY", "retry_after": retry_after},
+        },
+        status=status.HTTP_429_TOO_MANY_REQUESTS,
+    )
+    response["Retry-After"] = str(retry_after)
+    return response
+
+
 class AskQuestionView(APIView):
     renderer_classes = [UserRenderer]
     permission_classes = [IsAuthenticated]
@@ -36,11 +86,42 @@ class AskQuestionView(APIView):
         question = serializer.validated_data["question"]
         session = serializer.validated_data.get("session_id")
 
+        idempotency_key = idempotency.build_question_key(
+            request, session.id if session else None, question
+        )
+        claimed, submission = idempotency.claim(idempotency_key)
+
+        if not claimed:
+            if idempotency.is_in_flight(submission):
+                return Response(
+                    {"error": "This question is already being submitted."},
+                    status=status.HTTP_409_CONFLICT,
+                )
+
+            logger.info(
+                f"Duplicate submission, reusing task {submission['task_id']} "
+                f"for session {submission['session_id']}"
+            )
+            return Response(
+                {
+                    "message": "Question already submitted for processing",
+                    "data": {**submission, "duplicate": True},
+                },
+                status=status.HTTP_202_ACCEPTED,
+            )
+
+        busy_response = _llm_busy_response()
+        if busy_response:
+            idempotency.release(idempotency_key)
+            return busy_response
+
         from chat.models import DailyQuestionQuota, get_max_daily_questions
 
         daily_quota = DailyQuestionQuota.get_or_create_today(request.user)
 
         if not daily_quota.can_ask_question():
+            idempotency.release(idempotency_key)
+            metrics.chat_quota_rejections.inc(stage="ask")
             max_questions = get_max_daily_questions()
             return Response(
                 {
@@ -61,6 +142,7 @@ class AskQuestionView(APIView):
             ).first()
 
             if not active_intake:
+                idempotency.release(idempotency_key)
                 return Response(
                     {
                         "error": "No active intake data found. Please complete intake first."
@@ -72,37 +154,50 @@ class AskQuestionView(APIView):
                 user=request.user, intake_data=active_intake
             )
 
-        intake_data = {
-            "user_choice": session.intake_data.user_choice,
-            "intake_data": session.intake_data.intake_data,
-        }
+        intake_version = intake_snapshot.publish(session.intake_data)
 
         if not session.title:
             session.set_title_from_question(question)
 
         daily_quota.increment_count()
 
-        task = process_question_task.delay(
-            session_id=str(session.id),
-            question=question,
-            intake_data=intake_data,
-            user_id=request.user.id,
+        correlation_id = tracing.get_correlation_id(request)
+        try:
+            with tracing.timed("enqueue"):
+                task = process_question_task.delay(
+                    session_id=str(session.id),
+                    question=question,
+                    intake_version=intake_version,
+                    user_id=request.user.id,
+                    correlation_id=correlation_id,
+                    enqueued_at=time.time(),
+                )
+        except Exception:
+            idempotency.release(idempotency_key)
+            raise
+
+        logger.info(
+            f"Queued question task {task.id} for session {session.id} "
+            f"[{correlation_id}]"
         )
 
-        logger.info(f"Queued question task {task.id} for session {session.id}")
+        submission = {
+            "task_id": task.id,
+            "session_id": str(session.id),
+            "status": "PENDING",
+            "remaining_daily_questions": daily_quota.remaining_questions(),
+        }
+        idempotency.store(idempotency_key, submission)
 
-        return Response(
+        response = Response(
             {
                 "message": "Question submitted for processing",
-                "data": {
-                    "task_id": task.id,
-                    "session_id": str(session.id),
-                    "status": "PENDING",
-                    "remaining_daily_questions": daily_quota.remaining_questions(),
-                },
+                "data": submission,
             },
             status=status.HTTP_202_ACCEPTED,
         )
+        response[CORRELATION_ID_HEADER] = correlation_id
+        return response
 
 
 class AnswerMCQView(APIView):
@@ -118,6 +213,10 @@ class AnswerMCQView(APIView):
         mcq_message_id = serializer.validated_data["mcq_message_id"]
         selected_value = serializer.validated_data["selected_value"]
 
+        busy_response = _llm_busy_response()
+        if busy_response:
+            return busy_response
+
         try:
             mcq_message = ChatMessage.objects.select_related(
                 "session__intake_data"
@@ -134,22 +233,25 @@ class AnswerMCQView(APIView):
                 {"error": "MCQ message not found"}, status=status.HTTP_404_NOT_FOUND
             )
 
-        intake_data = {
-            "user_choice": session.intake_data.user_choice,
-            "intake_data": session.intake_data.intake_data,
-        }
+        intake_version = intake_snapshot.publish(session.intake_data)
+
+        correlation_id = tracing.get_correlation_id(request)
+        with tracing.timed("enqueue"):
+            task = process_mcq_response_task.delay(
+                session_id=str(session.id),
+                mcq_message_id=str(mcq_message_id),
+                selected_value=selected_value,
+                intake_version=intake_version,
+                user_id=request.user.id,
+                correlation_id=correlation_id,
+                enqueued_at=time.time(),
+            )
 
-        task = process_mcq_response_task.delay(
-            session_id=str(session.id),
-            mcq_message_id=str(mcq_message_id),
-            selected_value=selected_value,
-            intake_data=intake_data,
-            user_id=request.user.id,
+        logger.info(
+            f"Queued MCQ task {task.id} for session {session.id} [{correlation_id}]"
         )
 
-        logger.info(f"Queued MCQ task {task.id} for session {session.id}")
-
-        return Response(
+        response = Response(
             {
                 "message": "MCQ response submitted for processing",
                 "data": {
@@ -160,47 +262,257 @@ class AnswerMCQView(APIView):
             },
             status=status.HTTP_202_ACCEPTED,
         )
+        response[CORRELATION_ID_HEADER] = correlation_id
+        return response
+
+
+def _int_param(request, name, default=None):
+    value = request.query_params.get(name)
+    if value in (None, ""):
+        return default
+    value = int(value)
+    if value < 0:
+        raise ValueError(f"{name} must not be negative")
+    return value
+
+
+def _history_etag(session):
+    """
+    Validator for a session's history: changes when a message is added,
+    the session is edited or today's question count moves.
+    """
+    state = (
+        f"{session.id}:{session.last_seq}:{session.updated_at.isoformat()}:"
+        f"{session.status}:{session.title}:{session.today_question_count}"
+    )
+    return f'"{hashlib.sha1(state.encode()).hexdigest()[:20]}"'
 
 
 class ChatHistoryView(APIView):
+    """
+    Session history. Without query params the whole session is returned;
+    any of them switches to pages, newest page first.
+
+    Query params:
+        limit: page size (default CHAT_HISTORY_PAGE_SIZE when paging)
+        before_seq: return the page of messages older than this sequence number
+        after_seq: return only messages newer than this sequence number
+
+    Messages are always in ascending sequence order. Responses carry an
+    ETag; a matching If-None-Match gets an empty 304. Sessions whose
+    messages were archived (chat.archive) are paged from the archive.
+    """
+
     renderer_classes = [UserRenderer]
     permission_classes = [IsAuthenticated]
 
     def get(self, request, session_id):
         try:
-            session = ChatSession.objects.get(id=session_id, user=request.user)
-        except ChatSession.DoesNotExist:
+            limit = _int_param(request, "limit")
+            before_seq = _int_param(request, "before_seq")
+            after_seq = _int_param(request, "after_seq")
+        except ValueError:
+            return Response(
+                {
+                    "error": "limit, before_seq and after_seq must be "
+                    "non-negative integers"
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if limit == 0 or (before_seq is not None and after_seq is not None):
+            return Response(
+                {"error": "Use a positive limit and only one of before_seq/after_seq"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if limit is not None or before_seq is not None or after_seq is not None:
+            limit = min(limit or CHAT_HISTORY_PAGE_SIZE, CHAT_HISTORY_MAX_PAGE_SIZE)
+
+        today = timezone.now().date()
+        session = (
+            ChatSession.objects.filter(id=session_id, user=request.user)
+            .annotate(
+                last_seq=Subquery(
+                    ChatMessage.objects.filter(session=OuterRef("pk"))
+                    .order_by("-sequence_number")
+                    .values("sequence_number")[:1]
+                ),
+                # No quota row yet counts as zero, so creating it does not
+                # change the ETag
+                today_question_count=Coalesce(
+                    Subquery(
+                        DailyQuestionQuota.objects.filter(
+                            user=OuterRef("user"), date=today
+                        ).values("question_count")[:1]
+                    ),
+                    0,
+                ),
+            )
+            .first()
+        )
+        if session is None:
             return Response(
                 {"error": "Session not found"}, status=status.HTTP_404_NOT_FOUND
             )
 
-        messages = session.messages.all().order_by("sequence_number")
-
-        return Response(
+        # Only a session with counted messages but none left can be archived
+        archived = None
+        if session.last_seq is None and session.message_count:
+            archived = archive.load(session.id)
+            if archived:
+                session.last_seq = archived[-1].sequence_number
+
+        etag = _history_etag(session)
+        if_none_match = request.headers.get("If-None-Match", "")
+        if if_none_match.strip() == "*" or etag in parse_etags(if_none_match):
+            response = HttpResponseNotModified()
+            response["ETag"] = etag
+            response["Cache-Control"] = "private, no-cache"
+            return response
+
+        messages = session.messages.all()
+        if limit is None:
+            if archived is not None:
+                page = archived
+            else:
+                page = list(messages.order_by("sequence_number"))
+            has_more = False
+        elif archived is not None:
+            if after_seq is not None:
+                newer = [m for m in archived if m.sequence_number > after_seq]
+                page, has_more = newer[:limit], len(newer) > limit
+            else:
+                older = [
+                    m
+                    for m in archived
+                    if before_seq is None or m.sequence_number < before_seq
+                ]
+                page, has_more = older[-limit:], len(older) > limit
+        elif after_seq is not None:
+            page = list(
+                messages.filter(sequence_number__gt=after_seq).order_by(
+                    "sequence_number"
+                )[: limit + 1]
+            )
+            has_more = len(page) > limit
+            page = page[:limit]
+        else:
+            if before_seq is not None:
+                messages = messages.filter(sequence_number__lt=before_seq)
+            page = list(messages.order_by("-sequence_number")[: limit + 1])
+            has_more = len(page) > limit
+            page = page[:limit][::-1]
+
+        if page:
+            newest_seq = page[-1].sequence_number
+        else:
+            newest_seq = after_seq if after_seq is not None else session.last_seq
+
+        response = Response(
             {
                 "message": "Chat history retrieved successfully",
                 "data": {
                     "session": ChatSessionSerializer(session).data,
-                    "messages": ChatHistorySerializer(messages, many=True).data,
+                    "messages": ChatHistorySerializer(page, many=True).data,
+                    "pagination": {
+                        "limit": limit,
+                        "has_more": has_more,
+                        # Cursor for the next older page (backward paging)
+                        "before_seq": (
+                            page[0].sequence_number
+                            if page and has_more and after_seq is None
+                            else None
+                        ),
+                        # Cursor for incremental polling
+                        "after_seq": newest_seq,
+                        "last_seq": session.last_seq,
+                    },
                 },
             },
             status=status.HTTP_200_OK,
         )
+        response["ETag"] = etag
+        response["Cache-Control"] = "private, no-cache"
+        return response
+
+
+def _encode_session_cursor(session):
+    raw = f"{session.started_at.isoformat()}|{session.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def _decode_session_cursor(cursor):
+    """(started_at, id) from an opaque cursor; ValueError when malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        started_at, session_id = raw.split("|")
+        return datetime.fromisoformat(started_at), uuid.UUID(session_id)
+    except (binascii.Error, UnicodeDecodeError) as e:
+        raise ValueError(str(e))
 
 
 class ListUserSessionsAPIView(APIView):
+    """
+    The user's sessions, newest first, keyset-paginated on (started_at, id).
+
+    Query params:
+        limit: page size (default SESSION_LIST_PAGE_SIZE)
+        cursor: next_cursor from the previous page
+    """
+
     renderer_classes = [UserRenderer]
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        sessions = ChatSession.objects.filter(user=request.user)
+        try:
+            limit = min(
+                _int_param(request, "limit", SESSION_LIST_PAGE_SIZE),
+                SESSION_LIST_MAX_PAGE_SIZE,
+            )
+            cursor = request.query_params.get("cursor")
+            position = _decode_session_cursor(cursor) if cursor else None
+        except ValueError:
+            return Response(
+                {"error": "Invalid limit or cursor"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if limit == 0:
+            return Response(
+                {"error": "limit must be positive"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
 
-        serializer = SessionListSerializer(sessions, many=True)
+        # Only columns held by chat_session_user_list_idx
+        sessions = (
+            ChatSession.objects.filter(user=request.user)
+            .only(*SessionListSerializer.Meta.fields)
+            .order_by("-started_at", "-id")
+        )
+        if position:
+            started_at, session_id = position
+            sessions = sessions.filter(
+                Q(started_at__lt=started_at)
+                | Q(started_at=started_at, id__lt=session_id)
+            )
+
+        page = list(sessions[: limit + 1])
+        has_more = len(page) > limit
+        page = page[:limit]
+
+        serializer = SessionListSerializer(page, many=True)
 
         return Response(
             {
                 "message": "Sessions retrieved successfully",
-                "data": {"sessions": serializer.data},
+                "data": {
+                    "sessions": serializer.data,
+                    "pagination": {
+                        "limit": limit,
+                        "has_more": has_more,
+                        "next_cursor": (
+                            _encode_session_cursor(page[-1]) if has_more else None
+                        ),
+                    },
+                },
             },
             status=status.HTTP_200_OK,
         )
@@ -305,8 +617,9 @@ class CreateSessionView(APIView):
                 status=SESSION_ACTIVE,
             )
 
-            # Ensure intake has pre-generated onboarding content
-            if not active_intake.suggestions or not active_intake.welcome_message:
+            # Suggestions may still be generating; the welcome message is
+            # set as soon as the intake is saved
+            if not active_intake.welcome_message:
                 return Response(
                     {
                         "error": "Session initialization data missing. Please complete the intake form first."
@@ -359,14 +672,15 @@ class TaskStatusView(APIView):
     renderer_classes = [UserRenderer]
     permission_classes = [IsAuthenticated]
 
-    def _validate_session_ownership(self, session_id, user):
+    def _validate_ownership(self, task_result, user):
+        """
+        Tasks without a session (onboarding) carry their owner's user_id;
+        a result with neither belongs to nobody.
+        """
+        session_id = task_result.get("session_id")
         if not session_id:
-            return True
-        try:
-            ChatSession.objects.get(id=session_id, user=user)
-            return True
-        except ChatSession.DoesNotExist:
-            return False
+            return task_result.get("user_id") == user.id
+        return ChatSession.objects.filter(id=session_id, user=user).exists()
 
     def get(self, request, task_id):
         try:
@@ -377,7 +691,7 @@ class TaskStatusView(APIView):
 
                 if task_result and task_result.get("success"):
                     session_id = task_result.get("session_id")
-                    if not self._validate_session_ownership(session_id, request.user):
+                    if not self._validate_ownership(task_result, request.user):
                         return Response(
                             {"error": "Unauthorized access to this task"},
                             status=status.HTTP_403_FORBIDDEN,
@@ -398,6 +712,7 @@ class TaskStatusView(APIView):
                                 "remaining_daily_questions": task_result.get(
                                     "remaining_daily_questions"
                                 ),
+                                "timings": task_result.get("timings"),
                             },
                         },
                         status=status.HTTP_200_OK,
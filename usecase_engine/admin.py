@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from usecase_engine.models import UserInput
+from usecase_engine.models import KnowledgePassage, UserInput
 
 
 class UserInputAdmin(admin.ModelAdmin):
@@ -9,3 +9,12 @@ class UserInputAdmin(admin.ModelAdmin):
 
 
 admin.site.register(UserInput, UserInputAdmin)
+
+
+class KnowledgePassageAdmin(admin.ModelAdmin):
+    list_display = ("id", "topic", "title", "source", "is_active", "updated_at")
+    list_filter = ("topic", "is_active")
+    search_fields = ("title", "text", "source")
+
+
+admin.site.register(KnowledgePassage, KnowledgePassageAdmin)
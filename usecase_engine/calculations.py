@@ -0,0 +1,290 @@
+import re
+
+import numpy as np
+
+from usecase_engine.constants import (
+    CALC_AUX_ENERGY_FACTOR,
+    CALC_AVG_AMBIENT_C,
+    CALC_BAG_KG,
+    CALC_COP,
+    CALC_DEFAULTS,
+    CALC_FIELD_ALIASES,
+    CALC_GROSS_M3_PER_T,
+    CALC_INSULATION_K_W_MK,
+    CALC_INSULATION_MAX_MM,
+    CALC_INSULATION_MIN_MM,
+    CALC_INSULATION_STEP_MM,
+    CALC_KW_PER_TR,
+    CALC_LOADING_DAYS,
+    CALC_MISC_LOAD_FACTOR,
+    CALC_OTHER_OPEX_RATE,
+    CALC_PRODUCE_TEMP_C,
+    CALC_RESPIRATION_KW_PER_T,
+    CALC_SAFETY_FACTOR,
+    CALC_SPECIFIC_HEAT_KJ_KG_K,
+    CALC_T_PER_CHAMBER,
+    CALC_TARGET_HEAT_FLUX_W_M2,
+    CALC_UTILIZATION,
+    TYPE_EXISTING,
+)
+
+# A minus sign right after a digit is a range ("1000-2000"), not a sign
+_NUMBER_RE = re.compile(r"(?<![\d.])-?(?:\d+(?:,\d{2,3})*(?:\.\d+)?|\.\d+)")
+
+# Unit words -> multiplier to the input's base unit
+_UNITS = {
+    "capacity_t": [
+        ("quintal", 0.1),
+        ("qtl", 0.1),
+        ("bag", CALC_BAG_KG / 1000),
+        ("kg", 0.001),
+    ],
+    "budget_inr": [
+        ("crore", 1e7),
+        ("cr", 1e7),
+        ("lakh", 1e5),
+        ("lac", 1e5),
+        ("thousand", 1e3),
+    ],
+    "storage_months": [("day", 1 / 30), ("week", 7 / 30), ("year", 12)],
+}
+# A unit only counts as a whole word right after its number, so "10 acres"
+# is not crore and "5000 MT (1 lakh bags)" is not bags
+_UNIT_RES = {
+    field: [(re.compile(rf"\s*{unit}s?\b"), multiplier) for unit, multiplier in units]
+    for field, units in _UNITS.items()
+}
+_RANGE_JOIN_RE = re.compile(r"\s*(?:-|to)\s*")
+
+# Output name -> decimals kept
+_ROUNDING = {
+    "capacity_t": 0,
+    "bags_50kg": 0,
+    "chambers": 0,
+    "gross_volume_m3": 0,
+    "recommended_insulation_mm": 0,
+    "field_heat_kw": 1,
+    "respiration_kw": 1,
+    "transmission_kw": 1,
+    "design_load_kw": 1,
+    "refrigeration_tr": 1,
+    "season_energy_kwh": 0,
+    "energy_kwh_per_t": 1,
+    "season_energy_cost_inr": 0,
+    "capex_inr": 0,
+    "annual_revenue_inr": 0,
+    "annual_net_inr": 0,
+    "roi_pct": 1,
+    "payback_years": 1,
+}
+
+
+def parse_quantity(value, field: str) -> float:
+    """
+    Numeric value of an intake answer such as 5000, "5,000 MT",
+    "2 crore", "-2 °C" or "1000-2000 tonnes" (ranges use the midpoint);
+    NaN when there is no number.
+    """
+    if isinstance(value, bool) or value is None:
+        return np.nan
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, dict):
+        value = value.get("value", "")
+
+    text = str(value).lower()
+    matches = list(_NUMBER_RE.finditer(text))
+    if not matches:
+        return np.nan
+
+    number = float(matches[0].group().replace(",", ""))
+    end = matches[0].end()
+    if len(matches) >= 2 and _RANGE_JOIN_RE.fullmatch(
+        text, end, matches[1].start()
+    ):
+        number = (number + float(matches[1].group().replace(",", ""))) / 2
+        end = matches[1].end()
+
+    for unit, multiplier in _UNIT_RES.get(field, ()):
+        if unit.match(text, end):
+            return number * multiplier
+    return number
+
+
+def _column(intakes, field):
+    values = np.full(len(intakes), np.nan)
+    for row, intake in enumerate(intakes):
+        for key in CALC_FIELD_ALIASES[field]:
+            if key in intake:
+                values[row] = parse_quantity(intake[key], field)
+                if not np.isnan(values[row]):
+                    break
+    return values
+
+
+def evaluate_batch(intakes: list, user_choices: list = None) -> list:
+    """
+    Deterministic sizing, energy and financial metrics for many intakes.
+
+    Every formula runs once over whole columns, so evaluating a thousand
+    intakes costs about the same Python overhead as evaluating one.
+    Returns one dict per intake with NaN results omitted; inputs taken from
+    CALC_DEFAULTS are listed under "assumed".
+    """
+    intakes = [intake if isinstance(intake, dict) else {} for intake in intakes]
+    if not intakes:
+        return []
+
+    inputs = {field: _column(intakes, field) for field in CALC_FIELD_ALIASES}
+    assumed = {}
+    for field, default in CALC_DEFAULTS.items():
+        if field in inputs:
+            assumed[field] = np.isnan(inputs[field])
+            inputs[field] = np.where(assumed[field], default, inputs[field])
+
+    capacity = np.where(inputs["capacity_t"] > 0, inputs["capacity_t"], np.nan)
+    ambient, storage = inputs["ambient_c"], inputs["storage_c"]
+    delta_t = np.maximum(ambient - storage, 1.0)
+
+    chambers = np.where(
+        inputs["chambers"] > 0,
+        inputs["chambers"],
+        np.maximum(np.ceil(capacity / CALC_T_PER_CHAMBER), 1),
+    )
+    gross_volume = capacity * CALC_GROSS_M3_PER_T
+    # Envelope of a cube with the gross volume; real stores are close enough
+    envelope_m2 = 6 * gross_volume ** (2 / 3)
+
+    recommended_mm = np.clip(
+        np.ceil(
+            CALC_INSULATION_K_W_MK
+            * delta_t
+            / CALC_TARGET_HEAT_FLUX_W_M2
+            * 1000
+            / CALC_INSULATION_STEP_MM
+        )
+        * CALC_INSULATION_STEP_MM,
+        CALC_INSULATION_MIN_MM,
+        CALC_INSULATION_MAX_MM,
+    )
+    insulation_mm = np.where(
+        inputs["insulation_mm"] > 0, inputs["insulation_mm"], recommended_mm
+    )
+    u_value = CALC_INSULATION_K_W_MK / (insulation_mm / 1000)
+
+    produce_delta = np.maximum(CALC_PRODUCE_TEMP_C - storage, 0)
+    # Daily intake of warm produce cooled within a day
+    field_heat_kw = (
+        capacity
+        / CALC_LOADING_DAYS
+        * 1000
+        * CALC_SPECIFIC_HEAT_KJ_KG_K
+        * produce_delta
+        / 86400
+    )
+    respiration_kw = capacity * CALC_RESPIRATION_KW_PER_T
+    transmission_kw = u_value * envelope_m2 * delta_t / 1000
+    design_load_kw = (
+        (field_heat_kw + respiration_kw + transmission_kw)
+        * (1 + CALC_MISC_LOAD_FACTOR)
+        * CALC_SAFETY_FACTOR
+    )
+
+    storage_hours = inputs["storage_months"] * 30 * 24
+    average_transmission_kw = (
+        transmission_kw * np.maximum(CALC_AVG_AMBIENT_C - storage, 0) / delta_t
+    )
+    thermal_kwh = (
+        capacity * 1000 * CALC_SPECIFIC_HEAT_KJ_KG_K * produce_delta / 3600
+        + (respiration_kw + average_transmission_kw)
+        * (1 + CALC_MISC_LOAD_FACTOR)
+        * storage_hours
+    )
+    energy_kwh = thermal_kwh / CALC_COP * (1 + CALC_AUX_ENERGY_FACTOR)
+    energy_cost = energy_kwh * inputs["tariff_inr_kwh"]
+
+    is_build = np.ones(len(intakes), dtype=bool)
+    if user_choices is not None:
+        is_build = np.array([choice != TYPE_EXISTING for choice in user_choices])
+    capex = np.where(
+        inputs["budget_inr"] > 0,
+        inputs["budget_inr"],
+        capacity * CALC_DEFAULTS["capex_inr_per_t"],
+    )
+    capex = np.where(is_build, capex, np.nan)
+    revenue = capacity * 10 * inputs["rent_inr_quintal"] * CALC_UTILIZATION
+    net = revenue - energy_cost - capex * CALC_OTHER_OPEX_RATE
+    with np.errstate(divide="ignore", invalid="ignore"):
+        roi_pct = net / capex * 100
+        payback_years = np.where(net > 0, capex / net, np.nan)
+
+    assumed["capex_inr_per_t"] = ~(inputs["budget_inr"] > 0) & is_build
+    assumed["insulation_mm"] = ~(inputs["insulation_mm"] > 0)
+
+    outputs = {
+        "capacity_t": capacity,
+        "bags_50kg": capacity * 1000 / CALC_BAG_KG,
+        "chambers": np.where(np.isnan(capacity), np.nan, chambers),
+        "gross_volume_m3": gross_volume,
+        "recommended_insulation_mm": recommended_mm,
+        "field_heat_kw": field_heat_kw,
+        "respiration_kw": respiration_kw,
+        "transmission_kw": transmission_kw,
+        "design_load_kw": design_load_kw,
+        "refrigeration_tr": design_load_kw / CALC_KW_PER_TR,
+        "season_energy_kwh": energy_kwh,
+        "energy_kwh_per_t": energy_kwh / capacity,
+        "season_energy_cost_inr": energy_cost,
+        "capex_inr": capex,
+        "annual_revenue_inr": np.where(is_build, revenue, np.nan),
+        "annual_net_inr": np.where(is_build, net, np.nan),
+        "roi_pct": roi_pct,
+        "payback_years": payback_years,
+    }
+
+    # Round and convert whole columns up front; the per-row loop only picks
+    columns = {}
+    for name, values in outputs.items():
+        decimals = _ROUNDING[name]
+        finite = np.isfinite(values)
+        rounded = np.round(np.where(finite, values, 0), decimals)
+        if decimals == 0:
+            rounded = rounded.astype(np.int64)
+        columns[name] = (finite.tolist(), rounded.tolist())
+    assumed_columns = {field: mask.tolist() for field, mask in assumed.items()}
+    known = np.isfinite(capacity).tolist()
+
+    results = []
+    for row in range(len(intakes)):
+        if not known[row]:
+            results.append({})
+            continue
+
+        metrics = {
+            name: rounded[row]
+            for name, (finite, rounded) in columns.items()
+            if finite[row]
+        }
+        metrics["assumed"] = sorted(
+            field for field, mask in assumed_columns.items() if mask[row]
+        )
+        results.append(metrics)
+    return results
+
+
+def compute_metrics(intake_data: dict, user_choice: str = None) -> dict:
+    """Metrics for a single intake ({} when its capacity is unknown)."""
+    return evaluate_batch([intake_data], [user_choice])[0]
+
+
+def format_metrics(metrics: dict) -> str:
+    """Compact "name: value" lines for prompts."""
+    if not metrics:
+        return ""
+
+    lines = [
+        f"{name}: {value}" for name, value in metrics.items() if name != "assumed"
+    ]
+    if metrics.get("assumed"):
+        lines.append(f"assumed (typical defaults): {', '.join(metrics['assumed'])}")
+    return "\n".join(lines)
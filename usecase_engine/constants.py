@@ -8,6 +8,120 @@ USER_CHOICES = [
 
 MODEL_NAME = "gemini-2.5-flash-lite"
 
+# Localized onboarding content cache
+ONBOARDING_CACHE_KEY_PREFIX = "onboarding"
+ONBOARDING_CACHE_TTL_SECONDS = 7 * 24 * 3600  # Shared (Redis) entries
+ONBOARDING_CACHE_LOCAL_TTL_SECONDS = 15 * 60  # Per-process LRU entries
+ONBOARDING_CACHE_LOCAL_MAXSIZE = 512
+
+# Intake fields the suggestions actually depend on; everything else in the
+# intake is ignored when fingerprinting it for the cache
+ONBOARDING_FINGERPRINT_FIELDS = [
+    "primary_problem",
+    "potato_variety",
+    "variety",
+    "storage_capacity",
+    "capacity",
+    "storage_type",
+    "location",
+    "state",
+]
+
+# Calculation engine: intake keys read for each input (first match wins)
+CALC_FIELD_ALIASES = {
+    "capacity_t": [
+        "storage_capacity",
+        "capacity",
+        "capacity_tonnes",
+        "planned_capacity",
+        "storage_capacity_tonnes",
+    ],
+    "chambers": ["number_of_chambers", "chambers", "chamber_count"],
+    "budget_inr": ["budget", "investment", "total_budget", "budget_inr"],
+    "tariff_inr_kwh": ["electricity_rate", "electricity_tariff", "power_tariff"],
+    "storage_months": ["storage_duration_months", "storage_duration", "storage_months"],
+    "rent_inr_quintal": ["rent_per_quintal", "rental_rate", "storage_rent"],
+    "ambient_c": ["ambient_temperature", "max_ambient_temperature"],
+    "storage_c": ["storage_temperature", "target_temperature"],
+    "insulation_mm": ["insulation_thickness", "insulation_thickness_mm"],
+}
+
+# Typical values used when the intake does not provide an input; results
+# built on them are listed under "assumed"
+CALC_DEFAULTS = {
+    "tariff_inr_kwh": 8.0,
+    "storage_months": 8.0,
+    "rent_inr_quintal": 250.0,
+    "ambient_c": 40.0,  # Peak summer design temperature (north Indian plains)
+    "storage_c": 3.0,
+    "capex_inr_per_t": 9000.0,
+}
+
+# Engineering constants for potato cold stores
+CALC_GROSS_M3_PER_T = 2.2  # Chamber volume incl. aisles and airflow, bagged
+CALC_T_PER_CHAMBER = 1000
+CALC_BAG_KG = 50
+CALC_LOADING_DAYS = 30  # Store fills over about a month at harvest
+CALC_PRODUCE_TEMP_C = 25.0  # Field temperature of incoming potatoes
+CALC_SPECIFIC_HEAT_KJ_KG_K = 3.6
+CALC_RESPIRATION_KW_PER_T = 0.015
+CALC_AVG_AMBIENT_C = 30.0  # Season average, for energy estimates
+CALC_INSULATION_K_W_MK = 0.023  # PUF
+CALC_TARGET_HEAT_FLUX_W_M2 = 8.0
+CALC_INSULATION_STEP_MM = 25
+CALC_INSULATION_MIN_MM = 75
+CALC_INSULATION_MAX_MM = 200
+CALC_MISC_LOAD_FACTOR = 0.15  # Infiltration, fans, lights, people
+CALC_SAFETY_FACTOR = 1.1
+CALC_KW_PER_TR = 3.517
+CALC_COP = 2.5
+CALC_AUX_ENERGY_FACTOR = 0.15  # Fans, pumps, lighting on top of compressors
+CALC_UTILIZATION = 0.85
+CALC_OTHER_OPEX_RATE = 0.05  # Labour and maintenance, share of capex per year
+
+# Knowledge base (local retrieval for grounded answers)
+KB_TOPIC_VARIETIES = "varieties"
+KB_TOPIC_TEMPERATURE = "temperature"
+KB_TOPIC_HUMIDITY = "humidity"
+KB_TOPIC_SPROUTING = "sprouting"
+KB_TOPIC_CHAMBER_SIZING = "chamber_sizing"
+KB_TOPIC_ENERGY = "energy"
+KB_TOPIC_GENERAL = "general"
+
+KB_TOPIC_CHOICES = [
+    (KB_TOPIC_VARIETIES, "Potato Varieties"),
+    (KB_TOPIC_TEMPERATURE, "Storage Temperature"),
+    (KB_TOPIC_HUMIDITY, "Humidity & Ventilation"),
+    (KB_TOPIC_SPROUTING, "Sprouting Control"),
+    (KB_TOPIC_CHAMBER_SIZING, "Chamber Sizing"),
+    (KB_TOPIC_ENERGY, "Energy Use"),
+    (KB_TOPIC_GENERAL, "General"),
+]
+
+KB_TOP_K = 3
+KB_MIN_SCORE = 2.0  # Below this a match is too weak to ground an answer
+KB_SNIPPET_MAX_CHARS = 320
+KB_CHUNK_MAX_WORDS = 120  # Ingestion splits documents into passages this size
+BM25_K1 = 1.2
+BM25_B = 0.75
+# Postings are kept sorted by BM25 impact and cut to this length per term,
+# which bounds query cost regardless of corpus size
+KB_MAX_POSTINGS_PER_TERM = 256
+KB_VERSION_CACHE_KEY = "knowledge_base:version"
+KB_VERSION_CHECK_SECONDS = 30
+KB_EMBEDDING_MODEL = "gemini-embedding-001"
+# Top BM25 hits whose stored vectors stand in for a query embedding
+KB_EMBEDDING_FEEDBACK_DOCS = 2
+
+# Memory-mapped vector store (usecase_engine.vector_store)
+VECTOR_STORE_DEFAULT_DTYPE = "int8"  # "int8" (1 byte/dim) or "float16"
+VECTOR_STORE_MAX_SEGMENTS = 8  # Appends past this trigger compaction
+# Deleted or superseded share of stored rows that triggers compaction
+VECTOR_STORE_COMPACT_DEAD_RATIO = 0.2
+VECTOR_STORE_IVF_MIN_VECTORS = 20_000  # Brute force below this size
+VECTOR_STORE_IVF_NPROBE = 8
+VECTOR_STORE_SCAN_BLOCK_ROWS = 4096  # Rows dequantized per scan step
+
 SUGGESTED_QUESTIONS_SYSTEM_PROMPT = """
 ROLE:
 You are a senior cold storage consultant specializing in agricultural cold chains.
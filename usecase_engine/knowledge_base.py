@@ -0,0 +1,325 @@
+import heapq
+import logging
+import math
+import re
+import threading
+import time
+from collections import Counter, namedtuple
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import cache
+
+from usecase_engine.constants import (
+    BM25_B,
+    BM25_K1,
+    KB_CHUNK_MAX_WORDS,
+    KB_EMBEDDING_FEEDBACK_DOCS,
+    KB_EMBEDDING_MODEL,
+    KB_MAX_POSTINGS_PER_TERM,
+    KB_MIN_SCORE,
+    KB_SNIPPET_MAX_CHARS,
+    KB_TOP_K,
+    KB_VERSION_CACHE_KEY,
+    KB_VERSION_CHECK_SECONDS,
+)
+
+try:
+    import numpy as np
+except ImportError:  # Embedding search is optional; BM25 needs no extras
+    np = None
+
+logger = logging.getLogger(__name__)
+
+Passage = namedtuple("Passage", ["id", "topic", "title", "text", "source"])
+
+SEED_PASSAGES_PATH = (
+    Path(__file__).resolve().parent / "knowledge" / "seed_passages.json"
+)
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:\.[0-9]+)?")
+_STOPWORDS = frozenset(
+    """
+    a an and are as at be but by can do does for from has have how i if in into
+    is it its my of on or should so than that the their then there these they
+    this to was what when where which while who why will with would you your
+    """.split()
+)
+
+
+def tokenize(text: str) -> list:
+    """Lowercase word tokens with stopwords dropped and plurals folded."""
+    tokens = []
+    for token in _TOKEN_RE.findall((text or "").lower()):
+        if token in _STOPWORDS:
+            continue
+        if len(token) > 4 and token.endswith("es") and token[-3] in "sxz":
+            token = token[:-2]
+        elif len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+
+class BM25Index:
+    """
+    In-memory BM25 index with impact-ordered postings.
+
+    Each term's postings hold precomputed BM25 contributions sorted by
+    impact and truncated to KB_MAX_POSTINGS_PER_TERM, so a query touches at
+    most that many documents per term no matter how large the corpus is.
+    """
+
+    def __init__(
+        self, passages, k1=BM25_K1, b=BM25_B, max_postings=KB_MAX_POSTINGS_PER_TERM
+    ):
+        self.passages = list(passages)
+
+        term_freqs = []
+        doc_freq = Counter()
+        total_length = 0
+        for passage in self.passages:
+            counts = Counter(tokenize(f"{passage.title} {passage.text}"))
+            term_freqs.append(counts)
+            doc_freq.update(counts.keys())
+            total_length += sum(counts.values())
+
+        doc_count = len(self.passages)
+        avg_length = (total_length / doc_count if doc_count else 0.0) or 1.0
+
+        postings = {}
+        for doc, counts in enumerate(term_freqs):
+            norm = k1 * (1 - b + b * sum(counts.values()) / avg_length)
+            for term, tf in counts.items():
+                weight = tf * (k1 + 1) / (tf + norm)
+                postings.setdefault(term, []).append((weight, doc))
+
+        self.postings = {}
+        for term, entries in postings.items():
+            df = doc_freq[term]
+            idf = math.log(1 + (doc_count - df + 0.5) / (df + 0.5))
+            entries.sort(reverse=True)
+            self.postings[term] = tuple(
+                (doc, weight * idf) for weight, doc in entries[:max_postings]
+            )
+
+    def __len__(self):
+        return len(self.passages)
+
+    def search(self, query: str, k: int = KB_TOP_K) -> list:
+        """Top `k` (score, passage) pairs for `query`, best first."""
+        scores = {}
+        for term in set(tokenize(query)):
+            for doc, impact in self.postings.get(term, ()):
+                scores[doc] = scores.get(doc, 0.0) + impact
+
+        best = heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+        return [(score, self.passages[doc]) for doc, score in best]
+
+
+def get_data_dir() -> Path:
+    return Path(settings.KNOWLEDGE_BASE_DIR)
+
+
+def embed_texts(texts: list) -> list:
+    """Embed `texts` with the configured Gemini embedding model (ingestion)."""
+    from google import genai
+
+    from chat.constants import LLM_PROVIDER_GEMINI
+    from chat.llm_providers import get_api_key
+
+    api_key = get_api_key(LLM_PROVIDER_GEMINI)
+    if not api_key:
+        raise Exception("GEMINI_API_KEY not configured in environment")
+
+    client = genai.Client(api_key=api_key)
+    response = client.models.embed_content(
+        model=KB_EMBEDDING_MODEL, contents=texts
+    )
+    return [embedding.values for embedding in response.embeddings]
+
+
+def get_embedding_store(dim=None):
+    from usecase_engine.vector_store import VectorStore
+
+    return VectorStore(get_data_dir() / "embeddings", dim=dim)
+
+
+def save_embeddings(ids: list, vectors: list):
+    """Replace the stored passage embeddings with `ids`/`vectors`."""
+    store = get_embedding_store()
+    stale = set(store.ids()) - set(ids)
+    if stale:
+        store.delete(stale)
+    store.append(ids, vectors)
+    store.compact()
+
+
+def _load_embedding_index():
+    if np is None or not getattr(settings, "KNOWLEDGE_BASE_USE_EMBEDDINGS", False):
+        return None
+
+    try:
+        store = get_embedding_store()
+    except Exception as e:
+        logger.warning(f"Failed to open knowledge base embeddings: {e}")
+        return None
+
+    return store if len(store) else None
+
+
+def load_passages() -> list:
+    from usecase_engine.models import KnowledgePassage
+
+    return [
+        Passage(*row)
+        for row in KnowledgePassage.objects.filter(is_active=True)
+        .order_by("id")
+        .values_list("id", "topic", "title", "text", "source")
+    ]
+
+
+def split_passages(text: str, max_words: int = KB_CHUNK_MAX_WORDS) -> list:
+    """Split a document into passages on paragraph boundaries."""
+    chunks = []
+    current = []
+    for paragraph in re.split(r"\n\s*\n", text or ""):
+        words = paragraph.split()
+        if not words:
+            continue
+        if current and len(current) + len(words) > max_words:
+            chunks.append(" ".join(current))
+            current = []
+        while len(words) > max_words:
+            chunks.append(" ".join(words[:max_words]))
+            words = words[max_words:]
+        current.extend(words)
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
+
+
+def bump_version():
+    """Tell every process to rebuild its index on the next version check."""
+    try:
+        cache.set(KB_VERSION_CACHE_KEY, time.time(), timeout=None)
+    except Exception as e:
+        logger.warning(f"Failed to bump knowledge base version: {e}")
+
+
+class _IndexHolder:
+    """Process-wide index, rebuilt when the ingested version changes."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.bm25 = None
+        self.embeddings = None
+        self.by_id = {}
+        self.version = None
+        self.checked_at = 0.0
+
+    def _current_version(self):
+        try:
+            return cache.get(KB_VERSION_CACHE_KEY)
+        except Exception as e:
+            logger.warning(f"Knowledge base version check failed: {e}")
+            return self.version
+
+    def _fresh(self, now):
+        return (
+            self.bm25 is not None
+            and now - self.checked_at < KB_VERSION_CHECK_SECONDS
+        )
+
+    def get(self):
+        now = time.monotonic()
+        if self._fresh(now):
+            return self
+
+        with self._lock:
+            if self._fresh(now):
+                return self
+
+            version = self._current_version()
+            if self.bm25 is None or version != self.version:
+                started = time.perf_counter()
+                passages = load_passages()
+                self.bm25 = BM25Index(passages)
+                self.by_id = {passage.id: passage for passage in passages}
+                self.embeddings = _load_embedding_index()
+                self.version = version
+                logger.info(
+                    f"Knowledge base index built: {len(passages)} passages in "
+                    f"{(time.perf_counter() - started) * 1000:.0f}ms"
+                )
+            self.checked_at = now
+        return self
+
+
+_index = _IndexHolder()
+
+
+def search_index(index, query: str, k: int = KB_TOP_K) -> list:
+    """
+    Top `k` passages for `query` from an index (bm25, embeddings, by_id).
+
+    BM25 alone by default. When an embedding index is loaded, the stored
+    vectors of the top BM25 hits stand in for a query embedding (pseudo
+    relevance feedback) and the semantic neighbours are merged in with
+    reciprocal rank fusion. Queries are never embedded, so search makes no
+    network call and stays in-process.
+    """
+    lexical = [
+        passage
+        for score, passage in index.bm25.search(query, k)
+        if score >= KB_MIN_SCORE
+    ]
+    if index.embeddings is None or not lexical:
+        return lexical
+
+    try:
+        seeds = index.embeddings.vectors(
+            [passage.id for passage in lexical[:KB_EMBEDDING_FEEDBACK_DOCS]]
+        )
+        if not len(seeds):
+            return lexical
+        semantic = [
+            index.by_id[passage_id]
+            for _, passage_id in index.embeddings.search(seeds.mean(axis=0), k)
+            if passage_id in index.by_id
+        ]
+    except Exception as e:
+        logger.warning(f"Embedding search failed, using BM25 only: {e}")
+        return lexical
+
+    fused = {}
+    for ranking in (lexical, semantic):
+        for rank, passage in enumerate(ranking):
+            fused[passage.id] = fused.get(passage.id, 0.0) + 1 / (60 + rank)
+    best = sorted(fused, key=fused.get, reverse=True)[:k]
+    return [index.by_id[passage_id] for passage_id in best]
+
+
+def search(query: str, k: int = KB_TOP_K) -> list:
+    """Top `k` passages for `query` from the process-wide index."""
+    return search_index(_index.get(), query, k)
+
+
+def _snippet(text: str) -> str:
+    text = " ".join(text.split())
+    if len(text) <= KB_SNIPPET_MAX_CHARS:
+        return text
+    return text[:KB_SNIPPET_MAX_CHARS].rsplit(" ", 1)[0] + "..."
+
+
+def get_reference_notes(query: str, k: int = KB_TOP_K) -> str:
+    """Short grounded snippets for the answer prompt ("" when none match)."""
+    try:
+        passages = search(query, k)
+    except Exception as e:
+        logger.warning(f"Knowledge base lookup failed: {e}")
+        return ""
+
+    return "\n".join(
+        f"- {passage.title}: {_snippet(passage.text)}" for passage in passages
+    )
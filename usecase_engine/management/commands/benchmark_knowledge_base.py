@@ -0,0 +1,118 @@
+import json
+import random
+import statistics
+import tempfile
+import time
+from types import SimpleNamespace
+
+from django.core.management.base import BaseCommand
+
+from usecase_engine import knowledge_base
+
+SAMPLE_QUERIES = [
+    "What temperature should I store Kufri Jyoti potatoes at?",
+    "How do I stop potatoes sprouting in storage?",
+    "What humidity is best for a potato cold store?",
+    "How much space do I need for 500 tonnes of potatoes?",
+    "How can I reduce electricity cost of my cold storage?",
+    "Which varieties are good for chips processing?",
+    "Why are my potatoes turning sweet after cold storage?",
+    "How thick should the insulation panels be?",
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure BM25 build time and per-query latency on a synthetic corpus "
+        "derived from the seed passages, and with --embeddings the fused "
+        "BM25 + stored-vector search. Does not touch the database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--passages", type=int, default=50_000)
+        parser.add_argument("--queries", type=int, default=2_000)
+        parser.add_argument("--k", type=int, default=3)
+        parser.add_argument("--random-seed", type=int, default=7)
+        parser.add_argument(
+            "--embeddings",
+            type=int,
+            metavar="DIM",
+            help="Also time fused search over random DIM-sized passage vectors",
+        )
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["random_seed"])
+        seeds = json.loads(knowledge_base.SEED_PASSAGES_PATH.read_text("utf-8"))
+        sentences = [
+            sentence.strip()
+            for seed in seeds
+            for sentence in seed["text"].split(". ")
+            if sentence.strip()
+        ]
+        vocabulary = sorted(
+            {token for seed in seeds for token in seed["text"].lower().split()}
+        )
+
+        passages = []
+        for i in range(options["passages"]):
+            seed = seeds[i % len(seeds)]
+            text = ". ".join(rng.sample(sentences, 3))
+            # Rare tokens keep the synthetic vocabulary from being unrealistically small
+            text += " " + " ".join(rng.sample(vocabulary, 5)) + f" lot{i}"
+            passages.append(
+                knowledge_base.Passage(i, seed["topic"], seed["title"], text, "bench")
+            )
+
+        started = time.perf_counter()
+        index = knowledge_base.BM25Index(passages)
+        build_seconds = time.perf_counter() - started
+
+        queries = [rng.choice(SAMPLE_QUERIES) for _ in range(options["queries"])]
+        self.stdout.write(
+            f"passages={len(index)} terms={len(index.postings)} "
+            f"build={build_seconds:.2f}s"
+        )
+        self._report("bm25", lambda query: index.search(query, options["k"]), queries)
+
+        if options["embeddings"]:
+            with tempfile.TemporaryDirectory() as directory:
+                self._benchmark_fused(index, passages, queries, directory, options)
+
+    def _benchmark_fused(self, bm25, passages, queries, directory, options):
+        from usecase_engine.vector_store import VectorStore, np
+
+        vectors = np.random.default_rng(options["random_seed"]).normal(
+            size=(len(passages), options["embeddings"])
+        )
+        started = time.perf_counter()
+        store = VectorStore(directory)
+        store.append([passage.id for passage in passages], vectors)
+        store.compact()
+        self.stdout.write(f"vectors stored in {time.perf_counter() - started:.2f}s")
+
+        fused = SimpleNamespace(
+            bm25=bm25,
+            embeddings=store,
+            by_id={passage.id: passage for passage in passages},
+        )
+        self._report(
+            "fused",
+            lambda query: knowledge_base.search_index(fused, query, options["k"]),
+            queries,
+        )
+
+    def _report(self, label, search, queries):
+        timings = []
+        for query in queries:
+            started = time.perf_counter()
+            search(query)
+            timings.append((time.perf_counter() - started) * 1000)
+
+        timings.sort()
+        self.stdout.write(
+            f"{label} query ms: mean={statistics.mean(timings):.3f} "
+            f"p50={timings[len(timings) // 2]:.3f} "
+            f"p95={timings[int(len(timings) * 0.95)]:.3f} "
+            f"p99={timings[int(len(timings) * 0.99)]:.3f} "
+            f"max={timings[-1]:.3f}"
+        )
@@ -0,0 +1,147 @@
+import multiprocessing
+import statistics
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from usecase_engine import vector_store
+
+
+def _memory_kb():
+    """Resident, proportional and private memory of this process (Linux)."""
+    usage = {}
+    try:
+        with open("/proc/self/smaps_rollup") as fh:
+            for line in fh:
+                field, _, value = line.partition(":")
+                if field in ("Rss", "Pss", "Private_Dirty"):
+                    usage[field.lower()] = int(value.split()[0])
+    except OSError:
+        pass
+    return usage
+
+
+def _latency(store, queries, k, nprobe):
+    timings = []
+    for query in queries:
+        started = time.perf_counter()
+        store.search(query, k, nprobe=nprobe)
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return (
+        f"mean={statistics.mean(timings):.2f}ms "
+        f"p50={timings[len(timings) // 2]:.2f}ms "
+        f"p95={timings[int(len(timings) * 0.95)]:.2f}ms"
+    )
+
+
+def _worker(directory, queries, k, results):
+    before = _memory_kb()
+    store = vector_store.VectorStore(directory)
+    # Probe every list so each worker maps the whole file
+    nprobe = len(store.segments[0].centroids)
+    for query in queries:
+        store.search(query, k, nprobe=nprobe)
+    after = _memory_kb()
+    results.put({field: after[field] - before.get(field, 0) for field in after})
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the memory-mapped vector store: disk size, per-worker "
+        "memory and query latency for brute-force and IVF search."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--vectors", type=int, default=50_000)
+        parser.add_argument("--dim", type=int, default=768)
+        parser.add_argument("--dtype", choices=vector_store.DTYPES, default="int8")
+        parser.add_argument("--queries", type=int, default=200)
+        parser.add_argument("--k", type=int, default=5)
+        parser.add_argument("--workers", type=int, default=4)
+        parser.add_argument("--segment-size", type=int, default=10_000)
+
+    def handle(self, *args, **options):
+        np = vector_store.np
+        if np is None:
+            raise CommandError("NumPy is required for the vector store benchmark.")
+
+        rng = np.random.default_rng(7)
+        count, dim, k = options["vectors"], options["dim"], options["k"]
+
+        # Clustered data so IVF recall is meaningful
+        centers = rng.normal(size=(64, dim)).astype(np.float32)
+        vectors = centers[rng.integers(0, 64, count)] + 0.5 * rng.normal(
+            size=(count, dim)
+        ).astype(np.float32)
+        queries = vectors[rng.integers(0, count, options["queries"])] + 0.1 * (
+            rng.normal(size=(options["queries"], dim)).astype(np.float32)
+        )
+
+        with tempfile.TemporaryDirectory() as directory:
+            store = vector_store.VectorStore(directory, dim, options["dtype"])
+
+            started = time.perf_counter()
+            for start in range(0, count, options["segment_size"]):
+                stop = min(start + options["segment_size"], count)
+                store.append(range(start, stop), vectors[start:stop])
+            self.stdout.write(
+                f"appended {count} x {dim} {options['dtype']} in "
+                f"{len(store.segments)} segments: "
+                f"{time.perf_counter() - started:.1f}s, "
+                f"{store.disk_bytes() / 2**20:.1f} MiB on disk "
+                f"(float32 in memory: {count * dim * 4 / 2**20:.1f} MiB)"
+            )
+            self.stdout.write(
+                f"brute force, {len(store.segments)} segments: "
+                f"{_latency(store, queries, k, 0)}"
+            )
+
+            started = time.perf_counter()
+            store.compact(ivf_lists=0)
+            self.stdout.write(
+                f"compacted in {time.perf_counter() - started:.1f}s; brute force: "
+                f"{_latency(store, queries, k, 0)}"
+            )
+
+            started = time.perf_counter()
+            store.compact()
+            ivf_seconds = time.perf_counter() - started
+
+            normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+            hits = 0
+            for query in queries:
+                exact = np.argsort(-(normalized @ query))[:k]
+                found = {item_id for _, item_id in store.search(query, k)}
+                hits += len(found & set(int(i) for i in exact))
+            self.stdout.write(
+                f"ivf ({len(store.segments[0].centroids)} lists, "
+                f"nprobe={vector_store.VECTOR_STORE_IVF_NPROBE}) built in "
+                f"{ivf_seconds:.1f}s: "
+                f"{_latency(store, queries, k, vector_store.VECTOR_STORE_IVF_NPROBE)} "
+                f"recall@{k}={hits / (len(queries) * k):.3f}"
+            )
+
+            # Fresh interpreters, so workers do not inherit this process's arrays
+            context = multiprocessing.get_context("spawn")
+            results = context.Queue()
+            workers = [
+                context.Process(target=_worker, args=(directory, queries, k, results))
+                for _ in range(options["workers"])
+            ]
+            for worker in workers:
+                worker.start()
+            usage = [results.get() for _ in workers]
+            for worker in workers:
+                worker.join()
+
+            def mean_mib(field):
+                return statistics.mean(u.get(field, 0) for u in usage) / 1024
+
+            self.stdout.write(
+                f"{options['workers']} workers after full scans, growth per worker: "
+                f"RSS {mean_mib('rss'):.1f} MiB, PSS {mean_mib('pss'):.1f} MiB, "
+                f"private {mean_mib('private_dirty'):.1f} MiB "
+                "(mapped pages are shared through the page cache)"
+            )
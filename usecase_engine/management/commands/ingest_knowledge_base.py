@@ -0,0 +1,143 @@
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from usecase_engine import knowledge_base
+from usecase_engine.constants import KB_TOPIC_CHOICES, KB_TOPIC_GENERAL
+from usecase_engine.models import KnowledgePassage
+
+TOPICS = {code for code, _ in KB_TOPIC_CHOICES}
+TEXT_SUFFIXES = {".md", ".txt"}
+JSON_SUFFIXES = {".json", ".jsonl"}
+
+
+class Command(BaseCommand):
+    help = (
+        "Load knowledge base passages from JSON/JSONL/Markdown/text files "
+        "and refresh the retrieval index in every process."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "paths",
+            nargs="*",
+            help="Files or directories to ingest.",
+        )
+        parser.add_argument(
+            "--seed",
+            action="store_true",
+            help="Also ingest the bundled seed passages.",
+        )
+        parser.add_argument(
+            "--topic",
+            default=KB_TOPIC_GENERAL,
+            choices=sorted(TOPICS),
+            help="Topic for Markdown/text passages (JSON entries set their own).",
+        )
+        parser.add_argument(
+            "--embed",
+            action="store_true",
+            help="Compute and store embeddings for all active passages "
+            "(requires NumPy and a Gemini API key).",
+        )
+
+    def handle(self, *args, **options):
+        files = []
+        if options["seed"]:
+            files.append(knowledge_base.SEED_PASSAGES_PATH)
+        for raw_path in options["paths"]:
+            path = Path(raw_path)
+            if path.is_dir():
+                files.extend(
+                    sorted(
+                        child
+                        for child in path.rglob("*")
+                        if child.suffix in TEXT_SUFFIXES | JSON_SUFFIXES
+                    )
+                )
+            elif path.is_file():
+                files.append(path)
+            else:
+                raise CommandError(f"No such file or directory: {raw_path}")
+
+        if not files and not options["embed"]:
+            raise CommandError("Nothing to ingest: pass paths and/or --seed.")
+
+        total = 0
+        for path in files:
+            passages = self._read_passages(path, options["topic"])
+            source = str(path)
+            if path == knowledge_base.SEED_PASSAGES_PATH:
+                source = path.name
+
+            # Re-ingesting a file replaces its previous passages
+            with transaction.atomic():
+                KnowledgePassage.objects.filter(source=source).delete()
+                KnowledgePassage.objects.bulk_create(
+                    KnowledgePassage(source=source, **passage) for passage in passages
+                )
+
+            total += len(passages)
+            self.stdout.write(f"  {len(passages):>5} passages from {source}")
+
+        if options["embed"]:
+            self._embed()
+
+        knowledge_base.bump_version()
+        self.stdout.write(self.style.SUCCESS(f"Ingested {total} passages"))
+
+    def _read_passages(self, path, default_topic):
+        if path.suffix in JSON_SUFFIXES:
+            raw = path.read_text(encoding="utf-8")
+            if path.suffix == ".jsonl":
+                entries = [
+                    json.loads(line) for line in raw.splitlines() if line.strip()
+                ]
+            else:
+                entries = json.loads(raw)
+
+            passages = []
+            for entry in entries:
+                if not entry.get("text"):
+                    continue
+                topic = entry.get("topic") or default_topic
+                if topic not in TOPICS:
+                    raise CommandError(f"{path}: unknown topic '{topic}'")
+                passages.append(
+                    {
+                        "topic": topic,
+                        "title": (entry.get("title") or path.stem)[:200],
+                        "text": entry["text"],
+                    }
+                )
+            return passages
+
+        text = path.read_text(encoding="utf-8")
+        title = path.stem.replace("_", " ").replace("-", " ").capitalize()
+        for line in text.splitlines():
+            if line.startswith("#"):
+                title = line.lstrip("#").strip() or title
+                break
+
+        return [
+            {"topic": default_topic, "title": title[:200], "text": chunk}
+            for chunk in knowledge_base.split_passages(text)
+        ]
+
+    def _embed(self):
+        passages = knowledge_base.load_passages()
+        ids = []
+        vectors = []
+        for start in range(0, len(passages), 100):
+            batch = passages[start : start + 100]
+            vectors.extend(
+                knowledge_base.embed_texts(
+                    [f"{passage.title}\n{passage.text}" for passage in batch]
+                )
+            )
+            ids.extend(passage.id for passage in batch)
+
+        knowledge_base.save_embeddings(ids, vectors)
+        self.stdout.write(f"  embedded {len(ids)} passages")
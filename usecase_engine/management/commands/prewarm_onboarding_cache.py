@@ -0,0 +1,67 @@
+from django.core.management.base import BaseCommand
+
+from accounts.constants import LANGUAGE_CHOICES
+from usecase_engine import onboarding_cache
+from usecase_engine.constants import USER_CHOICES
+from usecase_engine.utils import (
+    OnboardingGenerationError,
+    generate_localized_onboarding_content,
+    get_original_welcome,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate and cache the localized onboarding welcome message for every "
+        "user_choice x language combination. Run at deploy time."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Regenerate entries that are already cached.",
+        )
+        parser.add_argument(
+            "--languages",
+            nargs="+",
+            help="Only prewarm these language codes (default: all).",
+        )
+
+    def handle(self, *args, **options):
+        languages = options["languages"] or [code for code, _ in LANGUAGE_CHOICES]
+        warmed = skipped = failed = 0
+
+        for user_choice, _ in USER_CHOICES:
+            original_welcome = get_original_welcome(user_choice)
+
+            for language in languages:
+                label = f"{user_choice}/{language}"
+
+                if not options["force"] and onboarding_cache.get_cached_welcome(
+                    user_choice, language, original_welcome
+                ):
+                    skipped += 1
+                    self.stdout.write(f"  cached    {label}")
+                    continue
+
+                try:
+                    generate_localized_onboarding_content(
+                        user_choice, {}, language, original_welcome, use_cache=False
+                    )
+                except OnboardingGenerationError:
+                    pass  # Reported as failed below
+
+                if onboarding_cache.get_cached_welcome(
+                    user_choice, language, original_welcome
+                ):
+                    warmed += 1
+                    self.stdout.write(self.style.SUCCESS(f"  generated {label}"))
+                else:
+                    failed += 1
+                    self.stdout.write(self.style.ERROR(f"  failed    {label}"))
+
+        self.stdout.write(
+            f"Onboarding cache prewarm: {warmed} generated, "
+            f"{skipped} already cached, {failed} failed"
+        )
@@ -0,0 +1,53 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from usecase_engine.calculations import evaluate_batch
+from usecase_engine.models import UserInput
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute calculated_metrics for stored intakes in batches, e.g. "
+        "after the calculation constants change."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--active-only",
+            action="store_true",
+            help="Only recompute active intakes.",
+        )
+
+    def handle(self, *args, **options):
+        queryset = UserInput.objects.only("id", "user_choice", "intake_data")
+        if options["active_only"]:
+            queryset = queryset.filter(is_active=True)
+
+        batch = []
+        updated = 0
+        for user_input in queryset.iterator(chunk_size=options["batch_size"]):
+            batch.append(user_input)
+            if len(batch) >= options["batch_size"]:
+                updated += self._update(batch)
+                batch = []
+        if batch:
+            updated += self._update(batch)
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Recomputed metrics for {updated} intakes")
+        )
+
+    def _update(self, batch):
+        metrics = evaluate_batch(
+            [user_input.intake_data for user_input in batch],
+            [user_input.user_choice for user_input in batch],
+        )
+        # bulk_update skips auto_now; updated_at versions the intake
+        # snapshots chats read (chat.intake_snapshot)
+        now = timezone.now()
+        for user_input, calculated in zip(batch, metrics):
+            user_input.calculated_metrics = calculated
+            user_input.updated_at = now
+        UserInput.objects.bulk_update(batch, ["calculated_metrics", "updated_at"])
+        return len(batch)
@@ -1,7 +1,7 @@
 from django.conf import settings
 from django.db import models
 
-from usecase_engine.constants import USER_CHOICES
+from usecase_engine.constants import KB_TOPIC_CHOICES, KB_TOPIC_GENERAL, USER_CHOICES
 
 
 class UserInput(models.Model):
@@ -25,6 +25,11 @@ class UserInput(models.Model):
         blank=True,
         null=True,
     )
+    calculated_metrics = models.JSONField(
+        default=dict,
+        blank=True,
+        help_text="Deterministic sizing/energy/ROI figures computed from intake_data",
+    )
     is_active = models.BooleanField(default=True)
 
     created_at = models.DateTimeField(auto_now_add=True)
@@ -35,3 +40,30 @@ class UserInput(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
+
+
+class KnowledgePassage(models.Model):
+    topic = models.CharField(
+        max_length=30, choices=KB_TOPIC_CHOICES, default=KB_TOPIC_GENERAL
+    )
+    title = models.CharField(max_length=200)
+    text = models.TextField()
+    source = models.CharField(
+        max_length=255,
+        blank=True,
+        default="",
+        help_text="File or reference the passage was ingested from",
+    )
+    is_active = models.BooleanField(default=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"[{self.get_topic_display()}] {self.title}"
+
+    class Meta:
+        ordering = ["topic", "id"]
+        indexes = [
+            models.Index(fields=["is_active", "topic"]),
+        ]
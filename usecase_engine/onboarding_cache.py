@@ -0,0 +1,124 @@
+import hashlib
+import json
+import logging
+import threading
+
+from cachetools import TTLCache
+from django.core.cache import cache
+
+from usecase_engine.constants import (
+    ONBOARDING_CACHE_KEY_PREFIX,
+    ONBOARDING_CACHE_LOCAL_MAXSIZE,
+    ONBOARDING_CACHE_LOCAL_TTL_SECONDS,
+    ONBOARDING_CACHE_TTL_SECONDS,
+    ONBOARDING_FINGERPRINT_FIELDS,
+)
+
+logger = logging.getLogger(__name__)
+
+# Per-process front cache: TTL expiry plus LRU eviction at maxsize
+_local_cache = TTLCache(
+    maxsize=ONBOARDING_CACHE_LOCAL_MAXSIZE, ttl=ONBOARDING_CACHE_LOCAL_TTL_SECONDS
+)
+_local_lock = threading.Lock()
+
+
+def _canonical_value(value):
+    if isinstance(value, str):
+        return " ".join(value.lower().split())
+    if isinstance(value, list):
+        return sorted(_canonical_value(item) for item in value)
+    if isinstance(value, dict):
+        return {key: _canonical_value(item) for key, item in sorted(value.items())}
+    return value
+
+
+def intake_fingerprint(intake_data) -> str:
+    """Hash of the intake fields that influence onboarding content."""
+    if not isinstance(intake_data, dict):
+        intake_data = {}
+
+    relevant = {
+        field: _canonical_value(intake_data[field])
+        for field in ONBOARDING_FINGERPRINT_FIELDS
+        if intake_data.get(field) not in (None, "", [], {})
+    }
+    raw = json.dumps(relevant, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def _welcome_version(original_welcome: str) -> str:
+    # Changing the source welcome text invalidates its translations
+    return hashlib.sha256(original_welcome.encode("utf-8")).hexdigest()[:8]
+
+
+def _content_key(user_choice, language, intake_data, original_welcome) -> str:
+    return (
+        f"{ONBOARDING_CACHE_KEY_PREFIX}:content:{user_choice}:{language}:"
+        f"{_welcome_version(original_welcome)}:{intake_fingerprint(intake_data)}"
+    )
+
+
+def _welcome_key(user_choice, language, original_welcome) -> str:
+    return (
+        f"{ONBOARDING_CACHE_KEY_PREFIX}:welcome:{user_choice}:{language}:"
+        f"{_welcome_version(original_welcome)}"
+    )
+
+
+def _get(key):
+    with _local_lock:
+        value = _local_cache.get(key)
+    if value is not None:
+        return value
+
+    try:
+        value = cache.get(key)
+    except Exception as e:
+        logger.warning(f"Onboarding cache unavailable: {e}")
+        return None
+
+    if value is not None:
+        with _local_lock:
+            _local_cache[key] = value
+    return value
+
+
+def _set(key, value):
+    with _local_lock:
+        _local_cache[key] = value
+    try:
+        cache.set(key, value, timeout=ONBOARDING_CACHE_TTL_SECONDS)
+    except Exception as e:
+        logger.warning(f"Failed to store onboarding cache entry {key}: {e}")
+
+
+def get_cached_content(user_choice, language, intake_data, original_welcome):
+    """Cached (welcome_message, suggested_questions) or None."""
+    value = _get(_content_key(user_choice, language, intake_data, original_welcome))
+    if value is None:
+        return None
+    return value["welcome_message"], value["suggested_questions"]
+
+
+def get_cached_welcome(user_choice, language, original_welcome):
+    """Localized welcome message for (user_choice, language) or None."""
+    return _get(_welcome_key(user_choice, language, original_welcome))
+
+
+def cache_content(
+    user_choice,
+    language,
+    intake_data,
+    original_welcome,
+    welcome_message,
+    suggested_questions,
+):
+    _set(
+        _content_key(user_choice, language, intake_data, original_welcome),
+        {
+            "welcome_message": welcome_message,
+            "suggested_questions": suggested_questions,
+        },
+    )
+    _set(_welcome_key(user_choice, language, original_welcome), welcome_message)
@@ -32,6 +32,7 @@ class UserInputReadSerializer(UserInputBaseSerializer):
             "user_choice",
             "user_choice_display",
             "intake_data",
+            "calculated_metrics",
             "is_active",
             "created_at",
             "updated_at",
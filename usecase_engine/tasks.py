@@ -0,0 +1,94 @@
+import logging
+
+from celery import shared_task
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(bind=True, max_retries=2, default_retry_delay=5)
+def generate_onboarding_content_task(
+    self,
+    user_input_id: int,
+    language: str,
+    original_welcome: str,
+    session_id: str = None,
+    welcome_message_id: str = None,
+) -> dict:
+    """
+    Localize the welcome message and generate suggestions for an intake.
+
+    The result follows the chat task shape so clients can poll it through
+    TaskStatusView; it carries the intake owner's user_id for tasks without
+    a session. Results for a language the user has since switched away
+    from are discarded, so out-of-order tasks cannot overwrite newer content.
+    When every route keeps failing, the current content is left in place.
+    """
+    from django.utils import timezone
+
+    from chat.models import ChatMessage, ChatSession
+    from usecase_engine.models import UserInput
+    from usecase_engine.utils import (
+        OnboardingGenerationError,
+        generate_localized_onboarding_content,
+    )
+
+    try:
+        user_input = UserInput.objects.select_related("user").get(id=user_input_id)
+    except UserInput.DoesNotExist:
+        logger.error(f"[TASK] Intake not found: {user_input_id}")
+        return {"success": False, "error": "Intake not found"}
+
+    try:
+        welcome_message, suggested_questions = generate_localized_onboarding_content(
+            user_input.user_choice,
+            user_input.intake_data,
+            language,
+            original_welcome,
+        )
+    except OnboardingGenerationError as e:
+        if self.request.retries < self.max_retries:
+            logger.warning(f"[TASK] {e} for intake {user_input_id}, retrying")
+            raise self.retry(exc=e, countdown=e.retry_after)
+
+        logger.error(f"[TASK] {e} for intake {user_input_id}, keeping the default")
+        return {
+            "success": False,
+            "error": "Personalized welcome is unavailable right now",
+            "session_id": session_id,
+            "user_id": user_input.user_id,
+            "type": "onboarding",
+            "intake_id": user_input.id,
+        }
+
+    user_input.user.refresh_from_db(fields=["preferred_language"])
+    if user_input.user.preferred_language != language:
+        logger.info(
+            f"[TASK] Discarding {language} onboarding for intake {user_input_id}, "
+            f"user switched to {user_input.user.preferred_language}"
+        )
+        return {"success": False, "error": "Language changed, content discarded"}
+
+    user_input.welcome_message = welcome_message
+    user_input.suggestions = suggested_questions
+    user_input.save(update_fields=["welcome_message", "suggestions", "updated_at"])
+
+    if welcome_message_id:
+        ChatMessage.objects.filter(id=welcome_message_id).update(
+            message_text=welcome_message,
+            suggested_questions=suggested_questions,
+        )
+        # In-place edits do not add a sequence number; bump the session so
+        # chat history ETags change
+        ChatSession.objects.filter(id=session_id).update(updated_at=timezone.now())
+
+    logger.info(f"[TASK] Onboarding content ready for intake {user_input_id}")
+
+    return {
+        "success": True,
+        "session_id": session_id,
+        "user_id": user_input.user_id,
+        "type": "onboarding",
+        "intake_id": user_input.id,
+        "response_message": welcome_message,
+        "suggestions": suggested_questions,
+    }
@@ -1,3 +1,399 @@
-from django.test import TestCase
+import io
+import tempfile
+import threading
+import unittest
+from unittest import mock
 
-# Create your tests here.
+from celery.exceptions import Retry
+from django.core.cache import cache
+from django.test import SimpleTestCase
+
+from advisory.testing import SAMPLE_INTAKE, QueryBudgetTestCase
+from chat import llm_calls
+from chat.circuit_breaker import CircuitBreaker
+from chat.llm_providers import LLMResponse
+from usecase_engine import (
+    calculations,
+    knowledge_base,
+    onboarding_cache,
+    utils,
+    vector_store,
+)
+from usecase_engine.models import UserInput
+from usecase_engine.tasks import generate_onboarding_content_task
+from usecase_engine.vector_store import VectorStore
+
+np = vector_store.np
+
+
+class UsecaseEngineQueryBudgetTests(QueryBudgetTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = cls.make_user("farmer@example.com")
+        # A previous intake, deactivated by the new one
+        cls.make_session(cls.user, messages=2)
+
+    def setUp(self):
+        self.client = self.client_for(self.user)
+
+    def test_create_intake(self):
+        response = self.assertWithinBudget(
+            self.client,
+            "intake-list",
+            "POST",
+            "/intake/",
+            {"user_choice": "build", "intake_data": SAMPLE_INTAKE},
+            expected_status=201,
+        )
+        self.assertIn("session_id", response.json()["data"])
+
+    def test_recomputed_metrics_change_the_intake_version(self):
+        from django.core.management import call_command
+
+        from chat import intake_snapshot
+
+        user_input = UserInput.objects.get(user=self.user)
+        version = intake_snapshot.get_version(user_input)
+        UserInput.objects.filter(id=user_input.id).update(calculated_metrics={})
+
+        call_command("recompute_intake_metrics", stdout=io.StringIO())
+        user_input.refresh_from_db()
+        self.assertNotEqual(intake_snapshot.get_version(user_input), version)
+        self.assertIn("capacity_t", user_input.calculated_metrics)
+
+
+@unittest.skipIf(np is None, "NumPy is not installed")
+class CalculationTests(SimpleTestCase):
+    def test_parse_quantity(self):
+        cases = [
+            (5000, "capacity_t", 5000),
+            ("5,000 MT", "capacity_t", 5000),
+            ("500 quintal", "capacity_t", 50),
+            ("1000-2000 tonnes", "capacity_t", 1500),
+            ("2 crore", "budget_inr", 2e7),
+            ("1.5 lakh", "budget_inr", 1.5e5),
+            ("6 weeks", "storage_months", 1.4),
+            ("-5", "storage_c", -5),
+            ("-2 °C", "storage_c", -2),
+            ("-4 to -2", "storage_c", -3),
+            ({"value": "8 months"}, "storage_months", 8),
+            ("10 acres", "budget_inr", 10),
+            ("5000 MT (approx 1 lakh bags)", "capacity_t", 5000),
+            ("5000 MT in 2-3 chambers", "capacity_t", 5000),
+            ("1-2 crore", "budget_inr", 1.5e7),
+        ]
+        for value, field, expected in cases:
+            with self.subTest(value=value):
+                self.assertAlmostEqual(
+                    calculations.parse_quantity(value, field), expected
+                )
+        for value in (None, True, "", "not sure"):
+            with self.subTest(value=value):
+                self.assertTrue(np.isnan(calculations.parse_quantity(value, "x")))
+
+    def test_negative_inputs_keep_their_sign(self):
+        chilled = calculations.compute_metrics(
+            {**SAMPLE_INTAKE, "storage_temperature": "2 °C"}, "build"
+        )
+        frozen = calculations.compute_metrics(
+            {**SAMPLE_INTAKE, "storage_temperature": "-2 °C"}, "build"
+        )
+        self.assertGreater(frozen["transmission_kw"], chilled["transmission_kw"])
+        self.assertEqual(
+            calculations.compute_metrics({"storage_capacity": "-5000 MT"}), {}
+        )
+
+
+class VectorStoreTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.rng = np.random.default_rng(0)
+        self.query = self.rng.normal(size=16)
+
+    def _near(self, count, noise):
+        return self.query + noise * self.rng.normal(size=(count, 16))
+
+    def _ids(self, start, stop):
+        return [f"p{i}" for i in range(start, stop)]
+
+    def test_concurrent_writers_keep_each_others_segments(self):
+        # Separate instances share no in-process lock, like worker processes
+        stores = [VectorStore(self.directory) for _ in range(4)]
+        vectors = self.rng.normal(size=(5, 16))
+
+        def write(index, store):
+            for batch in range(5):
+                start = index * 100 + batch * 5
+                store.append(self._ids(start, start + 5), vectors)
+
+        threads = [
+            threading.Thread(target=write, args=(index, store))
+            for index, store in enumerate(stores)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(VectorStore(self.directory)), 100)
+
+    def test_deleted_nearest_rows_do_not_hide_live_ones(self):
+        store = VectorStore(self.directory)
+        vectors = np.vstack(
+            [self._near(20, 0.01), self._near(3, 0.3), self.rng.normal(size=(197, 16))]
+        )
+        store.append(self._ids(0, 220), vectors)
+
+        store.delete(self._ids(0, 20))
+        # Below the compaction threshold: the tombstones stay in the segment
+        self.assertEqual(len(store.segments[0]), 220)
+        self.assertEqual(len(store), 200)
+        results = store.search(self.query, k=3)
+        self.assertEqual({item_id for _, item_id in results}, set(self._ids(20, 23)))
+
+    def test_append_supersedes_and_dead_rows_trigger_compaction(self):
+        store = VectorStore(self.directory)
+        store.append(self._ids(0, 100), self.rng.normal(size=(100, 16)))
+        store.append(["p5"], self._near(1, 0.01))
+        self.assertEqual(len(store.segments), 2)
+        self.assertEqual(store.search(self.query, k=1)[0][1], "p5")
+        self.assertEqual(len(store), 100)
+
+        store.delete(self._ids(50, 80))
+        self.assertEqual(len(store.segments), 1)
+        self.assertEqual(len(store.segments[0]), 70)
+        self.assertEqual(store.manifest["deleted"], [])
+        self.assertEqual(store.search(self.query, k=1)[0][1], "p5")
+
+        # Another process sees the compacted store
+        self.assertEqual(sorted(VectorStore(self.directory).ids()), sorted(store.ids()))
+
+    def test_ivf_search_matches_brute_force_when_probing_every_list(self):
+        store = VectorStore(self.directory)
+        store.append(self._ids(0, 500), self.rng.normal(size=(500, 16)))
+        brute_force = store.search(self.query, k=5)
+
+        store.compact(ivf_lists=8)
+        segment = store.segments[0]
+        self.assertEqual(len(segment.centroids), 8)
+        self.assertEqual(int(segment.offsets[-1]), 500)
+        self.assertEqual(
+            [item_id for _, item_id in store.search(self.query, k=5, nprobe=8)],
+            [item_id for _, item_id in brute_force],
+        )
+        self.assertEqual(len(store.search(self.query, k=5, nprobe=1)), 5)
+
+    def test_knowledge_base_fuses_stored_vectors_without_embedding_queries(self):
+        texts = ["humidity ventilation for stored potatoes", "airflow and moisture"]
+        texts += [f"filler topic{i} unrelated words" for i in range(8)]
+        passages = [
+            knowledge_base.Passage(i, "general", f"T{i}", text, "test")
+            for i, text in enumerate(texts)
+        ]
+        vectors = np.eye(len(passages), 16)
+        vectors[1] = vectors[0] + 0.1 * vectors[1]  # Close to passage 0
+        store = VectorStore(self.directory)
+        store.append([passage.id for passage in passages], vectors)
+        index = mock.Mock(
+            bm25=knowledge_base.BM25Index(passages),
+            embeddings=store,
+            by_id={passage.id: passage for passage in passages},
+        )
+
+        with mock.patch.object(knowledge_base, "embed_texts") as embed_texts:
+            results = knowledge_base.search_index(index, "humidity ventilation", 2)
+
+        embed_texts.assert_not_called()
+        self.assertEqual([passage.id for passage in results], [0, 1])
+
+
+class OnboardingGenerationTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        onboarding_cache._local_cache.clear()
+        for target in ("record_call", "record_parse_outcome"):
+            patcher = mock.patch.object(utils.routing, target)
+            setattr(self, target, patcher.start())
+            self.addCleanup(patcher.stop)
+        patcher = mock.patch.object(llm_calls.ledger, "record")
+        self.ledger_record = patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch.object(llm_calls.time, "sleep")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _generate(self):
+        return utils.generate_localized_onboarding_content(
+            "build", SAMPLE_INTAKE, "hi", "Welcome!", use_cache=False
+        )
+
+    def test_unparseable_replies_are_retried_and_billed(self):
+        reply = LLMResponse("Sorry, no JSON today.", 120, 30, 0, 150)
+        with mock.patch.object(utils.llm_providers, "generate", return_value=reply):
+            with self.assertRaises(utils.OnboardingGenerationError):
+                self._generate()
+
+        # One record per provider call, one ledger entry summing the attempts
+        self.assertEqual(self.record_call.call_count, 3)
+        self.ledger_record.assert_called_once()
+        kwargs = self.ledger_record.call_args.kwargs
+        self.assertFalse(kwargs["success"])
+        self.assertEqual(kwargs["retries"], 2)
+        self.assertEqual((kwargs["prompt_tokens"], kwargs["output_tokens"]), (360, 90))
+
+    def test_reply_is_localized_and_cached(self):
+        reply = LLMResponse(
+            '{"welcome_message": "Swagat hai!", "suggested_questions": ["Q1?"]}',
+            120,
+            30,
+            0,
+            150,
+        )
+        with mock.patch.object(utils.llm_providers, "generate", return_value=reply):
+            self.assertEqual(self._generate(), ("Swagat hai!", ["Q1?"]))
+
+        self.ledger_record.assert_called_once()
+        self.assertTrue(self.ledger_record.call_args.kwargs.get("success", True))
+        self.assertEqual(
+            onboarding_cache.get_cached_content(
+                "build", "hi", SAMPLE_INTAKE, "Welcome!"
+            ),
+            ("Swagat hai!", ["Q1?"]),
+        )
+
+    def test_open_circuit_skips_the_provider(self):
+        (provider, model), = utils.routing.get_route("ONBOARDING")
+        CircuitBreaker("ONBOARDING", key=f"ONBOARDING:{model}")._trip("test")
+
+        with mock.patch.object(utils.llm_providers, "generate") as generate:
+            with self.assertRaises(utils.OnboardingGenerationError) as raised:
+                self._generate()
+
+        self.assertEqual(raised.exception.retry_after, 30)
+        generate.assert_not_called()
+        self.record_call.assert_not_called()
+        self.ledger_record.assert_not_called()
+
+
+class OnboardingCacheTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        onboarding_cache._local_cache.clear()
+
+    def test_fingerprint_only_tracks_relevant_fields(self):
+        fingerprint = onboarding_cache.intake_fingerprint(SAMPLE_INTAKE)
+        for intake in (
+            {**SAMPLE_INTAKE, "budget": "6 crore", "full_name": "Someone Else"},
+            {**SAMPLE_INTAKE, "location": " AGRA,  uttar pradesh", "state": ""},
+        ):
+            with self.subTest(intake=intake):
+                self.assertEqual(
+                    onboarding_cache.intake_fingerprint(intake), fingerprint
+                )
+
+        other = {**SAMPLE_INTAKE, "location": "Nashik, Maharashtra"}
+        self.assertNotEqual(onboarding_cache.intake_fingerprint(other), fingerprint)
+
+    def test_entries_are_keyed_by_language_intake_and_source_text(self):
+        onboarding_cache.cache_content(
+            "build", "hi", SAMPLE_INTAKE, "Welcome!", "Swagat hai!", ["Q1?"]
+        )
+        cached = onboarding_cache.get_cached_content(
+            "build", "hi", SAMPLE_INTAKE, "Welcome!"
+        )
+        self.assertEqual(cached, ("Swagat hai!", ["Q1?"]))
+        self.assertEqual(
+            onboarding_cache.get_cached_welcome("build", "hi", "Welcome!"),
+            "Swagat hai!",
+        )
+        for args in (
+            ("build", "mr", SAMPLE_INTAKE, "Welcome!"),
+            ("existing", "hi", SAMPLE_INTAKE, "Welcome!"),
+            ("build", "hi", {**SAMPLE_INTAKE, "storage_capacity": 9000}, "Welcome!"),
+            ("build", "hi", SAMPLE_INTAKE, "Welcome back!"),
+        ):
+            with self.subTest(args=args):
+                self.assertIsNone(onboarding_cache.get_cached_content(*args))
+
+    def test_local_cache_serves_when_the_shared_cache_is_down(self):
+        with mock.patch.object(onboarding_cache.cache, "set", side_effect=OSError):
+            onboarding_cache.cache_content(
+                "build", "hi", SAMPLE_INTAKE, "Welcome!", "Swagat hai!", []
+            )
+        with mock.patch.object(onboarding_cache.cache, "get", side_effect=OSError):
+            self.assertEqual(
+                onboarding_cache.get_cached_welcome("build", "hi", "Welcome!"),
+                "Swagat hai!",
+            )
+            self.assertIsNone(
+                onboarding_cache.get_cached_welcome("build", "mr", "Welcome!")
+            )
+
+    def test_generation_is_served_from_the_cache(self):
+        onboarding_cache.cache_content(
+            "build", "hi", SAMPLE_INTAKE, "Welcome!", "Swagat hai!", ["Q1?"]
+        )
+        with mock.patch.object(utils.llm_providers, "generate") as generate:
+            content = utils.generate_localized_onboarding_content(
+                "build", SAMPLE_INTAKE, "hi", "Welcome!"
+            )
+        self.assertEqual(content, ("Swagat hai!", ["Q1?"]))
+        generate.assert_not_called()
+
+
+class OnboardingTaskTests(QueryBudgetTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = cls.make_user("farmer@example.com")
+        cls.other = cls.make_user("other@example.com")
+        cls.make_session(cls.user, messages=1)
+        cls.intake = UserInput.objects.get(user=cls.user)
+
+    def _run(self, **patch):
+        target = "usecase_engine.utils.generate_localized_onboarding_content"
+        with mock.patch(target, **patch) as generate:
+            task = generate_onboarding_content_task.delay(
+                user_input_id=self.intake.id,
+                language=self.user.preferred_language,
+                original_welcome="Welcome!",
+            )
+        return task, generate
+
+    def test_failing_routes_are_retried_then_reported(self):
+        target = "usecase_engine.utils.generate_localized_onboarding_content"
+        error = utils.OnboardingGenerationError(retry_after=7)
+        kwargs = {
+            "user_input_id": self.intake.id,
+            "language": self.user.preferred_language,
+            "original_welcome": "Welcome!",
+        }
+        task = generate_onboarding_content_task
+        with mock.patch(target, side_effect=error), mock.patch.object(
+            task, "retry", side_effect=Retry()
+        ) as retry:
+            task.push_request(retries=0)
+            with self.assertRaises(Retry):
+                task(**kwargs)
+            task.pop_request()
+            retry.assert_called_once_with(exc=error, countdown=7)
+
+            # Out of retries: report the failure, keep the current content
+            task.push_request(retries=task.max_retries)
+            result = task(**kwargs)
+            task.pop_request()
+
+        self.assertFalse(result["success"])
+        self.assertEqual(result["user_id"], self.user.id)
+        self.intake.refresh_from_db()
+        self.assertEqual(self.intake.welcome_message, "Welcome!")
+
+    def test_status_of_a_sessionless_task_is_owner_only(self):
+        task, _ = self._run(return_value=("Namaste!", ["Which variety?"]))
+        path = f"/task/{task.id}/status/"
+
+        response = self.client_for(self.other).get(path)
+        self.assertEqual(response.status_code, 403)
+        response = self.client_for(self.user).get(path)
+        self.assertEqual(response.json()["data"]["response_message"], "Namaste!")
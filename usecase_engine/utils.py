@@ -1,10 +1,28 @@
-import json
+import logging
 
-from decouple import config
-from google import genai
-from google.genai import types
+from chat import llm_calls, llm_providers, rate_limiter, routing
+from chat.circuit_breaker import CircuitOpenError
+from chat.prompt_serialization import render_intake, strip_indentation
+from usecase_engine import onboarding_cache
+from usecase_engine.constants import (
+    SUGGESTED_QUESTIONS_SYSTEM_PROMPT,
+    TYPE_BUILD,
+    TYPE_EXISTING,
+)
 
-from usecase_engine.constants import MODEL_NAME, SUGGESTED_QUESTIONS_SYSTEM_PROMPT
+logger = logging.getLogger(__name__)
+
+
+class OnboardingGenerationError(Exception):
+    """
+    No onboarding route produced content. `retry_after` is set when the
+    last route was shed by the rate limiter or an open circuit rather than
+    failing.
+    """
+
+    def __init__(self, retry_after: int = None):
+        self.retry_after = retry_after
+        super().__init__("Onboarding generation failed on every route")
 
 
 def get_suggested_questions_user_prompt(
@@ -17,12 +35,12 @@ def get_suggested_questions_user_prompt(
 
     intent_desc = intent_map.get(user_choice_key, "User Intent: General inquiry.")
 
-    return f"""
+    return strip_indentation(f"""
 {intent_desc}
 PREFERRED LANGUAGE: {preferred_language}
 
 USER INTAKE DATA:
-{json.dumps(intake_data, indent=2)}
+{render_intake(intake_data).intake}
 
 ORIGINAL WELCOME MESSAGE TO LOCALIZE:
 "{original_welcome_message}"
@@ -30,52 +48,74 @@ ORIGINAL WELCOME MESSAGE TO LOCALIZE:
 TASK:
 1. Translate/Localize the Welcome Message into {preferred_language}.
 2. Generate 3 high-impact questions in {preferred_language} that the user would logically ask next based on their intake data.
-"""
+""")
+
+
+def get_original_welcome(user_choice):
+    from chat.constants import (
+        WELCOME_MESSAGE_BUILD,
+        WELCOME_MESSAGE_DEFAULT,
+        WELCOME_MESSAGE_EXISTING,
+    )
+
+    if user_choice == TYPE_BUILD:
+        return WELCOME_MESSAGE_BUILD
+    if user_choice == TYPE_EXISTING:
+        return WELCOME_MESSAGE_EXISTING
+    return WELCOME_MESSAGE_DEFAULT
 
 
 def generate_localized_onboarding_content(
-    user_choice, intake_data, preferred_language, original_welcome
+    user_choice, intake_data, preferred_language, original_welcome, use_cache=True
 ):
+    """
+    Localized (welcome_message, suggested_questions) for an intake.
+
+    Without a provider key the original welcome and no suggestions are
+    returned; when every configured route fails, OnboardingGenerationError
+    is raised so callers can retry instead of keeping the default.
+    """
     from accounts.constants import LANGUAGE_MAP
 
-    welcome_message = original_welcome
-    suggested_questions = []
+    if use_cache:
+        cached = onboarding_cache.get_cached_content(
+            user_choice, preferred_language, intake_data, original_welcome
+        )
+        if cached:
+            return cached
 
     language_full_name = LANGUAGE_MAP.get(preferred_language, "English")
 
-    api_key = config("GEMINI_API_KEY", default=None)
-    if not api_key:
-        return welcome_message, suggested_questions
+    route = routing.get_route("ONBOARDING")
+    if not llm_providers.get_api_key(route[0][0]):
+        return original_welcome, []
 
+    user_input = get_suggested_questions_user_prompt(
+        user_choice, intake_data, language_full_name, original_welcome
+    )
+    system_instruction = SUGGESTED_QUESTIONS_SYSTEM_PROMPT.replace(
+        "{{LANGUAGE}}", language_full_name
+    )
     try:
-        user_input = get_suggested_questions_user_prompt(
-            user_choice, intake_data, language_full_name, original_welcome
+        reply = llm_calls.call_route(
+            "ONBOARDING", system_instruction, user_input, temperature=0.7
         )
-        client = genai.Client(api_key=api_key)
-
-        system_instruction = SUGGESTED_QUESTIONS_SYSTEM_PROMPT.replace(
-            "{{LANGUAGE}}", language_full_name
-        )
-
-        response = client.models.generate_content(
-            model=MODEL_NAME,
-            config=types.GenerateContentConfig(
-                system_instruction=system_instruction,
-                temperature=0.7,
-                response_mime_type="application/json",
-            ),
-            contents=user_input,
-        )
-
-        raw_reply = json.loads(response.text)
-        if isinstance(raw_reply, dict):
-            welcome_message = raw_reply.get("welcome_message", original_welcome)
-            suggested_questions = raw_reply.get("suggested_questions", [])
-
+    except (CircuitOpenError, rate_limiter.RateLimitExceeded) as e:
+        logger.warning(f"Onboarding generation shed: {e}")
+        raise OnboardingGenerationError(e.retry_after) from e
     except Exception as e:
-        import logging
-
-        logger = logging.getLogger(__name__)
-        logger.error(f"Gemini generation failed: {e}")
-
+        logger.error(f"Onboarding generation failed: {e}")
+        raise OnboardingGenerationError() from e
+
+    welcome_message = reply["welcome_message"] or original_welcome
+    suggested_questions = reply["suggested_questions"]
+
+    onboarding_cache.cache_content(
+        user_choice,
+        preferred_language,
+        intake_data,
+        original_welcome,
+        welcome_message,
+        suggested_questions,
+    )
     return welcome_message, suggested_questions
@@ -0,0 +1,437 @@
+import json
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+from usecase_engine.constants import (
+    VECTOR_STORE_COMPACT_DEAD_RATIO,
+    VECTOR_STORE_DEFAULT_DTYPE,
+    VECTOR_STORE_IVF_MIN_VECTORS,
+    VECTOR_STORE_IVF_NPROBE,
+    VECTOR_STORE_MAX_SEGMENTS,
+    VECTOR_STORE_SCAN_BLOCK_ROWS,
+)
+
+try:
+    import numpy as np
+except ImportError:  # Only embedding features need the store
+    np = None
+
+try:
+    import fcntl
+except ImportError:  # Windows: only the in-process lock applies
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = "manifest.json"
+LOCK_NAME = ".lock"
+DTYPES = ("int8", "float16")
+
+
+def _write_atomic(path: Path, write):
+    tmp = path.with_name(f".{path.name}.tmp")
+    with open(tmp, "wb") as fh:
+        write(fh)
+        fh.flush()
+        os.fsync(fh.fileno())
+    os.replace(tmp, path)
+
+
+def _normalize(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def _quantize(vectors, dtype):
+    """Quantize unit vectors; int8 rows carry their own scale."""
+    if dtype == "float16":
+        return vectors.astype(np.float16), None
+    scales = np.abs(vectors).max(axis=1) / 127.0
+    scales = np.maximum(scales, 1e-12).astype(np.float32)
+    quantized = np.rint(vectors / scales[:, None]).astype(np.int8)
+    return quantized, scales
+
+
+def _kmeans(vectors, lists, iterations=10, seed=0):
+    """Spherical k-means for IVF coarse centroids."""
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(len(vectors), lists, replace=False)].copy()
+    for _ in range(iterations):
+        assignments = np.argmax(vectors @ centroids.T, axis=1)
+        for i in range(lists):
+            members = vectors[assignments == i]
+            if len(members):
+                centroids[i] = members.mean(axis=0)
+        centroids = _normalize(centroids)
+    return centroids, np.argmax(vectors @ centroids.T, axis=1)
+
+
+class _Segment:
+    """One immutable memory-mapped segment plus its ID sidecar."""
+
+    def __init__(self, directory: Path, meta: dict):
+        self.name = meta["name"]
+        self.matrix = np.load(directory / f"{self.name}.vectors.npy", mmap_mode="r")
+        self.scales = None
+        if meta.get("scaled"):
+            self.scales = np.load(directory / f"{self.name}.scales.npy", mmap_mode="r")
+        self.ids = json.loads((directory / f"{self.name}.ids.json").read_text())
+
+        self.centroids = self.offsets = None
+        if meta.get("ivf"):
+            self.centroids = np.load(directory / f"{self.name}.centroids.npy")
+            self.offsets = np.load(directory / f"{self.name}.offsets.npy")
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _score_rows(self, start, stop, query):
+        block = self.matrix[start:stop].astype(np.float32)
+        scores = block @ query
+        if self.scales is not None:
+            scores *= self.scales[start:stop]
+        return scores
+
+    def _ranges(self, query, nprobe):
+        if self.centroids is None:
+            return [(0, len(self))]
+        probes = np.argsort(-(self.centroids @ query))[:nprobe]
+        return [
+            (int(self.offsets[i]), int(self.offsets[i + 1]))
+            for i in probes
+            if self.offsets[i + 1] > self.offsets[i]
+        ]
+
+    def search(self, query, k, nprobe, live):
+        """
+        Candidate (score, row) pairs among rows where the boolean `live`
+        mask is set, scanned in bounded blocks.
+        """
+        candidates = []
+        for start, stop in self._ranges(query, nprobe):
+            for block_start in range(start, stop, VECTOR_STORE_SCAN_BLOCK_ROWS):
+                block_stop = min(block_start + VECTOR_STORE_SCAN_BLOCK_ROWS, stop)
+                rows = np.flatnonzero(live[block_start:block_stop])
+                if not len(rows):
+                    continue
+                # Dead rows are dropped before ranking, so they cannot
+                # crowd live ones out of the top k
+                scores = self._score_rows(block_start, block_stop, query)[rows]
+                top = min(k, len(scores))
+                best = np.argpartition(-scores, top - 1)[:top]
+                candidates.extend(
+                    (float(scores[i]), block_start + int(rows[i])) for i in best
+                )
+        return candidates
+
+    def rows(self):
+        """All rows dequantized to float32, for compaction."""
+        vectors = np.asarray(self.matrix, dtype=np.float32)
+        if self.scales is not None:
+            vectors = vectors * np.asarray(self.scales)[:, None]
+        return vectors
+
+
+class VectorStore:
+    """
+    Quantized, memory-mapped embedding store.
+
+    Vectors are L2-normalized and stored as int8 (per-row scale) or float16
+    in immutable `.npy` segments opened with mmap, so every worker process
+    shares the same page-cache pages instead of holding its own copy.
+    Appends write a new segment; `compact()` merges segments, drops deleted
+    and superseded IDs and, past VECTOR_STORE_IVF_MIN_VECTORS, builds an
+    IVF partition so search only scans the nearest lists. Compaction runs
+    on its own past VECTOR_STORE_MAX_SEGMENTS segments or once deleted and
+    superseded rows exceed VECTOR_STORE_COMPACT_DEAD_RATIO of those stored.
+    """
+
+    def __init__(self, directory, dim=None, dtype=VECTOR_STORE_DEFAULT_DTYPE):
+        if np is None:
+            raise RuntimeError("NumPy is required for the vector store")
+        if dtype not in DTYPES:
+            raise ValueError(f"Unsupported dtype: {dtype}")
+
+        self.directory = Path(directory)
+        self._lock = threading.Lock()
+        self._manifest_mtime = None
+        self._live = self._live_masks = None
+        self.segments = []
+        self.manifest = {
+            "dim": dim,
+            "dtype": dtype,
+            "next_segment": 1,
+            "segments": [],
+            "deleted": [],
+        }
+        self._reload()
+
+    @property
+    def dim(self):
+        return self.manifest["dim"]
+
+    def __len__(self):
+        return len(self._live_rows())
+
+    def ids(self):
+        """IDs currently searchable."""
+        with self._lock:
+            self._reload()
+            return list(self._live_rows())
+
+    def _manifest_path(self):
+        return self.directory / MANIFEST_NAME
+
+    def _reload(self):
+        path = self._manifest_path()
+        try:
+            mtime = path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return
+        if mtime == self._manifest_mtime:
+            return
+
+        for attempt in range(3):
+            manifest = json.loads(path.read_text())
+            try:
+                segments = [
+                    _Segment(self.directory, meta) for meta in manifest["segments"]
+                ]
+                break
+            except FileNotFoundError:
+                # A concurrent compaction replaced the manifest; read it again
+                if attempt == 2:
+                    raise
+        self.manifest, self.segments = manifest, segments
+        self._manifest_mtime = mtime
+        self._live = self._live_masks = None
+
+    def refresh(self):
+        """Pick up segments written by another process."""
+        with self._lock:
+            self._reload()
+
+    @contextmanager
+    def _writing(self):
+        """
+        Hold the in-process lock and an exclusive flock on the store's lock
+        file, so manifest read-modify-writes in other processes sharing the
+        directory cannot drop this one's segments or deletions.
+        """
+        with self._lock:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            with open(self.directory / LOCK_NAME, "a") as lock_file:
+                if fcntl:
+                    # Released when the file is closed
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                yield
+
+    def _save_manifest(self):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        payload = json.dumps(self.manifest).encode()
+        _write_atomic(self._manifest_path(), lambda fh: fh.write(payload))
+        self._manifest_mtime = self._manifest_path().stat().st_mtime_ns
+        self._live = self._live_masks = None
+
+    def _live_rows(self):
+        """(segment index, row) for the newest copy of each non-deleted ID."""
+        if self._live is None:
+            deleted = set(self.manifest["deleted"])
+            latest = {}
+            for seg_index, segment in enumerate(self.segments):
+                for row, item_id in enumerate(segment.ids):
+                    latest[item_id] = (seg_index, row)
+            self._live = {
+                item_id: location
+                for item_id, location in latest.items()
+                if item_id not in deleted
+            }
+        return self._live
+
+    def _live_mask_list(self):
+        """Per segment, a boolean array marking its live rows."""
+        if self._live_masks is None:
+            masks = [np.zeros(len(segment), dtype=bool) for segment in self.segments]
+            for seg_index, row in self._live_rows().values():
+                masks[seg_index][row] = True
+            self._live_masks = masks
+        return self._live_masks
+
+    def _needs_compaction(self):
+        stored = sum(len(segment) for segment in self.segments)
+        dead = stored - len(self._live_rows())
+        return (
+            len(self.segments) > VECTOR_STORE_MAX_SEGMENTS
+            or (stored and dead / stored > VECTOR_STORE_COMPACT_DEAD_RATIO)
+        )
+
+    def _write_segment(self, vectors, ids, ivf=None):
+        name = f"segment-{self.manifest['next_segment']:06d}"
+        quantized, scales = _quantize(vectors, self.manifest["dtype"])
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        _write_atomic(
+            self.directory / f"{name}.vectors.npy", lambda fh: np.save(fh, quantized)
+        )
+        if scales is not None:
+            _write_atomic(
+                self.directory / f"{name}.scales.npy", lambda fh: np.save(fh, scales)
+            )
+        if ivf is not None:
+            centroids, offsets = ivf
+            _write_atomic(
+                self.directory / f"{name}.centroids.npy",
+                lambda fh: np.save(fh, centroids.astype(np.float32)),
+            )
+            _write_atomic(
+                self.directory / f"{name}.offsets.npy",
+                lambda fh: np.save(fh, offsets),
+            )
+        payload = json.dumps(list(ids)).encode()
+        _write_atomic(self.directory / f"{name}.ids.json", lambda fh: fh.write(payload))
+
+        self.manifest["next_segment"] += 1
+        return {"name": name, "scaled": scales is not None, "ivf": ivf is not None}
+
+    def append(self, ids, vectors):
+        """Add or replace vectors; a later append wins over earlier copies."""
+        ids = list(ids)
+        if not ids:
+            return
+
+        vectors = _normalize(vectors)
+        if vectors.shape[0] != len(ids):
+            raise ValueError("ids and vectors must have the same length")
+
+        with self._writing():
+            self._reload()
+            if self.dim is None:
+                self.manifest["dim"] = int(vectors.shape[1])
+            elif vectors.shape[1] != self.dim:
+                raise ValueError(f"Expected dim {self.dim}, got {vectors.shape[1]}")
+
+            meta = self._write_segment(vectors, ids)
+            self.manifest["segments"].append(meta)
+            appended = set(ids)
+            self.manifest["deleted"] = [
+                item_id
+                for item_id in self.manifest["deleted"]
+                if item_id not in appended
+            ]
+            self._save_manifest()
+            self.segments.append(_Segment(self.directory, meta))
+            needs_compaction = self._needs_compaction()
+
+        if needs_compaction:
+            self.compact()
+
+    def delete(self, ids):
+        with self._writing():
+            self._reload()
+            deleted = set(self.manifest["deleted"]) | set(ids)
+            self.manifest["deleted"] = sorted(deleted, key=str)
+            self._save_manifest()
+            needs_compaction = self._needs_compaction()
+
+        if needs_compaction:
+            self.compact()
+
+    def compact(self, ivf_lists=None):
+        """
+        Merge all segments into one, dropping deleted and superseded rows.
+
+        An IVF partition is built when the store is large enough (or when
+        `ivf_lists` is given); rows are stored grouped by list so each
+        probe is one contiguous slice of the memory map.
+        """
+        with self._writing():
+            self._reload()
+            live = self._live_rows()
+            old_names = [meta["name"] for meta in self.manifest["segments"]]
+
+            ids = list(live)
+            vectors = np.empty((len(ids), self.dim or 0), dtype=np.float32)
+            dequantized = {}
+            for i, item_id in enumerate(ids):
+                seg_index, row = live[item_id]
+                if seg_index not in dequantized:
+                    dequantized[seg_index] = self.segments[seg_index].rows()
+                vectors[i] = dequantized[seg_index][row]
+            vectors = _normalize(vectors) if len(ids) else vectors
+
+            ivf = None
+            if ivf_lists is None and len(ids) >= VECTOR_STORE_IVF_MIN_VECTORS:
+                ivf_lists = int(len(ids) ** 0.5)
+            if ivf_lists and len(ids) >= ivf_lists:
+                centroids, assignments = _kmeans(vectors, ivf_lists)
+                order = np.argsort(assignments, kind="stable")
+                vectors = vectors[order]
+                ids = [ids[i] for i in order]
+                counts = np.bincount(assignments, minlength=ivf_lists)
+                offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+                ivf = (centroids, offsets)
+
+            meta = self._write_segment(vectors, ids, ivf)
+            self.manifest["segments"] = [meta]
+            self.manifest["deleted"] = []
+            self._save_manifest()
+            self.segments = [_Segment(self.directory, meta)]
+
+        # Readers holding the old maps keep them alive until they reload
+        for name in old_names:
+            for path in self.directory.glob(f"{name}.*"):
+                try:
+                    path.unlink()
+                except OSError as e:
+                    logger.warning(f"Failed to remove compacted segment {path}: {e}")
+
+        logger.info(
+            f"Vector store compacted: {len(ids)} vectors, "
+            f"{len(old_names)} segments merged, ivf={ivf is not None}"
+        )
+
+    def vectors(self, ids):
+        """Stored unit vectors of the live `ids`, skipping unknown ones."""
+        with self._lock:
+            self._reload()
+            segments = list(self.segments)
+            live = self._live_rows()
+
+        rows = []
+        for item_id in ids:
+            if item_id not in live:
+                continue
+            seg_index, row = live[item_id]
+            segment = segments[seg_index]
+            vector = np.asarray(segment.matrix[row], dtype=np.float32)
+            if segment.scales is not None:
+                vector = vector * segment.scales[row]
+            rows.append(vector)
+        return np.array(rows, dtype=np.float32).reshape(len(rows), self.dim or 0)
+
+    def search(self, query_vector, k=3, nprobe=VECTOR_STORE_IVF_NPROBE):
+        """Top `k` (score, id) pairs by cosine similarity, best first."""
+        with self._lock:
+            self._reload()
+            segments = list(self.segments)
+            masks = self._live_mask_list()
+
+        if not segments or k <= 0:
+            return []
+
+        query = _normalize(np.asarray(query_vector, dtype=np.float32)[None, :])[0]
+
+        results = []
+        for segment, live in zip(segments, masks):
+            for score, row in segment.search(query, k, nprobe, live):
+                results.append((score, segment.ids[row]))
+
+        results.sort(key=lambda result: result[0], reverse=True)
+        return results[:k]
+
+    def disk_bytes(self):
+        return sum(path.stat().st_size for path in self.directory.glob("segment-*"))
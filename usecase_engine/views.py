@@ -20,6 +20,8 @@ from chat.constants import (
     WELCOME_MESSAGE_EXISTING,
 )
 from chat.models import ChatMessage, ChatSession
+from usecase_engine import onboarding_cache
+from usecase_engine.calculations import compute_metrics
 from usecase_engine.constants import (
     MODEL_NAME,
     SUGGESTED_QUESTIONS_SYSTEM_PROMPT,
@@ -69,14 +71,6 @@ class UserInputAPIView(APIView):
             if not serializer.is_valid():
                 return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-            user_input_instance = serializer.save()
-
-            chat_session = ChatSession.objects.create(
-                user=request.user,
-                intake_data=user_input_instance,
-                status=SESSION_ACTIVE,
-            )
-
             # Determine base welcome message
             if user_choice == TYPE_BUILD:
                 original_welcome = WELCOME_MESSAGE_BUILD
@@ -85,19 +79,35 @@ class UserInputAPIView(APIView):
             else:
                 original_welcome = WELCOME_MESSAGE_DEFAULT
 
-            user_language = request.user.preferred_language
-
-            from usecase_engine.utils import generate_localized_onboarding_content
+            language = request.user.preferred_language
+            cached = onboarding_cache.get_cached_content(
+                user_choice, language, intake_data, original_welcome
+            )
 
-            welcome_message, suggested_questions = (
-                generate_localized_onboarding_content(
-                    user_choice, intake_data, user_language, original_welcome
+            if cached:
+                welcome_message, suggested_questions = cached
+            else:
+                # Prewarmed translation (or the English default) until the
+                # localized content is ready
+                welcome_message = (
+                    onboarding_cache.get_cached_welcome(
+                        user_choice, language, original_welcome
+                    )
+                    or original_welcome
                 )
+                suggested_questions = []
+
+            user_input_instance = serializer.save(
+                welcome_message=welcome_message,
+                suggestions=suggested_questions,
+                calculated_metrics=compute_metrics(intake_data, user_choice),
             )
 
-            user_input_instance.suggestions = suggested_questions
-            user_input_instance.welcome_message = welcome_message
-            user_input_instance.save(update_fields=["suggestions", "welcome_message"])
+            chat_session = ChatSession.objects.create(
+                user=request.user,
+                intake_data=user_input_instance,
+                status=SESSION_ACTIVE,
+            )
 
             welcome_chat_message = ChatMessage.objects.create(
                 session=chat_session,
@@ -107,14 +117,35 @@ class UserInputAPIView(APIView):
                 suggested_questions=suggested_questions,
             )
 
+            onboarding_task_id = None
+
+            if not cached:
+                # Localized welcome + suggestions are filled in by the worker;
+                # clients poll /task/<onboarding_task_id>/status/ for them
+                from usecase_engine.tasks import generate_onboarding_content_task
+
+                task = generate_onboarding_content_task.delay(
+                    user_input_id=user_input_instance.id,
+                    language=language,
+                    original_welcome=original_welcome,
+                    session_id=str(chat_session.id),
+                    welcome_message_id=str(welcome_chat_message.id),
+                )
+                onboarding_task_id = task.id
+
             return Response(
                 {
-                    "message": "Intake created and suggestions generated successfully",
+                    "message": (
+                        "Intake created and suggestions generated successfully"
+                        if cached
+                        else "Intake created, suggestions are being generated"
+                    ),
                     "data": {
                         "intake": serializer.data,
                         "session_id": str(chat_session.id),
                         "suggested_questions": suggested_questions,
                         "welcome_message": welcome_message,
+                        "onboarding_task_id": onboarding_task_id,
                     },
                 },
                 status=status.HTTP_201_CREATED,